@@ -8,7 +8,7 @@ import io
 from llm_logger_src.llm_logger import LLMLogger
 from llm_logger_src.llm_parser import LLMLogParser
 import pathlib as pl
-from typing import Dict, List
+from typing import Any, Dict, List, Tuple
 import networkx as nx
 from plotly import graph_objects as go
 
@@ -80,12 +80,13 @@ def __get_example_graph() -> nx.Graph:
     return graph
 
 
-def __decode_file_to_graph(content_string, filename) -> nx.Graph:
+def __decode_file_to_graph(content_string, filename) -> Tuple[nx.Graph, Any]:
+    # format is selected by the suffix of 'filename' (utils.backends)
     decoded = base64.b64decode(content_string)
     file_like = io.BytesIO(decoded)
     logger = LLMLogger()
     graph = logger.load(path_or_buffer=file_like, filename=filename)
-    return graph
+    return graph, logger.content_store
 
 
 def register_render_graph(app):
@@ -111,15 +112,16 @@ def register_render_graph(app):
         
         if contents is None:
             graph = __get_example_graph()
+            content_store = None
             filename = "<example graph>"
         else:
             content_type, content_string = contents.split(',')
-            graph = __decode_file_to_graph(
+            graph, content_store = __decode_file_to_graph(
                     content_string=content_string, 
                     filename=filename,
                 )
 
-        parser = LLMLogParser(graph=graph)
+        parser = LLMLogParser(graph=graph, content_store=content_store)
         
         # DEBUG purpose only
         parser.report(
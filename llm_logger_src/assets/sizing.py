@@ -16,4 +16,9 @@ DEFAULT_SIZING = dict(
     margin_rel_col          = 0.10, # relative column margin (relative to column)
     # window
     window_height           = 1, # used for efficient rendering
+    # time layout (LLMLogParser(vertical_layout="time"))
+    time_step               = None, # absolute vertical step per second 
+                                    # (None, height of the sequence layout)
+    max_gap                 = 5.0, # [s] longer idle gaps are compressed
+    min_node_height         = 0.02, # absolute height of instant nodes
 )
@@ -164,6 +164,11 @@ NODE_STYLES = dict(
             line = dict(width=5.0, color='black'),
             mode = "lines",
         ),
+    default_critical = dict(
+            fillcolor='dodgerblue',
+            line = dict(width=5.0, color='gold'),
+            mode = "lines",
+        ),
     decision = dict(
             fillcolor='mediumvioletred',
             line = dict(width=2.0, color='black'),
@@ -174,6 +179,11 @@ NODE_STYLES = dict(
             line = dict(width=5.0, color='black'),
             mode = "lines",
         ),
+    decision_critical = dict(
+            fillcolor='mediumvioletred',
+            line = dict(width=5.0, color='gold'),
+            mode = "lines",
+        ),
     success = dict(
             fillcolor='seagreen',
             line = dict(width=2.0, color='black'),
@@ -184,6 +194,11 @@ NODE_STYLES = dict(
             line = dict(width=5.0, color='black'),
             mode = "lines",
         ),
+    success_critical = dict(
+            fillcolor='seagreen',
+            line = dict(width=5.0, color='gold'),
+            mode = "lines",
+        ),
     failure = dict(
             fillcolor='orangered',
             line = dict(width=2.0, color='black'),
@@ -194,6 +209,11 @@ NODE_STYLES = dict(
             line = dict(width=5.0, color='black'),
             mode = "lines",
         ),
+    failure_critical = dict(
+            fillcolor='orangered',
+            line = dict(width=5.0, color='gold'),
+            mode = "lines",
+        ),
     error = dict(
             fillpattern = dict(
                 fgcolor='red', 
@@ -210,6 +230,14 @@ NODE_STYLES = dict(
             line = dict(width=5.0, color='red'),
             mode = "lines",
         ),
+    error_critical = dict(
+            fillpattern = dict(
+                fgcolor='red', 
+                fillmode='replace', 
+                shape="x"),
+            line = dict(width=5.0, color='gold'),
+            mode = "lines",
+        ),
     __default__ = dict(
             fillpattern = dict(
                 fgcolor='blue', 
@@ -226,6 +254,14 @@ NODE_STYLES = dict(
             line = dict(width=2.0, color='blue'),
             mode = "lines",
         ),
+    __default_critical__ = dict(
+            fillpattern = dict(
+                fgcolor='blue', 
+                fillmode='replace', 
+                shape="x"),
+            line = dict(width=5.0, color='gold'),
+            mode = "lines",
+        ),
 )
 
 ################################################################################
@@ -260,6 +296,12 @@ CHAPTER_STYLES = dict(
             line = dict(width=3.0, color='darkslategray'),
             mode="text",
         ),
+    __default_critical__ = dict(
+            fillcolor='darkorange',
+            opacity=0.7,
+            line = dict(width=3.0, color='gold'),
+            mode="text",
+        ),
 )
 
 
@@ -277,6 +319,11 @@ EDGE_STYLES = dict(
             line = dict(width=8.0, color='black'),
             mode = "lines",
         ),
+    default_critical = dict(
+            fillcolor='gold',
+            line = dict(width=4.0, color='gold'),
+            mode = "lines",
+        ),
     __default__ = dict(
             fillcolor='blue',
             line = dict(width=1.0, color='black'),
@@ -287,4 +334,9 @@ EDGE_STYLES = dict(
             line = dict(width=8.0, color='black'),
             mode = "lines",
         ),
+    __default_critical__ = dict(
+            fillcolor='gold',
+            line = dict(width=4.0, color='gold'),
+            mode = "lines",
+        ),
 )
\ No newline at end of file
@@ -0,0 +1,557 @@
+""" Collection of log records from multiple processes into a single log-graph.
+
+Processes of one process tree use LLMLogCollector (multiprocessing.Queue),
+independent services use LLMLogServer (Unix domain socket or localhost TCP).
+
+    orchestrator
+        ├── LLMLogCollector ── collector process (owns graph, journal, save)
+        │        ▲
+        │        │ multiprocessing.Queue (batches of records)
+        │        │
+        └── worker processes ── LLMLoggerClient.log() / new_chapter()
+
+NodeIDs and ChapterIDs are drawn from counters shared by all clients, thus
+they are globally unique and 'relates_to_node_id' may reference a node logged
+by any other process.
+"""
+import pathlib as pl
+from typing import Any, Dict, List, Literal, Tuple, Union
+from collections import defaultdict
+import multiprocessing as mp
+import multiprocessing.util
+import threading
+import socketserver
+import socket
+import time
+import os
+import warnings
+import networkx as nx
+
+if __name__ == "__main__":
+    import sys
+    import os
+    project_root = pl.Path(os.getcwd()).absolute()
+    try:
+        sys.path.index(project_root)
+    except ValueError:
+        sys.path.append(project_root)
+    project_root_in_sys = sys.path[sys.path.index(project_root)]
+    print(f"TESTING: add '{project_root_in_sys}' to PYTHONPATH")
+
+try:
+    from llm_logger import LLMLogger, _last_ids
+    from utils.ids import NodeID, ChapterID, _NODE, _CHAPTER, _EDGE
+    from utils.records import _GRAPH
+    from utils.wire import connect, send_message, recv_message
+except ImportError:
+    from llm_logger_src.llm_logger import LLMLogger, _last_ids
+    from llm_logger_src.utils.ids import NodeID, ChapterID, _NODE, _CHAPTER, \
+        _EDGE
+    from llm_logger_src.utils.records import _GRAPH
+    from llm_logger_src.utils.wire import connect, send_message, recv_message
+
+
+################################################################################
+##                                  CONSTANTS                                 ##
+################################################################################
+_STOP = "__stop__"
+
+
+################################################################################
+##                               LLMLoggerClient                              ##
+################################################################################
+class LLMLoggerClient(LLMLogger):
+    """ LLMLogger which ships records to a collector instead of keeping
+        a graph. Create it with LLMLogCollector.client() and pass it to
+        worker processes (multiprocessing.Process args or ProcessPoolExecutor
+        initargs).
+    """
+
+    def __init__(self,
+            queue:mp.Queue,
+            node_counter:Any,
+            chapter_counter:Any,
+            batch_size:int=256,
+            flush_interval:float=0.5,
+            ):
+        """
+        :param queue: Queue read by the collector process.
+        :param node_counter: Shared counter (multiprocessing.Value) of NodeIDs.
+        :param chapter_counter: Shared counter (multiprocessing.Value) of
+            ChapterIDs.
+        :param batch_size: Records are sent in batches of 'batch_size',
+            defaults to 256
+        :param flush_interval: Pending records are sent with the next call if
+            the last batch is older than 'flush_interval' seconds,
+            defaults to 0.5
+        """
+        self._queue = queue
+        self._node_counter = node_counter
+        self._chapter_counter = chapter_counter
+        self._batch_size = batch_size
+        self._flush_interval = flush_interval
+        self._batch = list()
+        self._batch_lock = threading.Lock()
+        self._last_send = time.monotonic()
+        super().__init__()
+        # send pending records when the (worker) process exits
+        multiprocessing.util.Finalize(self, LLMLoggerClient.flush, args=(self,),
+                                      exitpriority=10)
+
+    def __reduce__(self):
+        return (LLMLoggerClient, (self._queue, self._node_counter,
+            self._chapter_counter, self._batch_size, self._flush_interval))
+
+    ############################################################################
+    ##                                 PUBLIC                                 ##
+    ############################################################################
+    def flush(self) -> None:
+        """ Send all pending records to the collector.
+        """
+        with self._batch_lock:
+            batch, self._batch = self._batch, list()
+            self._last_send = time.monotonic()
+        if len(batch) > 0:
+            self._queue.put(batch)
+
+    def close(self) -> None:
+        self.flush()
+
+    ############################################################################
+    ##                                PRIVATE                                 ##
+    ############################################################################
+    def _next_node_id(self) -> NodeID:
+        with self._node_counter.get_lock():
+            self._node_counter.value = self._node_counter.value + 1
+            return NodeID(self._node_counter.value)
+
+    def _next_chapter_id(self) -> ChapterID:
+        with self._chapter_counter.get_lock():
+            self._chapter_counter.value = self._chapter_counter.value + 1
+            return ChapterID(self._chapter_counter.value)
+
+    def _add_record(self, record:dict) -> None:
+        # the collector owns the graph metadata
+        if record["type"] == _GRAPH:
+            return
+        with self._batch_lock:
+            self._batch.append(record)
+            send = len(self._batch) >= self._batch_size \
+                or (time.monotonic() - self._last_send) >= self._flush_interval
+        if send:
+            self.flush()
+
+
+################################################################################
+##                               LLMLogCollector                              ##
+################################################################################
+class LLMLogCollector:
+
+    def __init__(self,
+            path:pl.Path=None,
+            filename:str=None,
+            maxsize:int=1000,
+            **kwargs,
+            ):
+        """ Collector process owning the log-graph of all clients.
+
+        :param path: Folder used to save the graph (and the journal),
+            defaults to None
+        :param filename: Filename (without suffix), defaults to None
+        :param maxsize: Maximum number of queued batches, defaults to 1000
+        :param kwargs: Passed to the LLMLogger of the collector process
+            (e.g. journal=True, flush_every=1000).
+        """
+        self.path = path
+        self.filename = filename
+        self._kwargs = kwargs
+
+        self._queue = mp.Queue(maxsize=maxsize)
+        self._node_counter = mp.Value("q", 0)
+        self._chapter_counter = mp.Value("q", 0)
+        self._receiver, self._sender = mp.Pipe(duplex=False)
+        self._process = None
+        self.stats = None
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if not isinstance(self._process, type(None)):
+            self.close()
+
+    ############################################################################
+    ##                                 PUBLIC                                 ##
+    ############################################################################
+    def start(self) -> None:
+        if not isinstance(self._process, type(None)):
+            raise RuntimeError(f"LLMLogCollector is already started!")
+        # IDs continue after the ones of an appended journal/database, the 
+        # counters are seeded before any client draws an ID
+        last = _last_ids(path=self.path, filename=self.filename, 
+                         **self._kwargs)
+        for counter, kind in [(self._node_counter, _NODE), 
+                              (self._chapter_counter, _CHAPTER)]:
+            with counter.get_lock():
+                counter.value = max(counter.value, last[kind])
+        self._process = mp.Process(
+            target=_collect,
+            args=(self._queue, self._sender, self.path, self.filename,
+                  self._kwargs),
+            name="llm-log-collector",
+            daemon=True,
+            )
+        self._process.start()
+
+    def client(self, batch_size:int=256, flush_interval:float=0.5) \
+            -> LLMLoggerClient:
+        """ Create a client logging into this collector.
+        """
+        return LLMLoggerClient(
+            queue=self._queue,
+            node_counter=self._node_counter,
+            chapter_counter=self._chapter_counter,
+            batch_size=batch_size,
+            flush_interval=flush_interval,
+            )
+
+    def close(self,
+              save:bool=True,
+              format:str="gml",
+              return_graph:bool=False) -> nx.Graph:
+        """ Stop the collector process after all queued records are applied.
+
+        :param save: Save the graph via LLMLogger.save() (requires 'path' and
+            'filename'), defaults to True
+        :param format: Format passed to LLMLogger.save(), defaults to "gml"
+        :param return_graph: Send the graph back to the calling process,
+            defaults to False
+        :return: The collected graph if 'return_graph' else None.
+        """
+        if isinstance(self._process, type(None)):
+            raise RuntimeError(f"LLMLogCollector is not started!")
+        save = save and not isinstance(self.path, type(None)) \
+            and not isinstance(self.filename, type(None))
+        self._queue.put((_STOP, save, format, return_graph))
+        self.stats, graph = self._receiver.recv()
+        self._process.join()
+        self._process = None
+        return graph
+
+
+################################################################################
+##                            LLMLoggerSocketClient                           ##
+################################################################################
+class LLMLoggerSocketClient(LLMLogger):
+    """ LLMLogger which ships records to a LLMLogServer over a single, reused 
+        connection. Records are sent in batches without waiting for a reply, 
+        IDs are leased from the server in blocks, thus log() does not pay 
+        for a round trip.
+        
+        NOTICE: NodeIDs are leased in blocks of 'lease_size', thus nodes of 
+            different clients within one chapter are ordered by lease (not 
+            strictly by time). ChapterIDs are leased one at a time.
+    """
+
+    def __init__(self,
+            address:Union[str, Tuple[str, int]],
+            batch_size:int=256,
+            flush_interval:float=0.5,
+            lease_size:int=1000,
+            ):
+        """
+        :param address: Path of the Unix domain socket or (host, port).
+        :param batch_size: Records are sent in batches of 'batch_size',
+            defaults to 256
+        :param flush_interval: Pending records are sent with the next call if
+            the last batch is older than 'flush_interval' seconds,
+            defaults to 0.5
+        :param lease_size: Number of NodeIDs leased per round trip, 
+            defaults to 1000
+        """
+        self.address = address
+        self._batch_size = batch_size
+        self._flush_interval = flush_interval
+        self._lease_size = lease_size
+        self._batch = list()
+        self._batch_lock = threading.Lock()
+        self._socket_lock = threading.Lock()
+        self._last_send = time.monotonic()
+        self._leased = iter(())
+        self._socket = connect(address)
+        super().__init__()
+        # send pending records when the (worker) process exits
+        multiprocessing.util.Finalize(self, LLMLoggerSocketClient.close, 
+                                      args=(self,), exitpriority=10)
+
+    ############################################################################
+    ##                                 PUBLIC                                 ##
+    ############################################################################
+    def flush(self) -> None:
+        """ Send all pending records, returns once the server applied them.
+        """
+        self._send_batch()
+        with self._socket_lock:
+            send_message(self._socket, dict(op="flush"))
+            recv_message(self._socket)
+
+    def close(self) -> None:
+        if self._socket.fileno() == -1:
+            return
+        self.flush()
+        self._socket.close()
+
+    ############################################################################
+    ##                                PRIVATE                                 ##
+    ############################################################################
+    def _lease(self, kind:str, size:int) -> int:
+        with self._socket_lock:
+            send_message(self._socket, dict(op="lease", kind=kind, size=size))
+            return recv_message(self._socket)["start"]
+
+    def _next_node_id(self) -> NodeID:
+        with self._batch_lock:
+            counter = next(self._leased, None)
+            if isinstance(counter, type(None)):
+                start = self._lease(kind=_NODE, size=self._lease_size)
+                self._leased = iter(range(start, start + self._lease_size))
+                counter = next(self._leased)
+        return NodeID(counter)
+
+    def _next_chapter_id(self) -> ChapterID:
+        return ChapterID(self._lease(kind=_CHAPTER, size=1))
+
+    def _add_record(self, record:dict) -> None:
+        # the server owns the graph metadata
+        if record["type"] == _GRAPH:
+            return
+        with self._batch_lock:
+            self._batch.append(record)
+            send = len(self._batch) >= self._batch_size \
+                or (time.monotonic() - self._last_send) >= self._flush_interval
+        if send:
+            self._send_batch()
+
+    def _send_batch(self) -> None:
+        with self._batch_lock:
+            batch, self._batch = self._batch, list()
+            self._last_send = time.monotonic()
+        if len(batch) > 0:
+            with self._socket_lock:
+                send_message(self._socket, dict(op="records", records=batch))
+
+
+################################################################################
+##                                LLMLogServer                                ##
+################################################################################
+class LLMLogServer:
+
+    def __init__(self,
+            address:Union[str, Tuple[str, int]],
+            path:pl.Path=None,
+            filename:str=None,
+            **kwargs,
+            ):
+        """ Collector service accepting records from LLMLoggerSocketClient 
+            (or any service speaking the utils.wire protocol).
+            
+            messages (client -> server)
+                ├── {"op": "records", "records": [record, ...]} (no reply)
+                ├── {"op": "lease", "kind": "NODE_"/"CHAP_", "size": int} 
+                |       -> {"start": int}
+                └── {"op": "flush"} -> {"ok": true}
+
+        :param address: Path of the Unix domain socket or (host, port), 
+            port 0 picks a free port (see 'address' after start()).
+        :param path: Folder used to save the graph (and the journal),
+            defaults to None
+        :param filename: Filename (without suffix), defaults to None
+        :param kwargs: Passed to the LLMLogger owning the graph
+            (e.g. journal=True, flush_every=1000).
+        """
+        self.address = address
+        self.logger = LLMLogger(path=path, filename=filename, **kwargs)
+        self._pending = defaultdict(list)
+        self._apply_lock = threading.Lock()
+        # leases continue after the IDs of an appended journal/database
+        self._counters = dict(self.logger._last_ids)
+        self._received = 0
+        self._server = None
+        self._thread = None
+        self.stats = None
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if not isinstance(self._server, type(None)):
+            self.close()
+
+    ############################################################################
+    ##                                 PUBLIC                                 ##
+    ############################################################################
+    def start(self) -> None:
+        if not isinstance(self._server, type(None)):
+            raise RuntimeError(f"LLMLogServer is already started!")
+        
+        server = self
+        class Handler(socketserver.BaseRequestHandler):
+            def handle(self):
+                server._handle(self.request)
+
+        if isinstance(self.address, (tuple, list)):
+            self._server = socketserver.ThreadingTCPServer(
+                tuple(self.address), Handler, bind_and_activate=False)
+            self._server.allow_reuse_address = True
+            self._server.server_bind()
+            self._server.server_activate()
+            self.address = self._server.server_address
+        else:
+            if os.path.exists(self.address):
+                os.remove(self.address)
+            self._server = socketserver.ThreadingUnixStreamServer(
+                str(self.address), Handler)
+        self._server.daemon_threads = True
+        self._thread = threading.Thread(
+            target=self._server.serve_forever, 
+            name="llm-log-server", 
+            daemon=True,
+            )
+        self._thread.start()
+
+    def close(self, save:bool=True, format:str="gml") -> Dict[str, int]:
+        """ Stop accepting records and save the graph via LLMLogger.save() 
+            (requires 'path' and 'filename'). Edges still waiting for a node 
+            (never received from any client) are dropped with a warning.
+
+        :return: Statistics (received, nodes, edges, unresolved_edges), also 
+            kept as 'stats'.
+        """
+        self._server.shutdown()
+        self._server.server_close()
+        self._thread.join()
+        self._server = None
+        if not isinstance(self.address, (tuple, list)) \
+            and os.path.exists(self.address):
+            os.remove(self.address)
+        with self._apply_lock:
+            unresolved = sum([len(edges) for edges in self._pending.values()])
+            if save and not isinstance(self.logger.path, type(None)) \
+                and not isinstance(self.logger.filename, type(None)):
+                self.logger.save(format=format)
+            self.logger.close()
+            graph = self.logger._graph
+            self.stats = dict(
+                received=self._received,
+                nodes=graph.number_of_nodes(),
+                edges=graph.number_of_edges(),
+                unresolved_edges=unresolved,
+                )
+        if unresolved > 0:
+            warnings.warn(
+                f"{unresolved} edge(s) reference nodes which were never "\
+                f"received, the edges are dropped!", RuntimeWarning)
+        return self.stats
+
+    ############################################################################
+    ##                                PRIVATE                                 ##
+    ############################################################################
+    def _handle(self, sock:socket.socket) -> None:
+        while True:
+            try:
+                message = recv_message(sock)
+            except (ConnectionError, ValueError):
+                return
+            if isinstance(message, type(None)):
+                return
+            op = message.get("op")
+            if op == "records":
+                with self._apply_lock:
+                    self._received = self._received + len(message["records"])
+                    _apply_batch(
+                        logger=self.logger, 
+                        pending=self._pending, 
+                        batch=message["records"],
+                        )
+            elif op == "lease":
+                with self._apply_lock:
+                    start = self._counters[message["kind"]] + 1
+                    self._counters[message["kind"]] = \
+                        self._counters[message["kind"]] + int(message["size"])
+                send_message(sock, dict(start=start))
+            elif op == "flush":
+                send_message(sock, dict(ok=True))
+            else:
+                return
+
+
+################################################################################
+##                                  _collect                                  ##
+################################################################################
+def _collect(queue:mp.Queue,
+             sender:Any,
+             path:pl.Path,
+             filename:str,
+             kwargs:Dict[str, Any]) -> None:
+    """ Main loop of the collector process.
+    """
+    logger = LLMLogger(path=path, filename=filename, **kwargs)
+    graph = logger._graph
+    # edges waiting for a node which was not received yet (other process)
+    pending = defaultdict(list)
+    received = 0
+
+    while True:
+        batch = queue.get()
+        if isinstance(batch, tuple) and batch[0] == _STOP:
+            _, save, format, return_graph = batch
+            break
+        received = received + len(batch)
+        _apply_batch(logger=logger, pending=pending, batch=batch)
+
+    unresolved = sum([len(edges) for edges in pending.values()])
+    if save:
+        logger.save(format=format)
+    logger.close()
+    stats = dict(
+        received=received,
+        nodes=graph.number_of_nodes(),
+        edges=graph.number_of_edges(),
+        unresolved_edges=unresolved,
+        )
+    sender.send((stats, graph if return_graph else None))
+
+
+################################################################################
+##                                _apply_batch                                ##
+################################################################################
+def _apply_batch(logger:LLMLogger,
+                 pending:Dict[str, List[dict]],
+                 batch:List[dict]) -> None:
+    """ Apply records received from clients. Edges referencing a vertex which 
+        was not received yet (other client) wait in 'pending'.
+    """
+    graph = logger._graph
+    # vertices are applied before edges, thus an edge may reference 
+    # any vertex of the batch
+    vertex_ids = set()
+    records = list()
+    edges = list()
+    for record in batch:
+        if record["type"] == _EDGE:
+            edges.append(record)
+        elif record["type"] != _GRAPH:
+            vertex_ids.add(record["id"])
+            records.append(record)
+            # edges waiting for this vertex
+            edges.extend(pending.pop(record["id"], list()))
+    for edge in edges:
+        for node_id in (edge["u"], edge["v"]):
+            if node_id not in vertex_ids and not graph.has_node(node_id):
+                pending[node_id].append(edge)
+                break
+        else:
+            records.append(edge)
+    logger._apply_records(records)
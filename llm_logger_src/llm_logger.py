@@ -1,11 +1,16 @@
 
 import pathlib as pl
-from typing import Any, Literal
+from typing import Any, Dict, Literal
 import networkx as nx
-import datetime as dt
 import numpy as np
-import copy
 import io
+import os
+import itertools
+import threading
+import asyncio
+import contextvars
+import contextlib
+import functools
 
 if __name__ == "__main__":
     import sys
@@ -21,12 +26,45 @@ if __name__ == "__main__":
 
 try:
     from utils.ids import NodeID, ChapterID, _NODE, _CHAPTER, \
-        _EDGE
+        _EDGE, id_counter, _LAST_COUNTER
     from utils.chapters import get_chapter_ids_with_node_ids
+    from utils.records import graph_record, chapter_record, node_record, \
+        edge_record, add_record, iter_records, _RECORD_ORDER
+    from utils.journal import JournalWriter, JOURNAL_SUFFIX
+    from utils.rotation import RotatingJournalWriter
+    from utils.database import SQLiteWriter, SQLITE_SUFFIX
+    from utils.backends import get_backend
+    from utils.writer import BackgroundWriter
+    from utils.content import ContentStore, content_path, CONTENT_SUFFIX
+    from utils.delta import DeltaEncoder, Delta, decode_graph, \
+        DELTA_REFERENCES, DELTA_ENCODING
+    from utils.gml import write_gml, segment_path, remove_segments, \
+        GML_SUFFIX
+    from utils.spill import SpillStore
+    from utils.snapshot import Snapshots
+    from utils.clock import Clock
+    from utils.spans import Span
 except ImportError:
     from llm_logger_src.utils.ids import NodeID, ChapterID, _NODE, _CHAPTER, \
-        _EDGE
+        _EDGE, id_counter, _LAST_COUNTER
     from llm_logger_src.utils.chapters import get_chapter_ids_with_node_ids
+    from llm_logger_src.utils.records import graph_record, chapter_record, \
+        node_record, edge_record, add_record, iter_records, _RECORD_ORDER
+    from llm_logger_src.utils.journal import JournalWriter, JOURNAL_SUFFIX
+    from llm_logger_src.utils.rotation import RotatingJournalWriter
+    from llm_logger_src.utils.database import SQLiteWriter, SQLITE_SUFFIX
+    from llm_logger_src.utils.backends import get_backend
+    from llm_logger_src.utils.writer import BackgroundWriter
+    from llm_logger_src.utils.content import ContentStore, content_path, \
+        CONTENT_SUFFIX
+    from llm_logger_src.utils.delta import DeltaEncoder, Delta, \
+        decode_graph, DELTA_REFERENCES, DELTA_ENCODING
+    from llm_logger_src.utils.gml import write_gml, segment_path, \
+        remove_segments, GML_SUFFIX
+    from llm_logger_src.utils.spill import SpillStore
+    from llm_logger_src.utils.snapshot import Snapshots
+    from llm_logger_src.utils.clock import Clock
+    from llm_logger_src.utils.spans import Span
 
 
 ################################################################################
@@ -37,10 +75,102 @@ class LLMLogger:
     def __init__(self,
         path:pl.Path=None,
         filename:str=None,
-        **kwargs:Literal["create_path"],
+        journal:bool=False,
+        sqlite:bool=False,
+        append:bool=True,
+        flush_every:int=1,
+        flush_interval:float=None,
+        background:bool=False,
+        queue_size:int=10000,
+        backpressure:Literal["block", "drop_oldest", "drop_newest"]="block",
+        staging:bool=False,
+        staging_size:int=1000,
+        dedup_content:bool=False,
+        dedup_min_length:int=64,
+        delta_content:Literal[None, "parent", "column"]=None,
+        delta_keyframe_every:int=32,
+        index:bool=False,
+        rotate_nodes:int=None,
+        rotate_bytes:int=None,
+        rotate_chapters:int=None,
+        rotate_interval:float=None,
+        retention:int=None,
+        resident_chapters:int=None,
+        resident_bytes:int=None,
+        spans:bool=True,
+        **kwargs:Literal["create_path", "fsync"],
         ):
+        """ Logger of the conversation flow among LLM agents.
+
+        :param path: Folder used by save() (and the journal), defaults to None
+        :param filename: Filename (without suffix) used by save() (and the 
+            journal), defaults to None
+        :param journal: Append every log()/new_chapter() as a record to 
+            '<path>/<filename>.journal', defaults to False
+        :param sqlite: Insert every log()/new_chapter() into the SQLite 
+            database '<path>/<filename>.sqlite' (WAL mode, queryable while 
+            logging), defaults to False
+        :param append: An existing journal/database is continued (IDs continue 
+            after the ones of the earlier runs), otherwise it is overwritten, 
+            defaults to True
+        :param flush_every: Journal is flushed (database committed) after 
+            every N records, defaults to 1
+        :param flush_interval: Journal is flushed (database committed) if the 
+            last flush is older than 'flush_interval' seconds, 
+            defaults to None (disabled)
+        :param background: log()/new_chapter() only assign the ID and queue 
+            the call, records are built and written by a writer thread, 
+            defaults to False
+        :param queue_size: Maximum number of queued calls in background mode, 
+            defaults to 10000
+        :param backpressure: Behavior of a full queue in background mode 
+            ('block', 'drop_oldest', 'drop_newest', chapters are never 
+            dropped), defaults to "block"
+        :param staging: Every thread collects its records in its own buffer, 
+            buffers are merged into the graph on flush() (or any read of the 
+            graph), defaults to False
+        :param staging_size: A thread merges its buffer once it holds 
+            'staging_size' records, defaults to 1000
+        :param dedup_content: Node & edge content is stored once per unique 
+            content in 'content_store' (in memory, or appended to 
+            '<path>/<filename>.content'), nodes & edges hold a ContentRef, 
+            defaults to False
+        :param dedup_min_length: Shorter content is kept inline, 
+            defaults to 64
+        :param delta_content: Node content is stored as a delta to the 
+            content of the 'parent' node (relates_to_node_id, falls back to 
+            'column') or of the previous node in the same 'column', 
+            defaults to None (full content)
+        :param delta_keyframe_every: Full content is stored at least every 
+            N-th node of a delta chain, defaults to 32
+        :param index: save() (gml) and the journal write a sidecar index 
+            '<file>.idx' of byte ranges by node, chapter, column and time, 
+            used by load(nodes=..., chapters=..., time_range=..., 
+            columns=..., styles=...), defaults to False
+        :param rotate_nodes: The journal rolls over to a new segment 
+            '<filename>.<segment>.journal' after N nodes, all segments are 
+            listed in '<filename>.manifest' (load() reads them as one log), 
+            defaults to None
+        :param rotate_bytes: Roll over after N bytes, defaults to None
+        :param rotate_chapters: Roll over after N chapters, defaults to None
+        :param rotate_interval: Roll over after N seconds, defaults to None
+        :param retention: Number of journal segments kept on disk, 
+            defaults to None (all)
+        :param resident_chapters: Only the nodes of the last N chapters are 
+            kept in memory, older nodes are spilled to a temporary file in 
+            'path' (see utils.spill), defaults to None (all)
+        :param resident_bytes: At most N bytes of node content are kept in 
+            memory, the oldest nodes are spilled, defaults to None (all)
+        :param spans: span() logs timed nodes, otherwise span() is a no-op 
+            (the clock is not read), defaults to True
+        """
         
         # sanity check
+        if not isinstance(delta_content, type(None)) \
+            and delta_content not in DELTA_REFERENCES:
+            raise ValueError(
+                f"delta_content='{delta_content}', but valid values are "\
+                f"{[None] + DELTA_REFERENCES}!")
         if not isinstance(path, type(None)):
             path = pl.Path(path).resolve()
             if kwargs.get("create_path", False):
@@ -54,21 +184,189 @@ class LLMLogger:
 
         self.path = path
         self.file = filename
+        self.filename = filename
+        
+        # state variables (next() on itertools.count is atomic)
+        self._graph = nx.Graph()
+        self._lock = threading.RLock()
+        self._snapshots = Snapshots()
+        self.__chapter_counter = itertools.count(1)
+        self.__node_counter = itertools.count(1)
+        self.__chapter_id = ChapterID(0)
+        # timestamps, wall-clock time anchored once per run
+        self._clock = Clock()
+        
+        # chapter & parent node of the current context (thread/asyncio task), 
+        # None falls back to the last opened chapter & no parent node
+        self._chapter_var = contextvars.ContextVar(
+            f"llm_logger_chapter_{id(self)}", default=None)
+        self._parent_var = contextvars.ContextVar(
+            f"llm_logger_parent_{id(self)}", default=None)
         
-        # state variables
-        self._graph = nx.Graph(
-            metadata=dict(time=str(self._get_timestamp())),
+        # running span of the current context
+        self._spans = spans
+        self._span_var = contextvars.ContextVar(
+            f"llm_logger_span_{id(self)}", default=None)
+        
+        # per-thread staging buffers
+        self._staging = staging
+        self._staging_size = staging_size
+        self._local = threading.local()
+        self._buffers = list()
+        
+        # journal & checkpoints (records since the last checkpoint)
+        self._index = index
+        self._journal = None
+        self._checkpoint = None
+        rotation = dict(
+            max_nodes=rotate_nodes, 
+            max_bytes=rotate_bytes, 
+            max_chapters=rotate_chapters, 
+            interval=rotate_interval, 
+            retention=retention,
             )
-        self.__chapter_counter = 0
-        self.__node_counter = 0
+        if any(not isinstance(value, type(None)) 
+               for value in rotation.values()) and not journal:
+            raise RuntimeError(
+                f"rotation & retention require journal=True!")
+        if journal:
+            if isinstance(path, type(None)) or isinstance(filename, type(None)):
+                raise RuntimeError(
+                    f"journal=True requires both 'path' and 'filename'!")
+            if any(not isinstance(value, type(None)) 
+                   for value in rotation.values()):
+                self._journal = RotatingJournalWriter(
+                    path=path,
+                    filename=filename,
+                    flush_every=flush_every,
+                    flush_interval=flush_interval,
+                    fsync=kwargs.get("fsync", False),
+                    index=index,
+                    **rotation,
+                    )
+            else:
+                self._journal = JournalWriter(
+                    path=pl.Path(path, str(filename)+JOURNAL_SUFFIX),
+                    flush_every=flush_every,
+                    flush_interval=flush_interval,
+                    fsync=kwargs.get("fsync", False),
+                    append=append,
+                    index=index,
+                    )
+        self._database = None
+        if sqlite:
+            if isinstance(path, type(None)) or isinstance(filename, type(None)):
+                raise RuntimeError(
+                    f"sqlite=True requires both 'path' and 'filename'!")
+            self._database = SQLiteWriter(
+                path=pl.Path(path, str(filename)+SQLITE_SUFFIX),
+                flush_every=flush_every,
+                flush_interval=flush_interval,
+                fsync=kwargs.get("fsync", False),
+                append=append,
+                )
+        # IDs continue after the ones of an appended journal/database (the 
+        # records of the earlier runs are not loaded)
+        self._last_ids = _last_ids(path=path, filename=filename, 
+            journal=journal, sqlite=sqlite, append=append, 
+            rotate_nodes=rotate_nodes, rotate_bytes=rotate_bytes, 
+            rotate_chapters=rotate_chapters, rotate_interval=rotate_interval, 
+            retention=retention)
+        self.__node_counter = itertools.count(self._last_ids[_NODE] + 1)
+        self.__chapter_counter = itertools.count(self._last_ids[_CHAPTER] + 1)
+        
+        # retention of the in-memory graph
+        self._spill = None
+        if not (isinstance(resident_chapters, type(None)) 
+                and isinstance(resident_bytes, type(None))):
+            self._spill = SpillStore(
+                path=path,
+                resident_chapters=resident_chapters,
+                resident_bytes=resident_bytes,
+                )
+        
+        # content store
+        self.content_store = None
+        if dedup_content:
+            self.content_store = ContentStore(
+                path=None if isinstance(path, type(None)) \
+                    or isinstance(filename, type(None)) \
+                    else pl.Path(path, str(filename)+CONTENT_SUFFIX),
+                min_length=dedup_min_length,
+                append=append,
+                )
+        
+        # delta encoding
+        self._delta = None
+        self._delta_reference = delta_content
+        self._last_in_column = dict()
+        if not isinstance(delta_content, type(None)):
+            self._delta = DeltaEncoder(keyframe_every=delta_keyframe_every)
+        
+        self._add_record(graph_record(time=self._get_timestamp()))
+        
+        # background writer
+        self._writer = None
+        if background:
+            self._writer = BackgroundWriter(
+                handler=self._write_queued,
+                maxsize=queue_size,
+                backpressure=backpressure,
+                # later nodes reference the chapter
+                keep=_is_chapter_item,
+                )
         
     ############################################################################
     ##                               ATTRIBUTES                               ##
     ############################################################################        
     
     @property
-    def graph(self):
-        return copy.deepcopy(self._graph)
+    def graph(self) -> nx.Graph:
+        """ Read-only (frozen) snapshot of the log-graph, sharing the content 
+            with the logger (see utils.snapshot). Only the records logged 
+            since the previous snapshot are applied (without blocking log()), 
+            the same snapshot is returned if nothing was logged. 
+            Use graph.copy() to modify the graph.
+        """
+        self._sync()
+        with self._snapshots.lock:
+            with self._lock:
+                # spilled nodes are read back from disk
+                if not isinstance(self._spill, type(None)):
+                    return nx.freeze(
+                        self._spill.restore(graph=self._graph.copy()))
+                if not self._snapshots.enabled:
+                    return self._snapshots.first(graph=self._graph)
+                changes = self._snapshots.take()
+            return self._snapshots.next(changes=changes)
+    
+    @property
+    def stats(self) -> dict:
+        """ Counters of the background writer (enqueued, processed, dropped, 
+            ...), None if background mode is disabled.
+        """
+        if isinstance(self._writer, type(None)):
+            return None
+        return self._writer.stats
+    
+    @property
+    def residency(self) -> dict:
+        """ Resident vs. spilled nodes & chapters (resident_chapters, 
+            resident_bytes), None if the retention is disabled.
+        """
+        if isinstance(self._spill, type(None)):
+            return None
+        self._sync()
+        with self._lock:
+            return self._spill.stats
+    
+    @property
+    def chapter_id(self) -> ChapterID:
+        """ Chapter of the current context, which is assigned to logged nodes.
+        """
+        chapter_id = self._chapter_var.get()
+        return self.__chapter_id if isinstance(chapter_id, type(None)) \
+            else chapter_id
     
     ############################################################################
     ##                                 PUBLIC                                 ##
@@ -94,53 +392,92 @@ class LLMLogger:
         :param content: Content to be displayed in the llm_logger_app, 
             defaults to None
         :param relates_to: Previous node ID to create edge between nodes, 
-            defaults to None
+            defaults to None (parent node of the current branch(), if any)
         :param relation_content: Edge content displayed in llm_logger_app, 
             defaults to None
         :param stack: Stack successive nodes with the same column, 
             defaults to False
         :return: Unique Node ID.
         """
+        return self._log(
+            column=column, 
+            style=style, 
+            stack=stack, 
+            content=content, 
+            relates_to_node_id=relates_to_node_id, 
+            relation_content=relation_content, 
+            relation_style=relation_style,
+            )
+    
+    def _log(self, 
+            column:str, 
+            style:str, 
+            stack:bool,
+            content:Any, 
+            relates_to_node_id:NodeID, 
+            relation_content:Any,
+            relation_style:str,
+            timestamp:int=None,
+            span:dict=None) -> NodeID:
         
         # assure the columns names with leading & trailing '_' 
         # are reserved for internal purpose only
         column = column.strip('_')
         
         # get new node id
-        self.__node_counter = self.__node_counter + 1
-        node_id = NodeID(self.__node_counter)
+        node_id = self._next_node_id()
+        chapter_id = self._chapter_var.get()
+        if isinstance(chapter_id, type(None)):
+            chapter_id = self.__chapter_id
+        
+        # default parent node of the current context
+        parent = self._parent_var.get()
+        if not isinstance(parent, type(None)):
+            parent_node_id, follow = parent
+            if isinstance(relates_to_node_id, type(None)):
+                relates_to_node_id = parent_node_id
+            if follow:
+                self._parent_var.set((node_id, follow))
+        
+        # a timed node is logged at the start of its span
+        if isinstance(timestamp, type(None)):
+            timestamp = self._get_timestamp()
+        
+        # background mode, records are built by the writer thread
+        if not isinstance(self._writer, type(None)):
+            self._writer.put((_NODE, node_id, chapter_id, 
+                timestamp, column, style, stack, content, 
+                relates_to_node_id, relation_content, relation_style, span))
+            return node_id
         
         # add node
-        self._graph.add_node(
-            node_for_adding = node_id,
-            data=dict(
-                title="",
-                content=content),
-            metadata=dict(
-                time=str(self._get_timestamp()),
-                type=_NODE,
-                column = column.strip('_'),
-                style = style.strip('_'),
-                stack = stack,
-                chapter_id = ChapterID(self.__chapter_counter),
-                ),
+        content, encoding = self._encode_content(
+            node_id=node_id, 
+            column=column, 
+            relates_to_node_id=relates_to_node_id, 
+            content=content,
             )
+        self._add_record(node_record(
+            node_id=node_id,
+            time=timestamp,
+            column=column,
+            style=style.strip('_'),
+            stack=stack,
+            chapter_id=chapter_id,
+            content=self._put_content(content),
+            span=span,
+            encoding=encoding,
+            ))
         
         # add edge
         if isinstance(relates_to_node_id, NodeID):
-            self._graph.add_edge(
-                u_of_edge=node_id,
-                v_of_edge=relates_to_node_id,
-                data=dict(
-                    title="",
-                    content=relation_content,
-                    ),
-                metadata=dict(
-                    time=str(self._get_timestamp()),
-                    type=_EDGE,
-                    style=relation_style.strip('_'),
-                    ),
-                )
+            self._add_record(edge_record(
+                u=node_id,
+                v=relates_to_node_id,
+                time=self._get_timestamp(),
+                style=relation_style.strip('_'),
+                content=self._put_content(relation_content),
+                ))
         
         return node_id
     
@@ -151,45 +488,210 @@ class LLMLogger:
     def new_chapter(self, 
                     title:str,
                     style:str="default", 
-                    content:Any=None) -> None:
+                    content:Any=None) -> ChapterID:
         """ Create new chapter, thus partitioning the log-graph in 
-            vertical manner.
+            vertical manner. The chapter becomes the current chapter of the 
+            calling context (thread/asyncio task) and the default for 
+            contexts without their own chapter.
 
         :param title: Title of the chapter displayed in ll_logger_app.
         :param content: Content to be displayed in the llm_logger_app, 
             defaults to None
+        :return: Unique Chapter ID.
         """
-        # get new node id
-        self.__chapter_counter = self.__chapter_counter + 1
-        chapter_id = ChapterID(self.__chapter_counter)
-        
-        # add node
-        self._graph.add_node(
-            node_for_adding = chapter_id,
-            data=dict(
-                title=title,
-                content=content),
-            metadata=dict(
-                time=str(self._get_timestamp()),
-                type=_CHAPTER,
-                style = style.strip('_'),
+        chapter_id = self._open_chapter(
+            title=title, style=style, content=content)
+        self.__chapter_id = chapter_id
+        self._chapter_var.set(chapter_id)
+        return chapter_id
+    
+    
+    ##------------------------------------------------------------------------##
+    ##                                 chapter                                ##
+    ##------------------------------------------------------------------------##
+    @contextlib.contextmanager
+    def chapter(self, 
+                title:str,
+                style:str="default", 
+                content:Any=None):
+        """ Open a new chapter for the current context only, the previous 
+            chapter of the context is restored on exit. 
+            
+            with logger.chapter("retrieval") as chapter_id:
+                logger.log(...)
+
+        :param title: Title of the chapter displayed in ll_logger_app.
+        :param content: Content to be displayed in the llm_logger_app, 
+            defaults to None
+        """
+        # the chapter of contexts without their own chapter is kept
+        chapter_id = self._open_chapter(
+            title=title, style=style, content=content)
+        token = self._chapter_var.set(chapter_id)
+        try:
+            yield chapter_id
+        finally:
+            self._chapter_var.reset(token)
+    
+    
+    ##------------------------------------------------------------------------##
+    ##                                  branch                                ##
+    ##------------------------------------------------------------------------##
+    @contextlib.contextmanager
+    def branch(self, 
+               relates_to_node_id:NodeID=None, 
+               follow:bool=True):
+        """ Set the default 'relates_to_node_id' of log() for the current 
+            context (thread/asyncio task), restored on exit.
+            
+            with logger.branch(relates_to_node_id=plan_id):
+                logger.log(...)   # relates to plan_id
+                logger.log(...)   # relates to the previous node (follow=True)
+
+        :param relates_to_node_id: Parent of the first logged node, 
+            defaults to None (first node has no parent)
+        :param follow: Every logged node becomes the parent of the next one, 
+            defaults to True
+        """
+        if isinstance(relates_to_node_id, type(None)) and not follow:
+            token = self._parent_var.set(None)
+        else:
+            token = self._parent_var.set((relates_to_node_id, follow))
+        try:
+            yield
+        finally:
+            self._parent_var.reset(token)
+    
+    
+    ##------------------------------------------------------------------------##
+    ##                                   span                                 ##
+    ##------------------------------------------------------------------------##
+    def span(self, 
+             column:str="other", 
+             style:str="default", 
+             stack:bool=False,
+             content:Any=None, 
+             tokens:dict=None,
+             relates_to_node_id:NodeID=None, 
+             relation_content:Any=None,
+             relation_style:str="default") -> Span:
+        """ Timed node, context manager & decorator. The node is logged 
+            (see log()) when the span ends, its metadata 'span' holds the 
+            start, end & duration (int nanoseconds), the token counts and 
+            the exception raised within the span (see utils.spans).
+            
+            with logger.span(column="planner", style="llm") as span:
+                span.content = llm(prompt)
+                span.tokens = dict(prompt=812, completion=64)
+            
+            @logger.span(column="retriever")
+            def retrieve(query): ...   # return value is the content
+
+        :param column: Column of the log-graph, defaults to "other"
+        :param style: Category relates to the visual style of the node, 
+            defaults to "default"
+        :param content: Content of the node, defaults to None (set 
+            'span.content', or the return value of a decorated function)
+        :param tokens: Token counts, e.g. dict(prompt=..., completion=...), 
+            defaults to None (set 'span.tokens')
+        :param relates_to_node_id: Previous node ID to create edge between 
+            nodes, defaults to None
+        :return: Span, its 'node_id' is set once the span ended.
+        """
+        if not self._spans:
+            return Span(log=None, now=None, enabled=False)
+        return Span(
+            log=functools.partial(self._log_span, 
+                column=column, 
+                style=style, 
+                stack=stack, 
+                relates_to_node_id=relates_to_node_id, 
+                relation_content=relation_content, 
+                relation_style=relation_style,
                 ),
+            now=self._get_timestamp,
+            context=self._span_var,
+            content=content,
+            tokens=tokens,
             )
     
+    @property
+    def current_span(self) -> Span:
+        """ Running span of the current context (thread/asyncio task), 
+            e.g. to set the tokens within a decorated function, None outside 
+            of a span.
+        """
+        return self._span_var.get()
+    
+    def _log_span(self, span:Span, **kwargs) -> NodeID:
+        return self._log(
+            content=span.content, 
+            timestamp=span.start, 
+            span=span.metadata, 
+            **kwargs)
+    
     
     ##------------------------------------------------------------------------##
     ##                                  report                                ##
     ##------------------------------------------------------------------------##
     def report(self):
-        chapter_ids_with_node_ids = \
-            get_chapter_ids_with_node_ids(graph=self._graph)
+        self._sync()
+        with self._lock:
+            graph = self._graph
+            if not isinstance(self._spill, type(None)):
+                graph = self._spill.restore(graph=self._graph.copy())
+                residency = self._spill.stats
+            chapter_ids_with_node_ids = \
+                get_chapter_ids_with_node_ids(graph=graph)
         
+        if not isinstance(self._spill, type(None)):
+            print(f"Resident nodes = {residency['resident_nodes']}, "\
+                  f"spilled nodes = {residency['spilled_nodes']}")
         for chapter_id, node_ids in chapter_ids_with_node_ids.items():
             print(f"ChapterID = '{chapter_id}'")
             for node_id in node_ids:
                 print(f"   NodeID = '{node_id}'")
         
 
+    ##------------------------------------------------------------------------##
+    ##                                  flush                                 ##
+    ##------------------------------------------------------------------------##
+    def flush(self) -> None:
+        """ Wait for the background writer (if enabled), merge the staging 
+            buffers (if enabled) and write all buffered records to the journal 
+            and database (if enabled).
+        """
+        self._sync()
+        with self._lock:
+            if not isinstance(self._journal, type(None)):
+                self._journal.flush()
+            if not isinstance(self._database, type(None)):
+                self._database.flush()
+            if not isinstance(self.content_store, type(None)):
+                self.content_store.flush()
+
+
+    ##------------------------------------------------------------------------##
+    ##                                  close                                 ##
+    ##------------------------------------------------------------------------##
+    def close(self) -> None:
+        """ Stop the background writer and close the journal & database (if 
+            enabled). 
+            The in-memory graph remains available (content store is flushed, 
+            but stays readable).
+        """
+        if not isinstance(self._writer, type(None)):
+            self._writer.close()
+        self._sync()
+        with self._lock:
+            if not isinstance(self._journal, type(None)):
+                self._journal.close()
+            if not isinstance(self._database, type(None)):
+                self._database.close()
+            if not isinstance(self.content_store, type(None)):
+                self.content_store.flush()
+
+
     ##------------------------------------------------------------------------##
     ##                                   save                                 ##
     ##------------------------------------------------------------------------##
@@ -200,69 +702,122 @@ class LLMLogger:
             **kwargs,
         ) -> None:
         
-        # parh
-        if isinstance(path, type(None)):
-            if isinstance(self.path, type(None)):
-                raise RuntimeError(
-                    f"'path' parameter is required if not provided when "\
-                    f"LLMLogger is created!")
-            else:
-                path = self.path
-        else:
-            path = pl.Path(path).resolve()
-            if kwargs.get("create_path", False):
-                os.makedirs(path, exist_ok=True)
-            if not path.exists():
-                raise RuntimeError(
-                    f"path='{str(path)}', does not exist! use "\
-                    f"kwargs['create_path']=True to create folder structure.")
-        # filename
-        if isinstance(filename, type(None)):
-            if isinstance(self.filename, type(None)):
-                raise RuntimeError(
-                    f"'filename' parameter is required if not provided when "\
-                    f"LLMLogger is created!")
-            else:
-                filename = self.filename
+        path, filename = self._get_destination(
+            path=path, filename=filename, **kwargs)
         
-        def default_stringizer(value:Any) -> str:
-            import re
-            if isinstance(value, type(None)):
-                return ""
-            if isinstance(value, NodeID):
-                return str(value)
-            if isinstance(value, ChapterID):
-                return str(value)
-            if isinstance(value, list):
-                return str(value)
-            if isinstance(value, str):
-                return value
-            raise ValueError(
-                f"default_stringizer undefined conversion for "\
-                f"type(value)='{type(value)}'!")
-            
-        # save
-        if str(format).lower() == "gml":
-            nx.write_gml(
-                G=self._graph, 
-                path=pl.Path(path, str(filename)+".gml"),
-                stringizer=kwargs.get("stringizer", default_stringizer),
-            )
-        elif str(format).lower() == "dot":
-            nx.write_dot(
-                G=self._graph, 
-                path=pl.Path(path, str(filename)+".dot"),
+        self._sync()
+        with self._lock:
+            self._write_graph(
+                graph=self._graph, 
+                path=path, 
+                filename=filename, 
+                format=format, 
+                **kwargs)
+            self._save_content(path=path, filename=filename, format=format)
+
+
+    ##------------------------------------------------------------------------##
+    ##                                checkpoint                              ##
+    ##------------------------------------------------------------------------##
+    def checkpoint(self, 
+            path:str=None, 
+            filename:str=None, 
+            **kwargs,
+        ) -> pl.Path:
+        """ Save only what was logged since the previous checkpoint as a GML 
+            segment '<filename>.<segment>.gml' (the first segment holds the 
+            whole graph). load('<path>/<filename>.gml') stitches the segments 
+            if '<filename>.gml' does not exist.
+
+        :return: Path of the written segment.
+        """
+        path, filename = self._get_destination(
+            path=path, filename=filename, **kwargs)
+        
+        self._sync()
+        with self._lock:
+            if isinstance(self._checkpoint, type(None)) \
+                or self._checkpoint["path"] != path \
+                or self._checkpoint["filename"] != filename:
+                records = self._iter_records(self._graph)
+                segment = 0
+                remove_segments(pl.Path(path, str(filename)+GML_SUFFIX))
+            else:
+                records = self._checkpoint["records"]
+                segment = self._checkpoint["segment"] + 1
+            destination = segment_path(
+                path=path, filename=filename, segment=segment)
+            write_gml(
+                path=destination,
+                records=records,
+                stringizer=kwargs.get("stringizer", _default_stringizer),
+                stubs=(segment > 0),
+                )
+            self._checkpoint = dict(
+                path=path, filename=filename, segment=segment, records=list())
+            self._save_content(path=path, filename=filename, format="gml")
+        return destination
+
+
+    ##------------------------------------------------------------------------##
+    ##                                   alog                                 ##
+    ##------------------------------------------------------------------------##
+    async def alog(self, 
+            column:str="other", 
+            style:str="default", 
+            stack:bool=False,
+            content:Any=None, 
+            relates_to_node_id:NodeID=None, 
+            relation_content:Any=None,
+            relation_style:str="default") -> NodeID:
+        """ Coroutine version of log(). The call never waits for I/O if 
+            LLMLogger is created with background=True or staging=True.
+
+        :return: Unique Node ID.
+        """
+        return self.log(
+            column=column, 
+            style=style, 
+            stack=stack, 
+            content=content, 
+            relates_to_node_id=relates_to_node_id, 
+            relation_content=relation_content, 
+            relation_style=relation_style,
             )
+
+
+    ##------------------------------------------------------------------------##
+    ##                                  asave                                 ##
+    ##------------------------------------------------------------------------##
+    async def asave(self, 
+            path:str=None, 
+            filename:str=None, 
+            format="gml", 
+            **kwargs,
+        ) -> None:
+        """ Coroutine version of save(). A snapshot of the graph (see graph) 
+            is serialized in a worker thread, thus the event loop and 
+            concurrent log() calls are not blocked during serialization.
+        """
+        path, filename = self._get_destination(
+            path=path, filename=filename, **kwargs)
+        
+        self._sync()
+        if isinstance(self._spill, type(None)):
+            graph, spilled = self.graph, None
         else:
-            nx.write_gml(
-                G=self._graph, 
-                path=pl.Path(path, str(filename)+".gml"),
-                stringizer=kwargs.get("stringizer", default_stringizer),
-            )
-            raise TypeError(
-                f"Format='{format}', but valid formats=['gml', 'dot']! The graph "\
-                f"was saved as {str(pl.Path(path, str(filename)+'.gml'))} "\
-                f"to prevent data-loss.")
+            with self._lock:
+                graph = self._graph.copy()
+                spilled = self._spill.size
+        await asyncio.to_thread(
+            self._write_graph, 
+            graph=graph, 
+            path=path, 
+            filename=filename, 
+            format=format, 
+            spilled=spilled,
+            **kwargs)
+        self._save_content(path=path, filename=filename, format=format)
 
 
     ##------------------------------------------------------------------------##
@@ -272,36 +827,55 @@ class LLMLogger:
              path_or_buffer:Any,
              filename:str=None,
              **kwargs,
-        ) -> nx.Graph: 
+        ) -> nx.Graph:
+        """ Load a saved log-graph by the backend registered for the file 
+            suffix (gml, journal, llmz, npz, sqlite, see utils.backends), 
+            a file without suffix is read as gml.
+
+            If '<stem>.content' exists next to the file, it is opened as
+            'content_store'. ContentRefs and deltas are resolved on request 
+            (e.g. by LLMLogParser), or right away with 
+            kwargs['resolve_content']=True.
+            
+            kwargs['lazy_content']=True (gml) keeps the content of nodes & 
+            edges in the memory-mapped file, 'content_store' decodes it on 
+            request.
+            
+            kwargs 'nodes', 'chapters', 'time_range' (start, end), 
+            'columns' and 'styles' load only the matching subgraph (see 
+            utils.index.select). 
+            With a sidecar index (LLMLogger(index=True)) of a gml/journal 
+            file only the byte ranges of the matching records are read, 
+            otherwise the records are filtered while loading. Deltas are 
+            resolved only if their reference nodes are part of the subgraph.
+            A database (sqlite) is filtered by SQL (plus kwargs['where'], 
+            an SQL condition on the 'nodes' table, and kwargs['parameters']).
+        """
 
         # path or buffer
         suffix = ""
         if isinstance(path_or_buffer, io.BytesIO):
             path = path_or_buffer
             if not isinstance(filename, type(None)):
-                suffix = str(pl.Path(filename).suffix).replace(".", "").lower()
+                suffix = str(pl.Path(filename).suffix).lower()
         else:
             path = pl.Path(path_or_buffer)
-            suffix = str(path.suffix).replace(".", "").lower()
+            suffix = str(path.suffix).lower()
         # default format
         if suffix == "":
-            suffix = "gml"
-                
+            suffix = GML_SUFFIX
+        backend = get_backend(suffix)
+        
+        # content store saved next to the log-graph (content stays on disk)
+        content_store = self.content_store
+        if isinstance(path, pl.Path) and content_path(path).exists():
+            content_store = ContentStore.open(content_path(path))
+        
         # read
-        if suffix == "gml":
-            graph = nx.read_gml(
-                path = path,
-                destringizer=kwargs.get("destringizer", None),
-            )
-        elif suffix == "dot":
-            nx.read_dot(
-                path = path,
-            )
-        else:
-            graph = nx.read_gml(
-                path = path,
-                destringizer=kwargs.get("destringizer", None),
-            )
+        graph, self.content_store = backend.load(
+            path, content_store=content_store, **kwargs)
+        if kwargs.get("resolve_content", False):
+            resolve_content(graph=graph, content_store=self.content_store)
         
         return graph
     
@@ -373,8 +947,337 @@ class LLMLogger:
     
         return self._graph
 
-    def _get_timestamp(self) -> dt.datetime.timestamp:
-        return dt.datetime.timestamp(dt.datetime.now())
+    def _next_node_id(self) -> NodeID:
+        return NodeID(next(self.__node_counter))
+
+    def _next_chapter_id(self) -> ChapterID:
+        return ChapterID(next(self.__chapter_counter))
+
+    def _open_chapter(self, title:str, style:str, content:Any) -> ChapterID:
+        """ Add a chapter without making it the current chapter.
+        """
+        # get new chapter id
+        chapter_id = self._next_chapter_id()
+        
+        # background mode, records are built by the writer thread
+        if not isinstance(self._writer, type(None)):
+            self._writer.put((_CHAPTER, chapter_id, self._get_timestamp(), 
+                title, style, content))
+            return chapter_id
+        
+        # add chapter
+        self._add_record(chapter_record(
+            chapter_id=chapter_id,
+            time=self._get_timestamp(),
+            title=title,
+            style=style.strip('_'),
+            content=content,
+            ))
+        return chapter_id
+
+    def _add_record(self, record:dict) -> None:
+        if self._staging:
+            buffer = getattr(self._local, "buffer", None)
+            if isinstance(buffer, type(None)):
+                buffer = list()
+                self._local.buffer = buffer
+                with self._lock:
+                    self._buffers.append(buffer)
+            buffer.append(record)
+            if len(buffer) >= self._staging_size:
+                self._merge_staged(buffers=[buffer])
+            return
+        with self._lock:
+            add_record(graph=self._graph, record=record)
+            self._persist([record])
+
+    def _encode_content(self, node_id:NodeID, column:str, 
+            relates_to_node_id:NodeID, content:Any) -> tuple:
+        """ Content to be stored & its encoding (None for full content).
+        """
+        if isinstance(self._delta, type(None)):
+            return content, None
+        reference_id = self._last_in_column.get(column, None)
+        if self._delta_reference == "parent" \
+            and isinstance(relates_to_node_id, NodeID):
+            reference_id = relates_to_node_id
+        self._last_in_column[column] = node_id
+        content = self._delta.encode(
+            node_id=node_id, reference_id=reference_id, content=content)
+        return content, DELTA_ENCODING if isinstance(content, Delta) else None
+
+    def _persist(self, records:list) -> None:
+        """ Records applied onto the graph (journal, database, next 
+            checkpoint, retention of the in-memory graph & next snapshot).
+        """
+        if not isinstance(self._journal, type(None)):
+            self._journal.write_many(records)
+        if not isinstance(self._database, type(None)):
+            self._database.write_many(records)
+        if not isinstance(self._checkpoint, type(None)):
+            self._checkpoint["records"].extend(records)
+        if not isinstance(self._spill, type(None)):
+            self._spill.track(graph=self._graph, records=records)
+        self._snapshots.add(records)
+
+    def _iter_records(self, graph:nx.Graph, spilled:int=None):
+        """ Records of the graph including the spilled records (the first 
+            'spilled' bytes of the spill file, defaults to all).
+        """
+        if isinstance(self._spill, type(None)):
+            return iter_records(graph)
+        return self._spill.merge(graph=graph, size=spilled)
+
+    def _put_content(self, content:Any) -> Any:
+        if isinstance(self.content_store, type(None)):
+            return content
+        return self.content_store.put(content)
+
+    def _save_content(self, path:pl.Path, filename:str, format:str) -> None:
+        # e.g. the container holds the (deduplicated) content itself
+        if get_backend(format).stores_content:
+            return
+        if not isinstance(self.content_store, type(None)):
+            self.content_store.save(pl.Path(path, str(filename)+CONTENT_SUFFIX))
+
+    def _get_destination(self, path:str=None, filename:str=None, **kwargs):
+        # path
+        if isinstance(path, type(None)):
+            if isinstance(self.path, type(None)):
+                raise RuntimeError(
+                    f"'path' parameter is required if not provided when "\
+                    f"LLMLogger is created!")
+            else:
+                path = self.path
+        else:
+            path = pl.Path(path).resolve()
+            if kwargs.get("create_path", False):
+                os.makedirs(path, exist_ok=True)
+            if not path.exists():
+                raise RuntimeError(
+                    f"path='{str(path)}', does not exist! use "\
+                    f"kwargs['create_path']=True to create folder structure.")
+        # filename
+        if isinstance(filename, type(None)):
+            if isinstance(self.filename, type(None)):
+                raise RuntimeError(
+                    f"'filename' parameter is required if not provided when "\
+                    f"LLMLogger is created!")
+            else:
+                filename = self.filename
+        return path, filename
+
+    def _write_graph(self, 
+            graph:nx.Graph, 
+            path:pl.Path, 
+            filename:str, 
+            format="gml", 
+            spilled:int=None,
+            **kwargs,
+        ) -> None:
+        
+        # backend
+        try:
+            backend = get_backend(format)
+        except ValueError as error:
+            write_gml(
+                path=pl.Path(path, str(filename)+GML_SUFFIX),
+                records=self._iter_records(graph, spilled=spilled),
+                stringizer=kwargs.get("stringizer", _default_stringizer),
+            )
+            raise TypeError(
+                f"{error} The graph was saved as "\
+                f"{str(pl.Path(path, str(filename)+GML_SUFFIX))} "\
+                f"to prevent data-loss.")
+        destination = pl.Path(path, str(filename)+backend.suffix)
+        
+        # the journal/database of LLMLogger already holds every record
+        for writer in [self._journal, self._database]:
+            if not isinstance(writer, type(None)) \
+                and writer.path == destination:
+                writer.flush()
+                return
+        
+        # save
+        backend.write(
+            destination,
+            records=self._iter_records(graph, spilled=spilled),
+            **{**kwargs, 
+               "stringizer": kwargs.get("stringizer", _default_stringizer),
+               "index": kwargs.get("index", self._index),
+               "content_store": self.content_store,
+            },
+        )
+
+    def _sync(self) -> None:
+        """ Bring the graph up to date (background writer & staging buffers).
+        """
+        if not isinstance(self._writer, type(None)):
+            self._writer.flush()
+        if self._staging:
+            self._merge_staged()
+
+    def _merge_staged(self, buffers:list=None) -> None:
+        with self._lock:
+            records = list()
+            for buffer in self._buffers if buffers is None else buffers:
+                # records appended concurrently (after len()) stay in buffer
+                num_records = len(buffer)
+                records.extend(buffer[0:num_records])
+                del buffer[0:num_records]
+            records.sort(key=lambda r: (_RECORD_ORDER[r["type"]], 
+                id_counter(r["id"]) if "id" in r else 0))
+            self._apply_records(records)
+
+    def _apply_records(self, records:list) -> None:
+        with self._lock:
+            for record in records:
+                add_record(graph=self._graph, record=record)
+            self._persist(records)
+
+    def _write_queued(self, items:list) -> None:
+        """ Build records from calls queued in background mode (executed by 
+            the writer thread).
+        """
+        with self._lock:
+            self.__write_queued(items)
+
+    def __write_queued(self, items:list) -> None:
+        records = list()
+        for item in items:
+            if item[0] == _NODE:
+                _, node_id, chapter_id, timestamp, column, style, stack, \
+                    content, relates_to_node_id, relation_content, \
+                    relation_style, span = item
+                content, encoding = self._encode_content(
+                    node_id=node_id, 
+                    column=column.strip('_'), 
+                    relates_to_node_id=relates_to_node_id, 
+                    content=content,
+                    )
+                records.append(node_record(
+                    node_id=node_id,
+                    time=timestamp,
+                    column=column.strip('_'),
+                    style=style.strip('_'),
+                    stack=stack,
+                    chapter_id=chapter_id,
+                    content=self._put_content(content),
+                    span=span,
+                    encoding=encoding,
+                    ))
+                add_record(graph=self._graph, record=records[-1])
+                # related node may have been dropped by backpressure
+                if isinstance(relates_to_node_id, NodeID) \
+                    and (self._graph.has_node(relates_to_node_id) \
+                        or (not isinstance(self._spill, type(None)) \
+                            and self._spill.contains(relates_to_node_id))):
+                    records.append(edge_record(
+                        u=node_id,
+                        v=relates_to_node_id,
+                        time=timestamp,
+                        style=relation_style.strip('_'),
+                        content=self._put_content(relation_content),
+                        ))
+                    add_record(graph=self._graph, record=records[-1])
+            elif item[0] == _CHAPTER:
+                _, chapter_id, timestamp, title, style, content = item
+                records.append(chapter_record(
+                    chapter_id=chapter_id,
+                    time=timestamp,
+                    title=title,
+                    style=style.strip('_'),
+                    content=content,
+                    ))
+                add_record(graph=self._graph, record=records[-1])
+        self._persist(records)
+
+    def _get_timestamp(self) -> int:
+        """ Nanoseconds since the epoch (monotonic within the run).
+        """
+        return self._clock.now()
+
+################################################################################
+##                                  _last_ids                                 ##
+################################################################################
+def _last_ids(path:pl.Path, filename:str, journal:bool=False, 
+              sqlite:bool=False, append:bool=True, **kwargs) -> Dict[str, int]:
+    """ Last node & chapter counters of the journal/database continued by 
+        a LLMLogger of these parameters (0 if nothing is continued), e.g. 
+        to seed the counters shared by collector clients.
+
+    :param kwargs: Further LLMLogger parameters (a rotating journal starts 
+        new segments, thus it is not continued).
+    """
+    last = {_NODE: 0, _CHAPTER: 0}
+    if not append or isinstance(path, type(None)) \
+        or isinstance(filename, type(None)):
+        return last
+    rotating = any(not isinstance(kwargs.get(name, None), type(None)) 
+        for name in ["rotate_nodes", "rotate_bytes", "rotate_chapters", 
+                     "rotate_interval", "retention"])
+    sources = list()
+    if journal and not rotating:
+        sources.append(pl.Path(path, str(filename)+JOURNAL_SUFFIX))
+    if sqlite:
+        sources.append(pl.Path(path, str(filename)+SQLITE_SUFFIX))
+    for source in sources:
+        if not source.exists() or source.stat().st_size == 0:
+            continue
+        for record in get_backend(source.suffix).read(source):
+            if record["type"] in last:
+                counter = id_counter(record["id"])
+                if counter < _LAST_COUNTER:
+                    last[record["type"]] = max(last[record["type"]], counter)
+    return last
+
+
+################################################################################
+##                              _is_chapter_item                              ##
+################################################################################
+def _is_chapter_item(item:tuple) -> bool:
+    """ Queued new_chapter() call (background mode).
+    """
+    return item[0] == _CHAPTER
+
+
+################################################################################
+##                             _default_stringizer                            ##
+################################################################################
+def _default_stringizer(value:Any) -> str:
+    if isinstance(value, type(None)):
+        return ""
+    if isinstance(value, NodeID):
+        return str(value)
+    if isinstance(value, ChapterID):
+        return str(value)
+    if isinstance(value, list):
+        return str(value)
+    if isinstance(value, str):
+        return value
+    raise ValueError(
+        f"default_stringizer undefined conversion for "\
+        f"type(value)='{type(value)}'!")
+
+
+################################################################################
+##                               resolve_content                              ##
+################################################################################
+def resolve_content(graph:nx.Graph, content_store:ContentStore=None) \
+        -> nx.Graph:
+    """ Replace every ContentRef and delta of the graph by its content 
+        (in-place).
+    """
+    decode_graph(graph=graph, content_store=content_store)
+    if isinstance(content_store, type(None)):
+        return graph
+    for _, _, edge_data in graph.edges(data=True):
+        data = edge_data.get("data", None)
+        if isinstance(data, dict):
+            edge_data["data"] = \
+                {**data, "content": content_store.resolve(data.get("content"))}
+    return graph
+
 
 ################################################################################
 ##                                    TESTS                                   ##
@@ -8,7 +8,7 @@ Expected graph structure:
         │   └── data
         │   │   └── content : Any
         │   └── metadata
-        |       └── time : datetime
+        |       └── time : int (nanoseconds since the epoch)
         |       └── type : str
         |       └── column : str
         |       └── category : str
@@ -36,6 +36,10 @@ if __name__ == "__main__":
 ##                                  CONSTANTS                                 ##
 ################################################################################
 _EXTRA_COLUMN = "__extra__"
+# vertical layouts, y by the order of the nodes or by their timestamps
+_SEQUENCE_LAYOUT = "sequence"
+_TIME_LAYOUT = "time"
+_VERTICAL_LAYOUTS = [_SEQUENCE_LAYOUT, _TIME_LAYOUT]
 
 
 ################################################################################
@@ -55,6 +59,7 @@ if __name__ == "__main__":
 
 
 import networkx as nx
+import numpy as np
 import pandas as pd
 from plotly import graph_objects as go
 from typing import Tuple, Dict, Any, Union, List
@@ -62,7 +67,8 @@ import copy
 
 # try:
 from utils.ids import NodeID, ChapterID, EdgeID, _NODE, \
-    _CHAPTER, _EDGE, valid_node_id, valid_chapter_id, edge_id_to_vertex_ids
+    _CHAPTER, _EDGE, valid_node_id, valid_chapter_id, edge_id_to_vertex_ids, \
+    id_counter, edge_key
 from utils.chapters import get_chapter_ids_with_node_ids
 from assets.styles import LAYOUT_STYLES, COLUMN_STYLES, \
     XAXES_STYLES, YAXES_STYLES, NODE_STYLES, CHAPTER_STYLES, EDGE_STYLES, \
@@ -75,6 +81,9 @@ from utils.traces import \
 from utils.graph import get_columns, get_chapter_ids, \
     get_node_data, get_vertex_data, get_edge_data
 from utils.customdata import print_customdata
+from utils.delta import decode_content, delta_encoded
+from utils.latency import critical_path_node_ids
+from utils.clock import timestamp_ns, format_duration, NO_TIME
 # except ImportError:
 #     from llm_logger_src.utils.ids import NodeID, ChapterID, EdgeID, _NODE, \
 #         _CHAPTER, _EDGE, valid_node_id, valid_chapter_id, edge_id_to_vertex_ids
@@ -116,7 +125,7 @@ class LLMLogParser:
             │   └── data
             │   │   └── content : Any
             │   └── metadata
-            |       └── time : str(Timestamp)
+            |       └── time : int (nanoseconds since the epoch)
             |       └── type : str
             |       └── column : str
             |       └── category : str
@@ -140,12 +149,25 @@ class LLMLogParser:
                 edge_styles:Dict[str, Dict[str, Any]] = None,
                 node_annotations:Dict[str, Dict[str, Any]] = None,
                 chapter_annotations:Dict[str, Dict[str, Any]] = None,
+                content_store:Any = None,
+                vertical_layout:str = _SEQUENCE_LAYOUT,
                 **kwargs,
             ):
-        # internal variable
-        self.graph = graph
+        # internal variable (a frozen graph, e.g. LLMLogger.graph, is copied 
+        # as the start & end chapters are added)
+        self.graph = graph.copy() if nx.is_frozen(graph) else graph
+        # ContentRefs (e.g. LLMLogger.content_store) and deltas are resolved 
+        # once a trace is rendered
+        self.content_store = content_store
         # adjust graph
         self._add_start_end_chapter(start_title="START", end_title="END")
+        # 'sequence' steps by node_step per node, 'time' positions the nodes 
+        # by their timestamps (spans as tall blocks, idle gaps compressed)
+        if vertical_layout not in _VERTICAL_LAYOUTS:
+            raise ValueError(
+                f"vertical_layout='{vertical_layout}' is unknown, use one "\
+                f"of {_VERTICAL_LAYOUTS}!")
+        self.vertical_layout = vertical_layout
         
         # default/custom style
         self.layout_styles  = LAYOUT_STYLES \
@@ -170,8 +192,11 @@ class LLMLogParser:
                 chapter_styles=chapter_styles, 
                 edge_styles=edge_styles, 
                 required_styles=["__default__", "__default_selected__"], 
-                alt_styles=["selected"],
+                alt_styles=["selected", "critical"],
             )
+        # highlighted vertices & edges (e.g. critical path, see highlight())
+        self.__highlighted_vertices = set()
+        self.__highlighted_edges = set()
         self.node_annotations = NODE_ANNOTATIONS \
             if isinstance(node_annotations, type(None)) else node_annotations
         self.chapter_annotations = CHAPTER_ANNOTATIONS \
@@ -196,9 +221,17 @@ class LLMLogParser:
                                     DEFAULT_SIZING['chapter_width_rel_fig'])
         self.window_height = kwargs.get('window_heigh', 
                                     DEFAULT_SIZING['window_height'])
+        self.time_step = kwargs.get('time_step', 
+                                    DEFAULT_SIZING['time_step'])
+        self.max_gap = kwargs.get('max_gap', 
+                                    DEFAULT_SIZING['max_gap'])
+        self.min_node_height = kwargs.get('min_node_height', 
+                                    DEFAULT_SIZING['min_node_height'])
         
         # default values of private variables
         self.__partitions = None
+        self.__time_ticks = None
+        self.__idle_gaps = list()
         # private variables
         self._initialize_private_variables(
             requested_column_order=None, 
@@ -215,7 +248,7 @@ class LLMLogParser:
             raise RuntimeError(f"LLMLogParser is not initialized!")
         mask = (self.__vertex_positions["type"] == _CHAPTER)
         chapters = self.__vertex_positions.loc[mask]
-        chapters = chapters.drop(columns=['type'])
+        chapters = chapters.drop(columns=['type', 'height'])
         titles = list()
         for chapter in chapters.itertuples():
             titles.append(self.graph.nodes[chapter.id]["data"]["title"])
@@ -268,6 +301,23 @@ class LLMLogParser:
                 raise_error=False,
             )
 
+    ##------------------------------------------------------------------------##
+    ##                                highlight                               ##
+    ##------------------------------------------------------------------------##
+    def highlight(self, node_ids:List[Union[NodeID, str]]=None):
+        """ Highlight a path of nodes (e.g. the critical path), the nodes and 
+            the edges between consecutive nodes are rendered with the 
+            '<style>_critical' styles.
+        
+        :param node_ids: Nodes of the path (first to last), defaults to None
+            (removes the highlight)
+        """
+        node_ids = list() if isinstance(node_ids, type(None)) \
+            else [str(node_id) for node_id in node_ids]
+        self.__highlighted_vertices = set(node_ids)
+        self.__highlighted_edges = set(
+            frozenset(pair) for pair in zip(node_ids[:-1], node_ids[1:]))
+
     ##------------------------------------------------------------------------##
     ##                                  report                                ##
     ##------------------------------------------------------------------------##
@@ -399,6 +449,13 @@ class LLMLogParser:
                         f"Provided '{name}' do not include "\
                         f"'{required_style}'! Assure all required styles "\
                         f"{required_styles} are defined!")
+        # optional default-alternative styles (e.g. '__default_critical__')
+        # fall back to the default selected style
+        for name, styles in _styles.items():
+            for alt_style in alt_styles:
+                default_style_name = f"__default_{alt_style}__"
+                if default_style_name not in styles.keys():
+                    styles[default_style_name] = styles["__default_selected__"]
         
         # TODO: find a better way to check this
         # assign missing alternative styles
@@ -414,7 +471,8 @@ class LLMLogParser:
                 default_style_name = f"__default_{alt_style}__"
                 
                 # current 'style_name' is not alternative style
-                style_name_not_alt = (alt_style not in style_name and "__" not in style_name)
+                style_name_not_alt = "__" not in style_name and not any(
+                    style_name.endswith(f"_{alt}") for alt in alt_styles)
                 # alternative style is not defined
                 alt_style_not_defined = \
                     (alt_style_name not in temp_node_styles.keys())
@@ -437,7 +495,8 @@ class LLMLogParser:
                 default_style_name = f"__default_{alt_style}__"
                 
                 # current 'style_name' is not alternative style
-                style_name_not_alt = (alt_style not in style_name and "__" not in style_name)
+                style_name_not_alt = "__" not in style_name and not any(
+                    style_name.endswith(f"_{alt}") for alt in alt_styles)
                 # alternative style is not defined
                 alt_style_not_defined = \
                     (alt_style_name not in temp_chapter_styles.keys())
@@ -461,7 +520,8 @@ class LLMLogParser:
                 default_style_name = f"__default_{alt_style}__"
                 
                 # current 'style_name' is not alternative style
-                style_name_not_alt = (alt_style not in style_name and "__" not in style_name)
+                style_name_not_alt = "__" not in style_name and not any(
+                    style_name.endswith(f"_{alt}") for alt in alt_styles)
                 # alternative style is not defined
                 alt_style_not_defined = \
                     (alt_style_name not in temp_edge_styles.keys())
@@ -648,15 +708,23 @@ class LLMLogParser:
         if isinstance(chapter_ids, type(None)) and isinstance(node_ids_per_chapter, type(None)): 
             node_ids_per_chapter = get_chapter_ids_with_node_ids(self.graph)
             chapter_ids = list(node_ids_per_chapter.keys())
-            chapter_ids.sort()
+            chapter_ids.sort(key=id_counter)
+        
+        # positions by the timestamps
+        if self.vertical_layout == _TIME_LAYOUT:
+            return self._assign_time_positions(
+                chapter_ids=chapter_ids, 
+                node_ids_per_chapter=node_ids_per_chapter,
+                )
     
         # output structure - vertex (nodes & chapter) positions
-        vertex_positions = pd.DataFrame(columns=['id', 'x', 'y'])
+        vertex_positions = pd.DataFrame(columns=['id', 'x', 'y', 'height'])
         
         # iterate over chapters
         for chapter_id in chapter_ids:
             self._assign_chapter_position()
-            vertex_position = dict(id=[chapter_id], type=[_CHAPTER], x=[self.__x], y=[self.__y])
+            vertex_position = dict(id=[chapter_id], type=[_CHAPTER], x=[self.__x], y=[self.__y], 
+                                   height=[self.chapter_height])
             vertex_positions = pd.concat(
                     [vertex_positions, pd.DataFrame(vertex_position)],
                 )
@@ -666,7 +734,8 @@ class LLMLogParser:
                 
                 self._assign_node_position(
                     column=metadata['column'], stack=metadata['stack'])
-                vertex_position = dict(id=[node_id], type=[_NODE], x=[self.__x], y=[self.__y])
+                vertex_position = dict(id=[node_id], type=[_NODE], x=[self.__x], y=[self.__y], 
+                                       height=[self.node_height])
                 vertex_positions = pd.concat(
                         [vertex_positions, pd.DataFrame(vertex_position)],
                     )
@@ -674,6 +743,154 @@ class LLMLogParser:
         return vertex_positions        
 
 
+    ##------------------------------------------------------------------------##
+    ##                         _assign_time_positions                         ##
+    ##------------------------------------------------------------------------##
+    def _assign_time_positions(self, 
+            chapter_ids:List[ChapterID],
+            node_ids_per_chapter:Dict[ChapterID, List[NodeID]],
+            ) -> pd.DataFrame:
+        """ Vertical positions proportional to time (vertical_layout='time').
+        
+        A node spans from its start to its end (timed nodes, see 
+            LLMLogger.span()) and an instant node is min_node_height tall.
+            Every second advances y by time_step (by default the active time 
+            takes the height of the sequence layout), an idle gap longer than 
+            max_gap is compressed to max_gap (at most chapter_step) and every 
+            chapter inserts chapter_step. Overlapping nodes of a column hop aside (as 
+            stacked nodes).
+
+        :return: DataFrame of vertex positions (center & height).
+        """
+        # node intervals (a node without time continues the previous one)
+        nodes = list()
+        last_time = NO_TIME
+        for chapter_id in chapter_ids:
+            for node_id in node_ids_per_chapter[chapter_id]:
+                _, metadata = get_node_data(graph=self.graph, node_id=node_id)
+                span = metadata.get("span", None)
+                if isinstance(span, dict):
+                    start = timestamp_ns(span["start"])
+                    end = timestamp_ns(span["end"])
+                else:
+                    start = end = timestamp_ns(metadata.get("time", None))
+                if start == NO_TIME or end == NO_TIME:
+                    start = end = last_time
+                last_time = end if end != NO_TIME else last_time
+                nodes.append([chapter_id, node_id, metadata['column'], 
+                              start, end])
+        times = [node[3] for node in nodes] + [node[4] for node in nodes]
+        times = [time for time in times if time != NO_TIME]
+        chapter_times = [timestamp_ns(self.graph.nodes[chapter_id]\
+            ["metadata"].get("time", None)) for chapter_id in chapter_ids]
+        times = times + [time for time in chapter_times if time != NO_TIME]
+        if len(times) == 0:
+            raise RuntimeError(
+                f"vertical_layout='{_TIME_LAYOUT}' requires timestamps, "\
+                f"the graph has none (use '{_SEQUENCE_LAYOUT}')!")
+        first_time, last_time = min(times), max(times)
+        for node in nodes:
+            if node[3] == NO_TIME:
+                node[3] = node[4] = first_time
+
+        # chapter without time opens with its first node, START/END chapters 
+        # (without time & nodes) enclose the log
+        for index, chapter_id in enumerate(chapter_ids):
+            if chapter_times[index] != NO_TIME:
+                continue
+            chapter_nodes = [node[3] for node in nodes if node[0] == chapter_id]
+            if len(chapter_nodes) > 0:
+                chapter_times[index] = min(chapter_nodes) - 1
+            elif index == 0:
+                chapter_times[index] = first_time - 1
+            elif index == len(chapter_ids) - 1:
+                chapter_times[index] = last_time + 1
+            else:
+                chapter_times[index] = chapter_times[index - 1]
+
+        # compressed time axis (y of every distinct time)
+        times = np.unique(np.array(
+            times + chapter_times, dtype=np.int64))
+        gaps = np.diff(times)
+        max_gap = int(self.max_gap * 1e9)
+        idle = gaps > max_gap
+        # by default the active time takes the height of the sequence layout
+        time_step = self.time_step
+        if isinstance(time_step, type(None)):
+            time_step = self.node_step * max(len(nodes), 1) \
+                / max(int(gaps[~idle].sum()) / 1e9, 1e-9)
+        # an idle gap takes max_gap (at most chapter_step)
+        y_gaps = gaps * (time_step / 1e9)
+        y_gaps[idle] = min(self.max_gap * time_step, self.chapter_step)
+        y_times = np.zeros(len(times), dtype=np.float64)
+        y_times[1:] = np.cumsum(y_gaps)
+        # chapters in order of time (the order of the IDs breaks ties)
+        chapter_order = sorted(range(len(chapter_ids)), 
+                               key=lambda index: (chapter_times[index], index))
+        sorted_chapter_times = np.array(
+            [chapter_times[index] for index in chapter_order], dtype=np.int64)
+        
+        def _y(time:int) -> float:
+            # chapters opened before the time insert their chapter_step
+            return float(y_times[np.searchsorted(times, time)]) \
+                + self.chapter_step \
+                * int(np.searchsorted(sorted_chapter_times, time, side="left"))
+        
+        # output structure - vertex (nodes & chapter) positions
+        rows = list()
+        for rank, index in enumerate(chapter_order):
+            y = float(y_times[np.searchsorted(times, chapter_times[index])]) \
+                + self.chapter_step * (rank + 0.5)
+            rows.append(dict(id=chapter_ids[index], type=_CHAPTER, x=0.5, 
+                             y=y, height=self.chapter_height))
+        # nodes, overlapping nodes of a column hop aside
+        hop_value = self.max_column_width * self.margin_rel_col
+        column_state = dict()
+        for chapter_id, node_id, column, start, end in nodes:
+            if column not in self.__column_positions.keys():
+                column = _EXTRA_COLUMN
+            x = self.__column_positions[column]['center']
+            top = _y(start)
+            bottom = _y(end) if end > start else top
+            if bottom - top < self.min_node_height:
+                top, bottom = top - self.min_node_height / 2, \
+                    top + self.min_node_height / 2
+            last_bottom, hop = column_state.get(column, (None, False))
+            if not isinstance(last_bottom, type(None)) and top < last_bottom:
+                x = x + hop_value if hop else x - hop_value
+                hop = not hop
+            else:
+                hop = False
+            column_state[column] = (bottom if isinstance(last_bottom, 
+                type(None)) else max(bottom, last_bottom), hop)
+            rows.append(dict(id=node_id, type=_NODE, x=x, 
+                             y=(top + bottom) / 2, height=bottom - top))
+        vertex_positions = pd.DataFrame(rows, 
+            columns=['id', 'type', 'x', 'y', 'height'])
+        vertex_positions.reset_index(drop=True, inplace=True)
+
+        # idle gaps (compressed) & ticks of the time axis
+        self.__idle_gaps = list()
+        for index in np.flatnonzero(idle).tolist():
+            self.__idle_gaps.append(dict(
+                y=_y(int(times[index])) + (y_times[index + 1] \
+                    - y_times[index]) / 2,
+                duration=int(gaps[index]),
+                ))
+        y_points = np.array([_y(int(time)) for time in times])
+        tick_values = np.arange(0.0, y_points[-1], self.window_height / 10)
+        tick_times = np.interp(tick_values, y_points, 
+                               (times - times[0]).astype(np.float64))
+        self.__time_ticks = dict(
+            tickvals=tick_values.tolist(), 
+            ticktext=[format_duration(time) for time in tick_times],
+            )
+        self.__x = 0.5
+        self.__y = float((vertex_positions['y'] \
+            + vertex_positions['height'] / 2).max())
+        return vertex_positions
+
+
     ##------------------------------------------------------------------------##
     ##                       _assign_vertex_partitions                        ##
     ##------------------------------------------------------------------------##
@@ -933,13 +1150,12 @@ class LLMLogParser:
                 f"partitioned_vertices have following duplicates = "\
                 f"{partitioned_vertices[mask]['id']}")
         
-        # partition edges
-        _partitioned_edges = partitioned_edges.copy()
-        _partitioned_edges['id'] = _partitioned_edges.apply( \
-            lambda row: EdgeID(row['id_0'], row['id_1']), 
-            axis=1,
-        )
-        _partitioned_edges.drop(columns=['id_0', 'id_1'], inplace=True)
+        # partition edges, an edge is identified by its vertices (u, v) and 
+        # its integer edge key (id)
+        _partitioned_edges = partitioned_edges.rename(
+            columns={'id_0': 'u', 'id_1': 'v'})
+        _partitioned_edges['id'] = [edge_key(u, v) for u, v 
+            in zip(_partitioned_edges['u'], _partitioned_edges['v'])]
         _partitioned_edges['type'] = _EDGE
         
         # partition vertices
@@ -965,31 +1181,30 @@ class LLMLogParser:
     def _get_related_traces(self, partitioned_traces:pd.DataFrame) -> Dict[int, List[int]]:
         
         related_traces = dict()
-
-        def __get_node_ids_related_to_edge_id(id:EdgeID):
-            node_id_0, node_id_1 = edge_id_to_vertex_ids(id=id)
-            node_0_trace_index = partitioned_traces.query("id == @node_id_0").index[0]
-            node_1_trace_index = partitioned_traces.query("id == @node_id_1").index[0]
-            return int(node_0_trace_index), int(node_1_trace_index)
+        
+        # trace index of every vertex (by ID) and edge (by integer edge key), 
+        # instead of a query of the DataFrame per lookup
+        vertex_trace_index, edge_trace_index = dict(), dict()
+        for row in partitioned_traces.itertuples():
+            if row.type == _EDGE:
+                edge_trace_index[row.id] = int(row.Index)
+            else:
+                vertex_trace_index[row.id] = int(row.Index)
         
         for row in partitioned_traces.itertuples():
             trace_index = int(row.Index)
             related_traces[trace_index] = list()
             
             if row.type == _NODE:
-                edge_ids = list(self.graph.edges(row.id))
-                for edge_id in self.graph.edges(row.id):
-                    # get EdgeID
-                    _edge_id = EdgeID(vertex_id_0=edge_id[0], vertex_id_1=edge_id[1])
+                for u, v in self.graph.edges(row.id):
                     # get edge index
-                    edge_trace_index = \
-                        int(partitioned_traces.query("id == @_edge_id").index[0])
-                    # get node ids of nodes connected to the EdgeID
+                    _edge_trace_index = edge_trace_index[edge_key(u, v)]
+                    # get trace indices of nodes connected to the edge
                     node_0_trace_index, node_1_trace_index = \
-                        __get_node_ids_related_to_edge_id(id=_edge_id)
+                        vertex_trace_index[u], vertex_trace_index[v]
                     # if edge index not in related_traces, then add
-                    if edge_trace_index not in related_traces[trace_index]:
-                        related_traces[trace_index].append(edge_trace_index)
+                    if _edge_trace_index not in related_traces[trace_index]:
+                        related_traces[trace_index].append(_edge_trace_index)
                     # if node index not in related_traces and is not clicked node index, then add
                     if int(row.Index) != node_0_trace_index \
                         and node_0_trace_index not in related_traces[trace_index]:
@@ -999,7 +1214,7 @@ class LLMLogParser:
                         related_traces[trace_index].append(node_1_trace_index)
             elif row.type == _EDGE:
                 node_0_trace_index, node_1_trace_index = \
-                    __get_node_ids_related_to_edge_id(id=row.id)
+                    vertex_trace_index[row.u], vertex_trace_index[row.v]
                 related_traces[trace_index].append(node_0_trace_index)
                 related_traces[trace_index].append(node_1_trace_index)
             else:
@@ -1007,15 +1222,53 @@ class LLMLogParser:
                 
         return related_traces
 
+    ##------------------------------------------------------------------------##
+    ##                            _resolve_content                            ##
+    ##------------------------------------------------------------------------##
+    def _resolve_content(self, data:Dict[str, Any], 
+                         metadata:Dict[str, Any]) -> Dict[str, Any]:
+        if not isinstance(data, dict) or "content" not in data:
+            return data
+        encoded = delta_encoded(metadata)
+        if isinstance(self.content_store, type(None)) and not encoded:
+            return data
+        data = dict(data)
+        data["content"] = decode_content(
+            graph=self.graph, 
+            content=data["content"], 
+            content_store=self.content_store,
+            encoded=encoded,
+            )
+        return data
+
+    ##------------------------------------------------------------------------##
+    ##                            _highlight_style                            ##
+    ##------------------------------------------------------------------------##
+    def _highlight_style(self, style_name:str, styles:Dict[str, Any], 
+                         highlighted:bool, alt_style:str="critical") -> str:
+        """ Name of the rendered style, the trace keeps its own style name 
+            (e.g. for selection).
+        """
+        if not highlighted:
+            return style_name
+        if style_name.startswith("__"):
+            return f"__default_{alt_style}__"
+        alt_style_name = f"{style_name}_{alt_style}"
+        return alt_style_name if alt_style_name in styles.keys() \
+            else f"__default_{alt_style}__"
+
     ##------------------------------------------------------------------------##
     ##                              _render_edge                              ##
     ##------------------------------------------------------------------------##
-    def _render_edge(self, id:Union[EdgeID, str], trace_index:int) -> go.Scatter:
+    def _render_edge(self, u:Union[NodeID, str], v:Union[NodeID, str], 
+                     trace_index:int) -> go.Scatter:
         
         # edge data
-        edge_data, edge_metadata = get_edge_data(graph=self.graph, edge_id=id)
+        edge = self.graph.edges[u, v]
+        edge_data, edge_metadata = edge['data'], edge['metadata']
+        edge_data = self._resolve_content(edge_data, edge_metadata)
         # vertex positions
-        node_id_0, node_id_1 = edge_id_to_vertex_ids(id)
+        node_id_0, node_id_1 = u, v
         
         node_0_index = self.__vertex_positions.query("id == @node_id_0").index[0]
         node_1_index = self.__vertex_positions.query("id == @node_id_1").index[0]
@@ -1024,17 +1277,30 @@ class LLMLogParser:
         y_start = self.__vertex_positions.at[node_0_index, 'y']
         x_end = self.__vertex_positions.at[node_1_index, 'x']
         y_end = self.__vertex_positions.at[node_1_index, 'y']        
+        # time layout, the edge leads from the end of the related node to the 
+        # start of the node (unless they overlap)
+        if self.vertical_layout == _TIME_LAYOUT:
+            bottom = y_start + self.__vertex_positions.at[node_0_index, 'height']/2
+            top = y_end - self.__vertex_positions.at[node_1_index, 'height']/2
+            if bottom < top:
+                y_start, y_end = bottom, top
         
         # trace 
         trace_style_name = edge_metadata['style'] \
             if edge_metadata['style'] in self.chapter_styles.keys() else "__default__"
+        render_style_name = self._highlight_style(
+            style_name=trace_style_name, 
+            styles=self.__edge_styles,
+            highlighted=frozenset((str(node_id_0), str(node_id_1))) \
+                in self.__highlighted_edges,
+            )
         trace = _get_edge_trace(
             x_start=x_start, 
             y_start=y_start, 
             x_end=x_end, 
             y_end=y_end, 
             width=self.edge_width, 
-            style=self.edge_styles[trace_style_name],
+            style=self.edge_styles[render_style_name],
             raise_error=True,
             )
         trace = _set_edge_datastruct(
@@ -1059,21 +1325,28 @@ class LLMLogParser:
             into a partition (partitions overlap)
         """
         data, metadata = get_vertex_data(graph=self.graph, vertex_id=vertex_id)
+        data = self._resolve_content(data, metadata)
         
         vertex_index = int(self.__vertex_positions.query("id == @vertex_id").index[0])
         
         x = self.__vertex_positions.at[vertex_index, 'x']
         y = self.__vertex_positions.at[vertex_index, 'y']
+        height = self.__vertex_positions.at[vertex_index, 'height']
         
         if self.__vertex_positions.at[vertex_index, 'type'] == _NODE:
             trace_style_name = metadata['style'] \
                 if metadata['style'] in self.node_styles.keys() else "__default__"
+            render_style_name = self._highlight_style(
+                style_name=trace_style_name, 
+                styles=self.__node_styles,
+                highlighted=str(vertex_id) in self.__highlighted_vertices,
+                )
             trace = _get_node_trace(
                 x=x,
                 y=y,
                 width=self.node_width,
-                height=self.node_height,
-                style=self.node_styles[trace_style_name],
+                height=height,
+                style=self.node_styles[render_style_name],
             )
             trace = _set_node_datastruct(
                     trace=trace, 
@@ -1096,7 +1369,7 @@ class LLMLogParser:
                 x=x,
                 y=y,
                 width=self.chapter_width,
-                height=self.chapter_height,
+                height=height,
                 style=self.chapter_styles[trace_style_name],
             )
             trace = _set_chapter_datastruct(
@@ -1135,7 +1408,8 @@ class LLMLogParser:
         for row in self.__partitioned_traces.itertuples():
             print(f"->   {row}")
             if row.type == _EDGE:
-                trace = self._render_edge(id=row.id, trace_index=int(row.Index))
+                trace = self._render_edge(
+                    u=row.u, v=row.v, trace_index=int(row.Index))
             elif row.type in [_NODE, _CHAPTER]:
                 trace, annotation = self._render_vertex(vertex_id=row.id, trace_index=int(row.Index))
                 annotations.append(annotation)
@@ -1183,6 +1457,25 @@ class LLMLogParser:
         figure.update_yaxes(
             **self.yaxes_style[yaxis_style],
         )
+        
+        # time layout, axis of the elapsed time & compressed idle gaps
+        if self.vertical_layout == _TIME_LAYOUT:
+            figure.update_yaxes(
+                tickmode="array",
+                **self.__time_ticks,
+                showticklabels=True,
+                ticklabelposition="inside",
+                showgrid=True,
+            )
+            for idle_gap in self.__idle_gaps:
+                figure.add_hline(
+                    y=idle_gap['y'],
+                    line_dash="dot",
+                    line_color="gray",
+                    annotation_text=\
+                        f"idle {format_duration(idle_gap['duration'])}",
+                    annotation_position="top right",
+                )
 
         # assign figure
         self.figure = copy.deepcopy(figure)
@@ -1218,7 +1511,16 @@ class LLMLogParser:
                       column_style:str="__default__", 
                       xaxis_style:str="__default__", 
                       yaxis_style:str="__default__",
+                      critical_path:bool=False,
                       ) -> go.Figure:
+        """ Render the figure.
+        
+        :param critical_path: Highlight the critical path (see 
+            utils.latency), defaults to False (keeps the nodes passed to 
+            highlight())
+        """
+        if critical_path:
+            self.highlight(node_ids=critical_path_node_ids(self.graph))
         self._render_graph(  
             layout_style=layout_style, 
             column_style=column_style, 
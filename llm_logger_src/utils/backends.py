@@ -0,0 +1,421 @@
+""" Storage backends of the log-graph, selectable by name or file suffix.
+
+    Backend
+        ├── name, suffix : 'gml' & '.gml', ...
+        ├── write() : records -> file
+        ├── read() : file -> records
+        ├── select() : file -> records matching the filters (a backend with
+        |              an index/seek reads only those, otherwise the records
+        |              of read() are filtered)
+        └── load() : file -> (graph, content store)
+
+LLMLogger.save()/load() look the backend up in the registry, a new format is
+added by register_backend() without changing LLMLogger.
+
+    gml : GML (sidecar index, checkpoint segments, lazy content)
+    journal : JSON lines (sidecar index, appended while logging)
+    llmz : compressed container (content inflated on request)
+    npz : columnar numpy arrays
+    sqlite : SQLite database (WAL, filters are SQL queries)
+    manifest : segments of a rotating journal (read only)
+    dot : Graphviz (requires pydot, write only)
+    trace : Trace Event Format JSON (chrome://tracing, Perfetto, write only)
+
+convert() streams the records of a saved log into another format without
+building the graph (e.g. a journal larger than the memory into a trace).
+"""
+import pathlib as pl
+import io
+from typing import Any, Dict, Iterable, Iterator, List, Tuple
+import numpy as np
+import networkx as nx
+
+try:
+    from .records import add_record, iter_records
+    from .index import IndexBuilder, index_path, read_index, valid_index, \
+        select, filter_records, ranges, read_ranges
+    from .gml import write_gml, read_gml, read_gml_records, segment_paths, \
+        read_segments, MappedContent, GML_SUFFIX
+    from .journal import JournalWriter, read_journal, index_journal, \
+        JOURNAL_SUFFIX
+    from .container import write_container, ContainerReader, \
+        CONTAINER_SUFFIX
+    from .columnar import to_columns, iter_columns, read_columnar, \
+        COLUMNAR_SUFFIX
+    from .database import write_sqlite, read_sqlite_records, SQLITE_SUFFIX
+    from .rotation import manifest_records, MANIFEST_SUFFIX
+    from .trace_events import write_trace_events, TRACE_SUFFIX
+    from .content import ContentStore, content_path
+except ImportError:
+    from llm_logger_src.utils.records import add_record, iter_records
+    from llm_logger_src.utils.index import IndexBuilder, index_path, \
+        read_index, valid_index, select, filter_records, ranges, read_ranges
+    from llm_logger_src.utils.gml import write_gml, read_gml, \
+        read_gml_records, segment_paths, read_segments, MappedContent, \
+        GML_SUFFIX
+    from llm_logger_src.utils.journal import JournalWriter, read_journal, \
+        index_journal, JOURNAL_SUFFIX
+    from llm_logger_src.utils.container import write_container, \
+        ContainerReader, CONTAINER_SUFFIX
+    from llm_logger_src.utils.columnar import to_columns, iter_columns, \
+        read_columnar, COLUMNAR_SUFFIX
+    from llm_logger_src.utils.database import write_sqlite, \
+        read_sqlite_records, SQLITE_SUFFIX
+    from llm_logger_src.utils.rotation import manifest_records, \
+        MANIFEST_SUFFIX
+    from llm_logger_src.utils.trace_events import write_trace_events, \
+        TRACE_SUFFIX
+    from llm_logger_src.utils.content import ContentStore, content_path
+
+
+################################################################################
+##                                  CONSTANTS                                 ##
+################################################################################
+# kwargs selecting a subgraph (see utils.index.select)
+FILTERS = ["nodes", "chapters", "time_range", "columns", "styles"]
+
+_BACKENDS = dict()  # name -> Backend
+
+
+################################################################################
+##                                  HELPERS                                   ##
+################################################################################
+def get_filters(kwargs:Dict[str, Any]) -> Dict[str, Any]:
+    """ Filters (not None) among kwargs.
+    """
+    return {key: kwargs[key] for key in FILTERS
+            if not isinstance(kwargs.get(key, None), type(None))}
+
+
+def _is_path(path_or_buffer:Any) -> bool:
+    return isinstance(path_or_buffer, (str, pl.Path))
+
+
+################################################################################
+##                                   Backend                                  ##
+################################################################################
+class Backend:
+    """ Storage format of the log-graph (see the module docstring).
+    """
+    name:str = None
+    suffix:str = None
+    # the file holds the content itself (no '<filename>.content' is saved)
+    stores_content:bool = False
+
+    def write(self, path_or_buffer:Any, records:Iterable[Dict[str, Any]],
+              **kwargs) -> None:
+        raise NotImplementedError(f"backend='{self.name}' is read only!")
+
+    def read(self, path_or_buffer:Any, **kwargs) -> Iterator[Dict[str, Any]]:
+        raise NotImplementedError(f"backend='{self.name}' is write only!")
+
+    def select(self, path_or_buffer:Any, **kwargs) \
+            -> Iterator[Dict[str, Any]]:
+        """ Records matching the filters in kwargs (see FILTERS).
+        """
+        return filter_records(self.read(path_or_buffer, **kwargs),
+                              **get_filters(kwargs))
+
+    def load(self, path_or_buffer:Any, content_store:Any=None, **kwargs) \
+            -> Tuple[nx.Graph, Any]:
+        """ Log-graph (subgraph if kwargs hold filters) & the content store
+            resolving its content.
+
+        :param content_store: Content store of '<filename>.content',
+            defaults to None
+        """
+        graph = nx.Graph()
+        if len(get_filters(kwargs)) > 0:
+            records = self.select(path_or_buffer, **kwargs)
+        else:
+            records = self.read(path_or_buffer, **kwargs)
+        for record in records:
+            add_record(graph=graph, record=record)
+        return graph, content_store
+
+
+################################################################################
+##                                  REGISTRY                                  ##
+################################################################################
+def register_backend(backend:Backend) -> Backend:
+    """ Register a backend (replaces a backend of the same name).
+    """
+    if not isinstance(backend.name, str) or not isinstance(backend.suffix, str):
+        raise ValueError(
+            f"backend={backend} requires both 'name' and 'suffix'!")
+    _BACKENDS[backend.name.lower()] = backend
+    return backend
+
+
+def get_backend(name_or_suffix:str) -> Backend:
+    """ Backend by name ('gml') or file suffix ('.gml').
+
+    :raises ValueError: No backend is registered for 'name_or_suffix'.
+    """
+    key = str(name_or_suffix).lower()
+    backend = _BACKENDS.get(key, None)
+    if isinstance(backend, type(None)):
+        for candidate in _BACKENDS.values():
+            if candidate.suffix.lower() in [key, "."+key]:
+                backend = candidate
+                break
+    if isinstance(backend, type(None)):
+        raise ValueError(
+            f"format='{name_or_suffix}', but valid formats={backend_names()}!")
+    return backend
+
+
+def backend_names() -> List[str]:
+    return list(_BACKENDS.keys())
+
+
+def convert(source:Any, destination:Any, format:str=None, **kwargs) -> None:
+    """ Convert a saved log-graph record by record (the graph is not built).
+
+    :param source: Saved log-graph, the backend is chosen by its suffix
+        (a file without suffix is read as gml).
+    :param destination: Path of the converted log-graph.
+    :param format: Backend of 'destination', defaults to None (by its suffix)
+    :param kwargs: Passed to both backends, kwargs['content_store'] defaults
+        to '<source stem>.content' (if it exists).
+    """
+    suffix = str(pl.Path(source).suffix).lower()
+    source_backend = get_backend(suffix if suffix != "" else GML_SUFFIX)
+    destination_backend = get_backend(str(pl.Path(destination).suffix) \
+        if isinstance(format, type(None)) else format)
+    if "content_store" not in kwargs and content_path(source).exists():
+        kwargs["content_store"] = ContentStore.open(content_path(source))
+    destination_backend.write(destination,
+        records=source_backend.read(source, **kwargs), **kwargs)
+
+
+################################################################################
+##                                 GMLBackend                                 ##
+################################################################################
+class GMLBackend(Backend):
+    name = "gml"
+    suffix = GML_SUFFIX
+
+    def write(self, path_or_buffer:Any, records:Iterable[Dict[str, Any]],
+              stringizer:Any=str, index:bool=False, **kwargs) -> None:
+        """ :param index: Write the sidecar index '<file>.idx',
+            defaults to False
+        """
+        builder = IndexBuilder() if index else None
+        size = write_gml(path=path_or_buffer, records=records,
+            stringizer=stringizer, index=builder)
+        # an index of an earlier save would not match the file
+        if isinstance(builder, type(None)):
+            index_path(path_or_buffer).unlink(missing_ok=True)
+        else:
+            builder.write(path=index_path(path_or_buffer), size=size)
+
+    def read(self, path_or_buffer:Any, lazy_content:bool=False, **kwargs) \
+            -> Iterator[Dict[str, Any]]:
+        return read_gml_records(path_or_buffer, lazy_content=lazy_content)
+
+    def select(self, path_or_buffer:Any, **kwargs) \
+            -> Iterator[Dict[str, Any]]:
+        index = None
+        if _is_path(path_or_buffer) and index_path(path_or_buffer).exists():
+            index = read_index(index_path(path_or_buffer))
+            if not valid_index(index, path=path_or_buffer):
+                index = None
+        if isinstance(index, type(None)):
+            return super().select(path_or_buffer, **get_filters(kwargs))
+        data = read_ranges(path=path_or_buffer, byte_ranges=ranges(
+            index=index, mask=select(index, **get_filters(kwargs))))
+        return read_gml_records(io.BytesIO(b"graph [\n" + data + b"]\n"))
+
+    def load(self, path_or_buffer:Any, content_store:Any=None, **kwargs) \
+            -> Tuple[nx.Graph, Any]:
+        """ kwargs['lazy_content'] (see utils.gml.MappedContent),
+            kwargs['destringizer'] (nx.read_gml), checkpoint segments are
+            stitched if the file does not exist.
+        """
+        filters = get_filters(kwargs)
+        if _is_path(path_or_buffer) and not pl.Path(path_or_buffer).exists() \
+            and len(segment_paths(path_or_buffer)) > 0:
+            graph = read_segments(paths=segment_paths(path_or_buffer))
+        elif "destringizer" in kwargs:
+            graph = nx.read_gml(path_or_buffer,
+                destringizer=kwargs["destringizer"])
+        elif len(filters) > 0:
+            # sidecar index (or a single pass over the records)
+            return super().load(path_or_buffer, content_store=content_store,
+                                **kwargs)
+        else:
+            lazy_content = kwargs.get("lazy_content", False)
+            graph = read_gml(path_or_buffer, lazy_content=lazy_content)
+            if lazy_content:
+                content_store = MappedContent(path_or_buffer=path_or_buffer,
+                                              content_store=content_store)
+            return graph, content_store
+        if len(filters) > 0:
+            subgraph = nx.Graph()
+            for record in filter_records(iter_records(graph), **filters):
+                add_record(graph=subgraph, record=record)
+            graph = subgraph
+        return graph, content_store
+
+
+################################################################################
+##                               JournalBackend                               ##
+################################################################################
+class JournalBackend(Backend):
+    name = "journal"
+    suffix = JOURNAL_SUFFIX
+
+    def write(self, path_or_buffer:Any, records:Iterable[Dict[str, Any]],
+              index:bool=False, **kwargs) -> None:
+        writer = JournalWriter(path=path_or_buffer, flush_every=2**31-1,
+                               append=False, index=index)
+        try:
+            writer.write_many(records)
+        finally:
+            writer.close()
+        if not index:
+            index_path(path_or_buffer).unlink(missing_ok=True)
+
+    def read(self, path_or_buffer:Any, **kwargs) -> Iterator[Dict[str, Any]]:
+        return read_journal(path_or_buffer)
+
+    def select(self, path_or_buffer:Any, **kwargs) \
+            -> Iterator[Dict[str, Any]]:
+        if not _is_path(path_or_buffer):
+            return super().select(path_or_buffer, **kwargs)
+        # records after the indexed part are scanned
+        index, size = index_journal(path_or_buffer)
+        index = index.arrays(size=size)
+        data = read_ranges(path=path_or_buffer, byte_ranges=ranges(
+            index=index, mask=select(index, **get_filters(kwargs))))
+        return read_journal(io.BytesIO(data))
+
+
+################################################################################
+##                              ContainerBackend                              ##
+################################################################################
+class ContainerBackend(Backend):
+    name = "llmz"
+    suffix = CONTAINER_SUFFIX
+    stores_content = True
+
+    def write(self, path_or_buffer:Any, records:Iterable[Dict[str, Any]],
+              codec:str="zlib", level:int=6, block_size:int=64,
+              content_store:Any=None, **kwargs) -> None:
+        write_container(path_or_buffer=path_or_buffer, records=records,
+            codec=codec, level=level, block_size=block_size,
+            content_store=content_store)
+
+    def read(self, path_or_buffer:Any, **kwargs) -> Iterator[Dict[str, Any]]:
+        """ Records with block handles in place of the content.
+        """
+        return iter(ContainerReader(path_or_buffer=path_or_buffer).records)
+
+    def load(self, path_or_buffer:Any, content_store:Any=None, **kwargs) \
+            -> Tuple[nx.Graph, Any]:
+        # content blocks are inflated on request
+        reader = ContainerReader(path_or_buffer=path_or_buffer)
+        graph = nx.Graph()
+        records = reader.records
+        if len(get_filters(kwargs)) > 0:
+            records = filter_records(records, **get_filters(kwargs))
+        for record in records:
+            add_record(graph=graph, record=record)
+        return graph, reader
+
+
+################################################################################
+##                              ColumnarBackend                               ##
+################################################################################
+class ColumnarBackend(Backend):
+    name = "npz"
+    suffix = COLUMNAR_SUFFIX
+
+    def write(self, path_or_buffer:Any, records:Iterable[Dict[str, Any]],
+              **kwargs) -> None:
+        np.savez(path_or_buffer, **to_columns(records))
+
+    def read(self, path_or_buffer:Any, **kwargs) -> Iterator[Dict[str, Any]]:
+        return iter_columns(read_columnar(path_or_buffer=path_or_buffer))
+
+
+################################################################################
+##                               SQLiteBackend                                ##
+################################################################################
+class SQLiteBackend(Backend):
+    name = "sqlite"
+    suffix = SQLITE_SUFFIX
+
+    def write(self, path_or_buffer:Any, records:Iterable[Dict[str, Any]],
+              **kwargs) -> None:
+        write_sqlite(path=path_or_buffer, records=records)
+
+    def read(self, path_or_buffer:Any, **kwargs) -> Iterator[Dict[str, Any]]:
+        return read_sqlite_records(path_or_buffer)
+
+    def select(self, path_or_buffer:Any, where:str=None,
+               parameters:Tuple[Any, ...]=(), **kwargs) \
+            -> Iterator[Dict[str, Any]]:
+        """ Filters (and kwargs['where'], an SQL condition on the 'nodes'
+            table with '?' kwargs['parameters']) are queried by SQL.
+        """
+        return read_sqlite_records(path_or_buffer, where=where,
+            parameters=parameters, **get_filters(kwargs))
+
+    def load(self, path_or_buffer:Any, content_store:Any=None, **kwargs) \
+            -> Tuple[nx.Graph, Any]:
+        graph = nx.Graph()
+        for record in self.select(path_or_buffer, **kwargs):
+            add_record(graph=graph, record=record)
+        return graph, content_store
+
+
+################################################################################
+##                              ManifestBackend                               ##
+################################################################################
+class ManifestBackend(Backend):
+    name = "manifest"
+    suffix = MANIFEST_SUFFIX
+
+    def read(self, path_or_buffer:Any, **kwargs) -> Iterator[Dict[str, Any]]:
+        return manifest_records(path_or_buffer)
+
+
+################################################################################
+##                                 DotBackend                                 ##
+################################################################################
+class DotBackend(Backend):
+    name = "dot"
+    suffix = ".dot"
+
+    def write(self, path_or_buffer:Any, records:Iterable[Dict[str, Any]],
+              **kwargs) -> None:
+        graph = nx.Graph()
+        for record in records:
+            add_record(graph=graph, record=record)
+        nx.nx_pydot.write_dot(graph, path_or_buffer)
+
+
+################################################################################
+##                                TraceBackend                                ##
+################################################################################
+class TraceBackend(Backend):
+    name = "trace"
+    suffix = TRACE_SUFFIX
+    # a trace needs no '<filename>.content'
+    stores_content = True
+
+    def write(self, path_or_buffer:Any, records:Iterable[Dict[str, Any]],
+              content:bool=False, content_store:Any=None, **kwargs) -> None:
+        """ :param content: Add the content of the nodes to the events,
+            defaults to False (see utils.trace_events)
+        """
+        write_trace_events(path_or_buffer, records=records, content=content,
+                           content_store=content_store)
+
+
+for _backend in [GMLBackend(), JournalBackend(), ContainerBackend(),
+                 ColumnarBackend(), SQLiteBackend(), ManifestBackend(), 
+                 DotBackend(), TraceBackend()]:
+    register_backend(_backend)
@@ -4,9 +4,10 @@ import networkx as nx
 from typing import Dict
 
 try:
-    from .ids import NodeID, ChapterID, _NODE, _CHAPTER
+    from .ids import NodeID, ChapterID, _NODE, _CHAPTER, id_counter
 except ImportError:
-    from llm_logger_src.utils.ids import NodeID, ChapterID, _NODE, _CHAPTER
+    from llm_logger_src.utils.ids import NodeID, ChapterID, _NODE, _CHAPTER, \
+        id_counter
 
 
 def get_chapter_ids_with_node_ids(graph:nx.DiGraph) -> Dict[ChapterID, NodeID]:
@@ -22,7 +23,12 @@ def get_chapter_ids_with_node_ids(graph:nx.DiGraph) -> Dict[ChapterID, NodeID]:
         elif data['metadata']['type'] == _CHAPTER:
             if node_id not in chapters.keys():
                 chapters[node_id] = list()
-            
+    
+    # nodes logged concurrently (threads, asyncio tasks) may be added to the 
+    # graph out of order, NodeIDs are assigned in logging order (numeric 
+    # order of the counters, IDs may exceed _ID_LENGTH digits)
+    for node_ids in chapters.values():
+        node_ids.sort(key=id_counter)
     
     return chapters
 
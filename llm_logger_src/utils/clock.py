@@ -0,0 +1,118 @@
+""" Timestamps of the log-graph (integer nanoseconds since the epoch).
+
+A Clock reads the wall-clock time once (time.time_ns()) and advances it by
+time.monotonic_ns(), thus timestamps of a run are immune to wall-clock
+adjustments and strictly increasing (no two records share a timestamp).
+
+Records store the timestamp as an int, it is formatted only for display.
+Older logs stored str(seconds) (e.g. '1717171717.123456'), timestamp_ns()
+converts any stored representation to nanoseconds.
+"""
+import threading
+import time
+import numbers
+import decimal
+import datetime as dt
+from typing import Any
+
+
+################################################################################
+##                                  CONSTANTS                                 ##
+################################################################################
+NO_TIME = -(2**63)          # missing timestamp (int64 minimum)
+_NS = 1_000_000_000
+# smaller values are seconds (1e14 seconds ~ 3 million years)
+_SECONDS_LIMIT = 1e14
+
+
+################################################################################
+##                                    Clock                                   ##
+################################################################################
+class Clock:
+
+    def __init__(self):
+        """ Monotonic nanosecond clock anchored to the wall-clock time.
+        """
+        self.anchor_ns = time.time_ns()
+        self._monotonic_ns = time.monotonic_ns()
+        self._last = 0
+        self._lock = threading.Lock()
+
+    def now(self) -> int:
+        """ Nanoseconds since the epoch, strictly increasing.
+        """
+        with self._lock:
+            timestamp = self.anchor_ns \
+                + (time.monotonic_ns() - self._monotonic_ns)
+            if timestamp <= self._last:
+                timestamp = self._last + 1
+            self._last = timestamp
+            return timestamp
+
+
+################################################################################
+##                                 CONVERSION                                 ##
+################################################################################
+def timestamp_ns(value:Any) -> int:
+    """ Timestamp in nanoseconds of a stored time (int nanoseconds,
+        str/float seconds of older logs, or str of nanoseconds from GML).
+
+    :return: Nanoseconds since the epoch, NO_TIME if the value is missing.
+    """
+    # fast path, timestamps of this version
+    if type(value) is int:
+        return value
+    if isinstance(value, bool) or isinstance(value, type(None)):
+        return NO_TIME
+    if isinstance(value, numbers.Integral):
+        return int(value)
+    if isinstance(value, str):
+        if value.isdigit():
+            return int(value)
+        # exact decimal seconds (a float rounds the microseconds)
+        try:
+            value = decimal.Decimal(value.strip())
+        except decimal.InvalidOperation:
+            return NO_TIME
+        if not value.is_finite():
+            return NO_TIME
+        if abs(value) < _SECONDS_LIMIT:
+            return int(value * _NS)
+        return int(value)
+    try:
+        value = float(value)
+    except (TypeError, ValueError):
+        return NO_TIME
+    if value != value:
+        return NO_TIME
+    if abs(value) < _SECONDS_LIMIT:
+        return int(round(value * _NS))
+    return int(value)
+
+
+def timestamp_seconds(value:Any) -> float:
+    """ Timestamp in seconds (float, NaN if the value is missing).
+    """
+    value = timestamp_ns(value)
+    return float("nan") if value == NO_TIME else value / _NS
+
+
+def format_timestamp(value:Any) -> str:
+    """ Local date & time with nanoseconds, e.g. '2024-05-31 17:28:37.123456789'.
+    """
+    value = timestamp_ns(value)
+    if value == NO_TIME:
+        return ""
+    seconds, nanoseconds = divmod(value, _NS)
+    return f"{dt.datetime.fromtimestamp(seconds):%Y-%m-%d %H:%M:%S}"\
+        f".{nanoseconds:09d}"
+
+
+def format_duration(value:Any) -> str:
+    """ Duration of nanoseconds with a readable unit, e.g. '1.25 s', '830 ms'.
+    """
+    value = int(value)
+    for unit, scale in [("s", _NS), ("ms", 1_000_000), ("us", 1_000)]:
+        if abs(value) >= scale:
+            return f"{value / scale:.3g} {unit}"
+    return f"{value} ns"
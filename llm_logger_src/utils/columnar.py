@@ -0,0 +1,268 @@
+""" Columnar (numpy) layout of the log-graph.
+
+    <filename>.npz
+        ├── graph_time : int64 (1,) nanoseconds since the epoch
+        ├── chapter_* : id, time, style, title, content
+        ├── node_* : id, chapter_id, column, style, stack, time, content, span,
+        |       encoding
+        ├── edge_* : u, v, time, style, content
+        ├── columns, styles : names of the column & style codes (str)
+        └── strings_data, strings_offsets : content section (JSON encoded
+                titles & content, uint8 + int64 offsets, -1 is None)
+
+IDs are stored as the integer counters of NodeID/ChapterID, timestamps as
+int64 nanoseconds (NO_TIME if missing), columns & styles as integer codes,
+thus loading into arrays or DataFrames does not need any per-row Python work
+(content is only decoded on request).
+"""
+import json
+from typing import Any, Dict, Iterable, List, Tuple
+import numpy as np
+import pandas as pd
+import networkx as nx
+
+try:
+    from .ids import NodeID, ChapterID, _NODE, _CHAPTER, _EDGE
+    from .clock import timestamp_ns, NO_TIME
+    from .records import _GRAPH, add_record, iter_records, graph_record, \
+        chapter_record, node_record, edge_record
+except ImportError:
+    from llm_logger_src.utils.ids import NodeID, ChapterID, _NODE, _CHAPTER, \
+        _EDGE
+    from llm_logger_src.utils.clock import timestamp_ns, NO_TIME
+    from llm_logger_src.utils.records import _GRAPH, add_record, \
+        iter_records, graph_record, chapter_record, node_record, edge_record
+
+
+################################################################################
+##                                  CONSTANTS                                 ##
+################################################################################
+COLUMNAR_SUFFIX = ".npz"
+
+
+################################################################################
+##                                  HELPERS                                   ##
+################################################################################
+class _Codes:
+    """ str -> int code (in order of appearance).
+    """
+    def __init__(self):
+        self.names = list()
+        self._codes = dict()
+
+    def __call__(self, name:str) -> int:
+        code = self._codes.get(name, None)
+        if isinstance(code, type(None)):
+            code = len(self.names)
+            self._codes[name] = code
+            self.names.append(name)
+        return code
+
+
+class _Strings:
+    """ Content section, every value is JSON encoded and concatenated.
+    """
+    def __init__(self):
+        self.chunks = list()
+        self.offsets = [0]
+
+    def __call__(self, value:Any) -> int:
+        if isinstance(value, type(None)):
+            return -1
+        data = json.dumps(value, separators=(",", ":"), default=str)\
+            .encode("utf-8")
+        self.chunks.append(data)
+        self.offsets.append(self.offsets[-1] + len(data))
+        return len(self.chunks) - 1
+
+
+def _counter(id:str, prefix:str) -> int:
+    return int(id[len(prefix):])
+
+
+def _time(value:Any) -> int:
+    """ Nanoseconds of a stored time, NO_TIME if missing.
+    """
+    return timestamp_ns(value)
+
+
+################################################################################
+##                                 to_columns                                 ##
+################################################################################
+def to_columns(records:Iterable[Dict[str, Any]]) -> Dict[str, np.ndarray]:
+    """ Convert records (see utils.records.iter_records()) into arrays.
+    """
+    columns, styles, strings = _Codes(), _Codes(), _Strings()
+    graph_time = NO_TIME
+    chapters = dict(id=[], time=[], style=[], title=[], content=[])
+    nodes = dict(id=[], chapter_id=[], column=[], style=[], stack=[], time=[],
+                 content=[], span=[], encoding=[])
+    edges = dict(u=[], v=[], time=[], style=[], content=[])
+
+    for record in records:
+        record_type = record["type"]
+        if record_type == _NODE:
+            nodes["id"].append(_counter(record["id"], _NODE))
+            nodes["chapter_id"].append(
+                _counter(record["chapter_id"], _CHAPTER))
+            nodes["column"].append(columns(record["column"]))
+            nodes["style"].append(styles(record["style"]))
+            nodes["stack"].append(bool(record["stack"]))
+            nodes["time"].append(_time(record["time"]))
+            nodes["content"].append(strings(record.get("content")))
+            nodes["span"].append(strings(record.get("span")))
+            nodes["encoding"].append(strings(record.get("encoding")))
+        elif record_type == _EDGE:
+            edges["u"].append(_counter(record["u"], _NODE))
+            edges["v"].append(_counter(record["v"], _NODE))
+            edges["time"].append(_time(record["time"]))
+            edges["style"].append(styles(record["style"]))
+            edges["content"].append(strings(record.get("content")))
+        elif record_type == _CHAPTER:
+            chapters["id"].append(_counter(record["id"], _CHAPTER))
+            chapters["time"].append(_time(record["time"]))
+            chapters["style"].append(styles(record["style"]))
+            chapters["title"].append(strings(record.get("title")))
+            chapters["content"].append(strings(record.get("content")))
+        elif record_type == _GRAPH:
+            graph_time = _time(record["time"])
+
+    arrays = dict(graph_time=np.array([graph_time], dtype=np.int64))
+    for prefix, table in [("chapter", chapters), ("node", nodes),
+                          ("edge", edges)]:
+        for key, values in table.items():
+            if key == "stack":
+                dtype = np.bool_
+            elif key in ["column", "style"]:
+                dtype = np.int32
+            else:
+                dtype = np.int64
+            arrays[f"{prefix}_{key}"] = np.array(values, dtype=dtype)
+    arrays["columns"] = np.array(columns.names, dtype=np.str_)
+    arrays["styles"] = np.array(styles.names, dtype=np.str_)
+    arrays["strings_data"] = np.frombuffer(b"".join(strings.chunks),
+                                           dtype=np.uint8)
+    arrays["strings_offsets"] = np.array(strings.offsets, dtype=np.int64)
+    return arrays
+
+
+################################################################################
+##                                 get_string                                 ##
+################################################################################
+def get_string(arrays:Dict[str, np.ndarray], index:int) -> Any:
+    """ Decode a single value (title/content) of the content section.
+    """
+    if index < 0:
+        return None
+    start = arrays["strings_offsets"][index]
+    end = arrays["strings_offsets"][index+1]
+    return json.loads(arrays["strings_data"][start:end].tobytes()\
+        .decode("utf-8"))
+
+
+################################################################################
+##                                 iter_columns                               ##
+################################################################################
+def iter_columns(arrays:Dict[str, np.ndarray]) -> Iterable[Dict[str, Any]]:
+    """ Convert arrays back into records (graph, chapters, nodes, edges).
+    """
+    columns = arrays["columns"].tolist()
+    styles = arrays["styles"].tolist()
+    # float64 seconds (NaN if missing) in older files
+    graph_time = timestamp_ns(arrays["graph_time"][0].item())
+    if graph_time != NO_TIME:
+        yield graph_record(time=graph_time)
+    for id, time, style, title, content in zip(
+            arrays["chapter_id"].tolist(), arrays["chapter_time"].tolist(),
+            arrays["chapter_style"].tolist(), arrays["chapter_title"].tolist(),
+            arrays["chapter_content"].tolist()):
+        yield chapter_record(
+            chapter_id=ChapterID(id),
+            time=time,
+            title=get_string(arrays, title),
+            style=styles[style],
+            content=get_string(arrays, content),
+            )
+    # older files without spans/encodings
+    spans, encodings = [arrays[key].tolist() if key in arrays 
+        else [-1] * len(arrays["node_id"]) 
+        for key in ["node_span", "node_encoding"]]
+    for id, chapter_id, column, style, stack, time, content, span, encoding \
+            in zip(
+            arrays["node_id"].tolist(), arrays["node_chapter_id"].tolist(),
+            arrays["node_column"].tolist(), arrays["node_style"].tolist(),
+            arrays["node_stack"].tolist(), arrays["node_time"].tolist(),
+            arrays["node_content"].tolist(), spans, encodings):
+        yield node_record(
+            node_id=NodeID(id),
+            time=time,
+            column=columns[column],
+            style=styles[style],
+            stack=stack,
+            chapter_id=ChapterID(chapter_id),
+            content=get_string(arrays, content),
+            span=get_string(arrays, span),
+            encoding=get_string(arrays, encoding),
+            )
+    for u, v, time, style, content in zip(
+            arrays["edge_u"].tolist(), arrays["edge_v"].tolist(),
+            arrays["edge_time"].tolist(), arrays["edge_style"].tolist(),
+            arrays["edge_content"].tolist()):
+        yield edge_record(
+            u=NodeID(u),
+            v=NodeID(v),
+            time=time,
+            style=styles[style],
+            content=get_string(arrays, content),
+            )
+
+
+################################################################################
+##                                 SAVE / LOAD                                ##
+################################################################################
+def write_columnar(path_or_buffer:Any, graph:nx.Graph) -> None:
+    np.savez(path_or_buffer, **to_columns(iter_records(graph)))
+
+
+def read_columnar(path_or_buffer:Any) -> Dict[str, np.ndarray]:
+    with np.load(path_or_buffer, allow_pickle=False) as file:
+        return {key: file[key] for key in file.files}
+
+
+def columns_to_graph(arrays:Dict[str, np.ndarray], graph:nx.Graph=None) \
+        -> nx.Graph:
+    if isinstance(graph, type(None)):
+        graph = nx.Graph()
+    for record in iter_columns(arrays):
+        add_record(graph=graph, record=record)
+    return graph
+
+
+def columns_to_dataframes(arrays:Dict[str, np.ndarray], content:bool=False) \
+        -> Tuple[pd.DataFrame, pd.DataFrame, pd.DataFrame]:
+    """ Tables of chapters, nodes and edges (columns & styles as categoricals).
+
+    :param arrays: Arrays from read_columnar() or to_columns().
+    :param content: Decode titles, content, spans & encodings (per-row work), 
+        defaults to False
+        (index into the content section, see get_string())
+    :return: chapters, nodes, edges
+    """
+    columns = arrays["columns"]
+    styles = arrays["styles"]
+    tables = list()
+    for prefix in ["chapter", "node", "edge"]:
+        table = dict()
+        for key, values in arrays.items():
+            if not key.startswith(prefix+"_"):
+                continue
+            name = key[len(prefix)+1:]
+            if name == "column":
+                values = pd.Categorical.from_codes(values, categories=columns)
+            elif name == "style":
+                values = pd.Categorical.from_codes(values, categories=styles)
+            elif name in ["content", "title", "span", "encoding"] and content:
+                values = [get_string(arrays, index) for index in values]
+            table[name] = values
+        tables.append(pd.DataFrame(table))
+    return tables[0], tables[1], tables[2]
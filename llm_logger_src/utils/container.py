@@ -0,0 +1,230 @@
+""" Compressed log-graph container with lazy per-block decompression.
+
+    <filename>.llmz
+        ├── magic : b"LLMZ"
+        ├── header : version (1 byte), index length (8 bytes, big-endian)
+        ├── index : UTF-8 JSON (uncompressed)
+        |   ├── codec : "zlib" / "lzma"
+        |   ├── blocks : [[offset, length], ...] (relative to the first block)
+        |   └── records : records of the graph without content, 'content'
+        |                 holds a handle 'BLCK_<block>_<item>' (or None)
+        └── blocks : compressed JSON list of contents
+
+Loading only parses the index (structure, IDs, column, style, chapter, time),
+a block is inflated once its content is requested via ContainerReader.resolve()
+(e.g. by LLMLogParser when a trace is rendered).
+"""
+import pathlib as pl
+import struct
+import json
+import zlib
+import lzma
+import io
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Iterable, List, Tuple, Union
+import networkx as nx
+
+try:
+    from .records import add_record
+    from .content import valid_content_ref
+except ImportError:
+    from llm_logger_src.utils.records import add_record
+    from llm_logger_src.utils.content import valid_content_ref
+
+
+################################################################################
+##                                  CONSTANTS                                 ##
+################################################################################
+CONTAINER_SUFFIX = ".llmz"
+CODECS = ["zlib", "lzma"]
+
+_MAGIC = b"LLMZ"
+_VERSION = 1
+_HEADER = struct.Struct(">BQ")
+_BLOCK = "BLCK_"
+
+
+################################################################################
+##                                   CODECS                                   ##
+################################################################################
+def _compress(data:bytes, codec:str, level:int) -> bytes:
+    if codec == "zlib":
+        return zlib.compress(data, level)
+    elif codec == "lzma":
+        return lzma.compress(data, preset=level)
+    raise ValueError(f"codec='{codec}', but valid values are {CODECS}!")
+
+
+def _decompress(data:bytes, codec:str) -> bytes:
+    if codec == "zlib":
+        return zlib.decompress(data)
+    elif codec == "lzma":
+        return lzma.decompress(data)
+    raise ValueError(f"codec='{codec}', but valid values are {CODECS}!")
+
+
+def valid_block_handle(value:Any) -> bool:
+    return isinstance(value, str) and value[0:len(_BLOCK)] == _BLOCK
+
+
+################################################################################
+##                              write_container                               ##
+################################################################################
+def write_container(
+        path_or_buffer:Any,
+        records:Iterable[Dict[str, Any]],
+        codec:str="zlib",
+        level:int=6,
+        block_size:int=64,
+        content_store:Any=None,
+    ) -> None:
+    """ Write records into a compressed container.
+
+    :param path_or_buffer: Destination file or a writable bytes buffer.
+    :param records: Records of the log-graph (see utils.records).
+    :param codec: Compression of the content blocks ('zlib', 'lzma'),
+        defaults to "zlib"
+    :param level: Compression level, defaults to 6
+    :param block_size: Number of contents per block, defaults to 64
+    :param content_store: ContentStore resolving ContentRefs, every unique
+        content is written once, defaults to None
+    """
+    if codec not in CODECS:
+        raise ValueError(f"codec='{codec}', but valid values are {CODECS}!")
+
+    index_records = list()
+    blocks = list()
+    block = list()
+    handles = dict()    # ContentRef -> handle (deduplicated content)
+
+    def flush_block():
+        blocks.append(_compress(
+            json.dumps(block, separators=(",", ":"), default=str)\
+                .encode("utf-8"),
+            codec=codec,
+            level=level))
+        block.clear()
+
+    for record in records:
+        content = record.get("content", None)
+        record = dict(record)
+        if not isinstance(content, type(None)):
+            if valid_content_ref(content) \
+                and not isinstance(content_store, type(None)) \
+                and content in handles:
+                record["content"] = handles[content]
+            else:
+                handle = f"{_BLOCK}{len(blocks)}_{len(block)}"
+                if valid_content_ref(content) \
+                    and not isinstance(content_store, type(None)):
+                    handles[content] = handle
+                    content = content_store.resolve(content)
+                block.append(content)
+                record["content"] = handle
+                if len(block) >= block_size:
+                    flush_block()
+        index_records.append(record)
+    if len(block) > 0:
+        flush_block()
+
+    offsets = list()
+    offset = 0
+    for data in blocks:
+        offsets.append([offset, len(data)])
+        offset = offset + len(data)
+    index = json.dumps(
+        dict(codec=codec, blocks=offsets, records=index_records),
+        separators=(",", ":"), default=str).encode("utf-8")
+
+    if isinstance(path_or_buffer, (str, pl.Path)):
+        file = open(path_or_buffer, "wb")
+    else:
+        file = path_or_buffer
+    try:
+        file.write(_MAGIC + _HEADER.pack(_VERSION, len(index)) + index)
+        for data in blocks:
+            file.write(data)
+    finally:
+        if isinstance(path_or_buffer, (str, pl.Path)):
+            file.close()
+
+
+################################################################################
+##                              ContainerReader                               ##
+################################################################################
+class ContainerReader:
+
+    def __init__(self, path_or_buffer:Any, cache_size:int=16):
+        """ Read the index of a container, content blocks are inflated on
+            request (ContentStore interface: resolve(), get()).
+
+        :param path_or_buffer: Container file or a (bytes) file-like object.
+        :param cache_size: Number of inflated blocks kept in memory,
+            defaults to 16
+        """
+        if isinstance(path_or_buffer, (str, pl.Path)):
+            self._file = open(path_or_buffer, "rb")
+        else:
+            self._file = path_or_buffer
+        self.cache_size = cache_size
+        self._lock = threading.Lock()
+        self._cache = OrderedDict()
+
+        magic = self._file.read(len(_MAGIC))
+        if magic != _MAGIC:
+            raise ValueError(
+                f"magic={magic}, but {_MAGIC} is expected (not a container)!")
+        version, index_length = _HEADER.unpack(self._file.read(_HEADER.size))
+        if version != _VERSION:
+            raise ValueError(
+                f"version={version}, but only version={_VERSION} is supported!")
+        index = json.loads(self._file.read(index_length).decode("utf-8"))
+        self.codec = index["codec"]
+        self.records = index["records"]
+        self._blocks = index["blocks"]
+        self._start = len(_MAGIC) + _HEADER.size + index_length
+
+    ############################################################################
+    ##                                 PUBLIC                                 ##
+    ############################################################################
+    def graph(self, graph:nx.Graph=None) -> nx.Graph:
+        """ Log-graph with block handles in place of the content.
+        """
+        if isinstance(graph, type(None)):
+            graph = nx.Graph()
+        for record in self.records:
+            add_record(graph=graph, record=record)
+        return graph
+
+    def get(self, handle:str) -> Any:
+        block_index, item_index = handle[len(_BLOCK):].split("_")
+        return self._block(int(block_index))[int(item_index)]
+
+    def resolve(self, value:Any) -> Any:
+        """ Content of 'value' if it is a block handle, otherwise 'value'.
+        """
+        if valid_block_handle(value):
+            return self.get(value)
+        return value
+
+    def close(self) -> None:
+        self._file.close()
+
+    ############################################################################
+    ##                                PRIVATE                                 ##
+    ############################################################################
+    def _block(self, block_index:int) -> List[Any]:
+        with self._lock:
+            block = self._cache.get(block_index, None)
+            if not isinstance(block, type(None)):
+                self._cache.move_to_end(block_index)
+                return block
+            offset, length = self._blocks[block_index]
+            self._file.seek(self._start + offset)
+            block = json.loads(_decompress(
+                self._file.read(length), codec=self.codec).decode("utf-8"))
+            self._cache[block_index] = block
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+            return block
@@ -0,0 +1,246 @@
+""" Content-addressed store of node & edge content.
+
+Repeated content (system prompts, tool schemas, ...) is stored once under its
+hash, nodes and edges of the log-graph only hold the ContentRef.
+
+    <filename>.content (one entry per unique content)
+        └── line : <ContentRef>\\t<JSON encoded content>\\n
+
+Entries are appended when the content is seen for the first time, an opened
+store only indexes the offsets and reads the content on request. A store 
+continuing an existing file (append=True) indexes its entries first, thus the
+ContentRefs of earlier runs stay valid.
+"""
+import pathlib as pl
+import hashlib
+import json
+import io
+import threading
+from typing import Any, Dict, Iterator, Tuple, Union
+
+
+################################################################################
+##                                  CONSTANTS                                 ##
+################################################################################
+_CONTENT = "CONT_"
+_HASH_LENGTH = 32
+CONTENT_SUFFIX = ".content"
+
+
+################################################################################
+##                                 ContentRef                                 ##
+################################################################################
+class ContentRef(str):
+    def __new__(cls, digest:str):
+        if len(digest) != _HASH_LENGTH:
+            raise ValueError(
+                f"len(digest)={len(digest)}, but {_HASH_LENGTH} is expected!")
+        return super(ContentRef, cls).__new__(cls, _CONTENT + digest)
+
+    @classmethod
+    def of(cls, content:str) -> "ContentRef":
+        return cls(hashlib.sha256(content.encode("utf-8"))\
+            .hexdigest()[0:_HASH_LENGTH])
+
+    # copy & pickle support (refs are immutable)
+    def __getnewargs__(self):
+        return (str(self[len(_CONTENT):]), )
+
+    def __deepcopy__(self, memo):
+        return self
+
+
+def valid_content_ref(value:Any) -> bool:
+    return isinstance(value, str) \
+        and value[0:len(_CONTENT)] == _CONTENT \
+        and len(value) == (len(_CONTENT)+_HASH_LENGTH)
+
+
+################################################################################
+##                                ContentStore                                ##
+################################################################################
+class ContentStore:
+
+    def __init__(self, path:Union[str, pl.Path]=None, min_length:int=64,
+                 append:bool=True):
+        """ Deduplicate content by its hash.
+
+        :param path: File the unique content is appended to, defaults to None
+            (in memory only)
+        :param min_length: Shorter content is kept inline (the reference
+            would not save anything), defaults to 64
+        :param append: Continue an existing file instead of starting a new 
+            one (truncating it), defaults to True
+        """
+        self.path = None if isinstance(path, type(None)) else pl.Path(path)
+        self.min_length = min_length
+
+        self._lock = threading.Lock()
+        self._contents = dict()     # ContentRef -> content (in memory)
+        self._offsets = dict()      # ContentRef -> (offset, length) in file
+        self._file = None
+        self._references = 0
+        self._bytes_total = 0
+        self._bytes_unique = 0
+        if not isinstance(self.path, type(None)):
+            if append and self.path.exists():
+                self._file = open(self.path, "a+b")
+                end = self._index()
+                # a truncated last line (crash) would corrupt the next entry
+                if self._file.seek(0, io.SEEK_END) > end:
+                    self._file.truncate(end)
+            else:
+                self._file = open(self.path, "w+b")
+
+    @classmethod
+    def open(cls, path:Union[str, pl.Path]) -> "ContentStore":
+        """ Open an existing store, only the offsets are read (lazy content).
+        """
+        store = cls(path=None)
+        store.path = pl.Path(path)
+        store._file = open(store.path, "rb")
+        store._index()
+        return store
+
+    ############################################################################
+    ##                               ATTRIBUTES                               ##
+    ############################################################################
+    @property
+    def stats(self) -> Dict[str, int]:
+        return dict(
+            unique=len(self),
+            references=self._references,
+            bytes_total=self._bytes_total,
+            bytes_unique=self._bytes_unique,
+        )
+
+    def __len__(self) -> int:
+        return len(set(self._contents.keys()) | set(self._offsets.keys()))
+
+    def __contains__(self, ref:str) -> bool:
+        return ref in self._contents or ref in self._offsets
+
+    ############################################################################
+    ##                                 PUBLIC                                 ##
+    ############################################################################
+    def put(self, content:Any) -> Any:
+        """ Store the content, returns its ContentRef (content which is not
+            a str or is shorter than 'min_length' is returned unchanged).
+        """
+        if not isinstance(content, str) or len(content) < self.min_length:
+            return content
+        ref = ContentRef.of(content)
+        with self._lock:
+            self._references = self._references + 1
+            self._bytes_total = self._bytes_total + len(content)
+            if ref in self._contents or ref in self._offsets:
+                return ref
+            self._bytes_unique = self._bytes_unique + len(content)
+            if isinstance(self._file, type(None)):
+                self._contents[ref] = content
+            else:
+                self._offsets[ref] = self._append(ref=ref, content=content)
+        return ref
+
+    def get(self, ref:str) -> Any:
+        """ Content of the reference.
+
+        :raises KeyError: Unknown reference.
+        """
+        content = self._contents.get(ref, None)
+        if not isinstance(content, type(None)):
+            return content
+        if ref not in self._offsets:
+            raise KeyError(f"ref='{ref}' is not in the content store!")
+        offset, length = self._offsets[ref]
+        with self._lock:
+            self._file.seek(offset)
+            line = self._file.read(length)
+        return json.loads(line.decode("utf-8"))
+
+    def resolve(self, value:Any) -> Any:
+        """ Content of 'value' if it is a ContentRef, otherwise 'value'.
+        """
+        if valid_content_ref(value) and value in self:
+            return self.get(value)
+        return value
+
+    def items(self) -> Iterator[Tuple[str, Any]]:
+        for ref in list(self._contents.keys()):
+            yield ref, self._contents[ref]
+        for ref in list(self._offsets.keys()):
+            yield ref, self.get(ref)
+
+    def save(self, path:Union[str, pl.Path]) -> None:
+        """ Write every unique content to 'path'.
+        """
+        path = pl.Path(path)
+        if not isinstance(self.path, type(None)) \
+            and path.resolve() == self.path.resolve():
+            self.flush()
+            return
+        with open(path, "wb") as file:
+            for ref, content in self.items():
+                file.write(_encode(ref=ref, content=content))
+
+    def flush(self) -> None:
+        if not isinstance(self._file, type(None)) and not self._file.closed:
+            with self._lock:
+                self._file.flush()
+
+    def close(self) -> None:
+        if not isinstance(self._file, type(None)) and not self._file.closed:
+            self.flush()
+            self._file.close()
+
+    ############################################################################
+    ##                                PRIVATE                                 ##
+    ############################################################################
+    def _index(self) -> int:
+        """ Index the entries of the file, returns the end of the last 
+            complete entry.
+        """
+        end = 0
+        for ref, offset, length in _scan(self._file):
+            self._offsets[ref] = (offset, length)
+            self._bytes_unique = self._bytes_unique + length
+            end = offset + length + 1
+        return end
+
+    def _append(self, ref:ContentRef, content:str) -> Tuple[int, int]:
+        line = _encode(ref=ref, content=content)
+        self._file.seek(0, io.SEEK_END)
+        offset = self._file.tell() + len(ref) + 1
+        self._file.write(line)
+        return offset, len(line) - len(ref) - 2
+
+
+################################################################################
+##                                  HELPERS                                   ##
+################################################################################
+def _encode(ref:str, content:Any) -> bytes:
+    return (str(ref) + "\t" + json.dumps(content, separators=(",", ":")) \
+        + "\n").encode("utf-8")
+
+
+def _scan(file:io.BufferedReader) -> Iterator[Tuple[ContentRef, int, int]]:
+    """ Offsets & lengths of the JSON encoded content (a truncated last line
+        is skipped).
+    """
+    file.seek(0)
+    offset = 0
+    for line in file:
+        if not line.endswith(b"\n"):
+            break
+        ref, _ = line.split(b"\t", 1)
+        ref = ref.decode("utf-8")
+        yield ContentRef(ref[len(_CONTENT):]), offset + len(ref) + 1, \
+            len(line) - len(ref) - 2
+        offset = offset + len(line)
+
+
+def content_path(path:Union[str, pl.Path]) -> pl.Path:
+    """ Content store belonging to a saved log-graph (same stem).
+    """
+    path = pl.Path(path)
+    return path.with_name(path.stem + CONTENT_SUFFIX)
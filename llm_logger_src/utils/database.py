@@ -0,0 +1,404 @@
+""" SQLite storage of the log-graph (stdlib sqlite3, WAL mode).
+
+    <filename>.sqlite
+        ├── graph (id=0, time)
+        ├── chapters (id, time, style, title, content)
+        ├── nodes (id, chapter_id, column, style, stack, time, title, content,
+        │          span, encoding)
+        └── edges (u, v, time, style, title, content)
+
+IDs are the integer counters of NodeID/ChapterID, time is an INTEGER timestamp
+(nanoseconds since the epoch, see utils.clock), title, content & span are JSON
+encoded. Nodes are indexed by chapter, column, style and time, thus ad-hoc
+queries do not load the graph, e.g.
+
+    SELECT id, content FROM nodes
+    WHERE style = 'error' AND column = 'planner' AND time >= :an_hour_ago
+
+Records are inserted in batches (one transaction per batch), readers are not
+blocked by the writer (WAL), thus the file can be queried while logging.
+"""
+import pathlib as pl
+import sqlite3
+import threading
+import json
+import time
+from typing import Any, Dict, Iterable, Iterator, List, Tuple, Union
+import networkx as nx
+
+try:
+    from .ids import NodeID, ChapterID, _NODE, _CHAPTER, _EDGE
+    from .records import _GRAPH, add_record, graph_record, chapter_record, \
+        node_record, edge_record
+    from .index import _counter
+    from .columnar import _time
+    from .clock import NO_TIME
+except ImportError:
+    from llm_logger_src.utils.ids import NodeID, ChapterID, _NODE, _CHAPTER, \
+        _EDGE
+    from llm_logger_src.utils.records import _GRAPH, add_record, \
+        graph_record, chapter_record, node_record, edge_record
+    from llm_logger_src.utils.index import _counter
+    from llm_logger_src.utils.columnar import _time
+    from llm_logger_src.utils.clock import NO_TIME
+
+
+################################################################################
+##                                  CONSTANTS                                 ##
+################################################################################
+SQLITE_SUFFIX = ".sqlite"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS graph (
+    id INTEGER PRIMARY KEY CHECK (id = 0),
+    time INTEGER);
+CREATE TABLE IF NOT EXISTS chapters (
+    id INTEGER PRIMARY KEY,
+    time INTEGER,
+    style TEXT,
+    title TEXT,
+    content TEXT);
+CREATE TABLE IF NOT EXISTS nodes (
+    id INTEGER PRIMARY KEY,
+    chapter_id INTEGER,
+    column TEXT,
+    style TEXT,
+    stack INTEGER,
+    time INTEGER,
+    title TEXT,
+    content TEXT,
+    span TEXT,
+    encoding TEXT);
+CREATE TABLE IF NOT EXISTS edges (
+    u INTEGER,
+    v INTEGER,
+    time INTEGER,
+    style TEXT,
+    title TEXT,
+    content TEXT,
+    PRIMARY KEY (u, v));
+CREATE INDEX IF NOT EXISTS nodes_chapter_id ON nodes (chapter_id);
+CREATE INDEX IF NOT EXISTS nodes_column ON nodes (column);
+CREATE INDEX IF NOT EXISTS nodes_style ON nodes (style);
+CREATE INDEX IF NOT EXISTS nodes_time ON nodes (time);
+CREATE INDEX IF NOT EXISTS edges_v ON edges (v);
+CREATE INDEX IF NOT EXISTS chapters_time ON chapters (time);
+"""
+
+_INSERT = {
+    _GRAPH: "INSERT OR REPLACE INTO graph VALUES (0, ?)",
+    _CHAPTER: "INSERT OR REPLACE INTO chapters VALUES (?, ?, ?, ?, ?)",
+    _NODE: "INSERT OR REPLACE INTO nodes VALUES "\
+        "(?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+    _EDGE: "INSERT OR REPLACE INTO edges VALUES (?, ?, ?, ?, ?, ?)",
+    }
+
+# node columns added by later versions (in order, appended by ALTER TABLE)
+_NODE_COLUMNS_ADDED = ["span", "encoding"]
+
+
+################################################################################
+##                                  HELPERS                                   ##
+################################################################################
+def _dumps(value:Any) -> str:
+    if isinstance(value, type(None)):
+        return None
+    return json.dumps(value, separators=(",", ":"), default=str)
+
+
+def _loads(text:str) -> Any:
+    if isinstance(text, type(None)):
+        return None
+    return json.loads(text)
+
+
+def _sql_time(value:Any) -> int:
+    time = _time(value)
+    return None if time == NO_TIME else time
+
+
+def _row(record:Dict[str, Any]) -> Tuple[Any, ...]:
+    record_type = record["type"]
+    if record_type == _NODE:
+        return (_counter(record["id"]), _counter(record["chapter_id"]),
+                record["column"], record["style"], int(bool(record["stack"])),
+                _sql_time(record["time"]), _dumps(record.get("title", "")),
+                _dumps(record.get("content")), _dumps(record.get("span")),
+                record.get("encoding"))
+    elif record_type == _EDGE:
+        return (_counter(record["u"]), _counter(record["v"]),
+                _sql_time(record["time"]), record["style"],
+                _dumps(record.get("title", "")), _dumps(record.get("content")))
+    elif record_type == _CHAPTER:
+        return (_counter(record["id"]), _sql_time(record["time"]),
+                record["style"], _dumps(record.get("title", "")),
+                _dumps(record.get("content")))
+    elif record_type == _GRAPH:
+        return (_sql_time(record["time"]), )
+    raise ValueError(f"record type='{record_type}' is unknown!")
+
+
+def connect(path:Any, read_only:bool=False) -> sqlite3.Connection:
+    """ Connection to a log database (WAL mode, schema created if missing).
+
+    :param path: Database file, or a (bytes) file-like object holding a 
+        database (e.g. an upload) which is deserialized into memory.
+    """
+    if not isinstance(path, (str, pl.Path)):
+        data = bytearray(path.read())
+        # an in-memory database can not be in WAL mode (file format 2)
+        if len(data) >= 20 and data[18] == 2:
+            data[18], data[19] = 1, 1
+        connection = sqlite3.connect(":memory:", check_same_thread=False)
+        connection.deserialize(bytes(data))
+        return connection
+    if read_only:
+        return sqlite3.connect(f"file:{pl.Path(path).as_posix()}?mode=ro",
+                               uri=True, check_same_thread=False)
+    connection = sqlite3.connect(path, check_same_thread=False)
+    connection.execute("PRAGMA journal_mode=WAL")
+    connection.executescript(_SCHEMA)
+    # databases of older versions (nodes without spans/encodings)
+    for name in _missing_node_columns(connection):
+        connection.execute(f"ALTER TABLE nodes ADD COLUMN {name} TEXT")
+        connection.commit()
+    return connection
+
+
+def _node_columns(connection:sqlite3.Connection) -> List[str]:
+    return [row[1] for row in connection.execute("PRAGMA table_info(nodes)")]
+
+
+def _missing_node_columns(connection:sqlite3.Connection) -> List[str]:
+    columns = _node_columns(connection)
+    return [name for name in _NODE_COLUMNS_ADDED if name not in columns]
+
+
+################################################################################
+##                                SQLiteWriter                                ##
+################################################################################
+class SQLiteWriter:
+
+    def __init__(self,
+            path:Union[str, pl.Path],
+            flush_every:int=1,
+            flush_interval:float=None,
+            fsync:bool=False,
+            append:bool=True,
+            ):
+        """ Insert records into a log database (same interface as
+            JournalWriter).
+
+        :param path: Database file.
+        :param flush_every: Commit a batch of N records, defaults to 1
+        :param flush_interval: Commit if the last commit is older than
+            'flush_interval' seconds, defaults to None (disabled)
+        :param fsync: synchronous=FULL (a commit survives a power loss),
+            otherwise synchronous=NORMAL (a commit survives a crash of the
+            process), defaults to False
+        :param append: Continue an existing database instead of starting a
+            new one (removing it), defaults to True
+        """
+        if not isinstance(flush_every, int) or flush_every < 1:
+            raise ValueError(
+                f"flush_every='{flush_every}', but only int >= 1 is valid!")
+
+        self.path = pl.Path(path)
+        self.flush_every = flush_every
+        self.flush_interval = flush_interval
+
+        if not append:
+            remove_database(self.path)
+        self._lock = threading.Lock()
+        self._connection = connect(self.path)
+        self._connection.execute(
+            f"PRAGMA synchronous={'FULL' if fsync else 'NORMAL'}")
+        self._batch = {record_type: list() for record_type in _INSERT}
+        self._pending = 0
+        self._last_flush = time.monotonic()
+
+    @property
+    def closed(self) -> bool:
+        return isinstance(self._connection, type(None))
+
+    def write(self, record:Dict[str, Any]) -> None:
+        self.write_many([record])
+
+    def write_many(self, records:Iterable[Dict[str, Any]]) -> None:
+        with self._lock:
+            for record in records:
+                self._batch[record["type"]].append(_row(record))
+                self._pending = self._pending + 1
+            if self._pending >= self.flush_every \
+                or (not isinstance(self.flush_interval, type(None)) \
+                and (time.monotonic() - self._last_flush) \
+                    >= self.flush_interval):
+                self._commit()
+
+    def flush(self) -> None:
+        with self._lock:
+            self._commit()
+
+    def close(self) -> None:
+        with self._lock:
+            if self.closed:
+                return
+            self._commit()
+            self._connection.close()
+            self._connection = None
+
+    def _commit(self) -> None:
+        # vertices before edges (same order as utils.records.add_records)
+        if self._pending > 0:
+            with self._connection:
+                for record_type in [_GRAPH, _CHAPTER, _NODE, _EDGE]:
+                    rows = self._batch[record_type]
+                    if len(rows) > 0:
+                        self._connection.executemany(
+                            _INSERT[record_type], rows)
+                        rows.clear()
+        self._pending = 0
+        self._last_flush = time.monotonic()
+
+
+################################################################################
+##                                SAVE / LOAD                                 ##
+################################################################################
+def remove_database(path:Union[str, pl.Path]) -> None:
+    """ Remove a database together with its WAL files.
+    """
+    path = pl.Path(path)
+    for suffix in ["", "-wal", "-shm"]:
+        pl.Path(str(path) + suffix).unlink(missing_ok=True)
+
+
+def write_sqlite(path:Union[str, pl.Path], records:Iterable[Dict[str, Any]],
+                 batch_size:int=10000) -> None:
+    """ Write records into a new database (replaces an existing one).
+    """
+    writer = SQLiteWriter(path=path, flush_every=batch_size, append=False)
+    try:
+        writer.write_many(records)
+    finally:
+        writer.close()
+
+
+def read_sqlite_records(
+        path:Union[str, pl.Path],
+        nodes:Iterable[Any]=None,
+        chapters:Iterable[Any]=None,
+        time_range:Tuple[float, float]=None,
+        columns:Iterable[str]=None,
+        styles:Iterable[str]=None,
+        where:str=None,
+        parameters:Tuple[Any, ...]=(),
+    ) -> Iterator[Dict[str, Any]]:
+    """ Records of the (sub)graph, same selection as utils.index.select().
+
+    :param where: Additional SQL condition on the 'nodes' table,
+        defaults to None
+    :param parameters: Parameters ('?') of 'where', defaults to ()
+    """
+    conditions, values = list(), list()
+    for name, ids in [("id", nodes), ("chapter_id", chapters)]:
+        if not isinstance(ids, type(None)):
+            ids = [_counter(id) for id in ids]
+            conditions.append(f"{name} IN ({','.join('?'*len(ids))})")
+            values.extend(ids)
+    for name, names in [("column", columns), ("style", styles)]:
+        if not isinstance(names, type(None)):
+            names = list(names)
+            conditions.append(f"{name} IN ({','.join('?'*len(names))})")
+            values.extend(names)
+    if not isinstance(time_range, type(None)):
+        start, end = time_range
+        if not isinstance(start, type(None)):
+            conditions.append("time >= ?")
+            values.append(_time(start))
+        if not isinstance(end, type(None)):
+            conditions.append("time <= ?")
+            values.append(_time(end))
+    by_node = len(conditions) > 0 and not (len(conditions) == 1
+        and not isinstance(chapters, type(None)))
+    if not isinstance(where, type(None)):
+        conditions.append(f"({where})")
+        by_node = True
+
+    connection = connect(path, read_only=True)
+    try:
+        node_query = "SELECT *" \
+            + ", NULL" * len(_missing_node_columns(connection)) + " FROM nodes"
+        edge_query = "SELECT * FROM edges"
+        chapter_query = "SELECT * FROM chapters"
+        if len(conditions) > 0:
+            # selected node IDs (filters use the indexes of 'nodes')
+            connection.execute(
+                "CREATE TEMP TABLE selected (id INTEGER PRIMARY KEY)")
+            connection.execute(
+                f"INSERT INTO temp.selected SELECT id FROM nodes "\
+                f"WHERE {' AND '.join(conditions)}",
+                tuple(values) + tuple(parameters))
+            node_query = node_query + " WHERE id IN temp.selected"
+            edge_query = edge_query + \
+                " WHERE u IN temp.selected AND v IN temp.selected"
+            chapter_conditions = list()
+            if not isinstance(chapters, type(None)):
+                chapter_conditions.append(
+                    f"id IN ({','.join(str(_counter(id)) for id in chapters)})")
+            if by_node:
+                chapter_conditions.append("id IN (SELECT chapter_id FROM "\
+                    "nodes WHERE id IN temp.selected)")
+            if len(chapter_conditions) > 0:
+                chapter_query = chapter_query + \
+                    f" WHERE {' AND '.join(chapter_conditions)}"
+
+        for (graph_time, ) in connection.execute("SELECT time FROM graph"):
+            yield graph_record(time=graph_time)
+        for id, time, style, title, content in \
+                connection.execute(chapter_query + " ORDER BY rowid"):
+            yield chapter_record(
+                chapter_id=ChapterID(id),
+                time=time,
+                title=_loads(title),
+                style=style,
+                content=_loads(content),
+                )
+        for id, chapter_id, column, style, stack, time, title, content, \
+                span, encoding in \
+                connection.execute(node_query + " ORDER BY rowid"):
+            yield node_record(
+                node_id=NodeID(id),
+                time=time,
+                column=column,
+                style=style,
+                stack=bool(stack),
+                chapter_id=ChapterID(chapter_id),
+                content=_loads(content),
+                title=_loads(title),
+                span=_loads(span),
+                encoding=encoding,
+                )
+        for u, v, time, style, title, content in \
+                connection.execute(edge_query + " ORDER BY rowid"):
+            yield edge_record(
+                u=NodeID(u),
+                v=NodeID(v),
+                time=time,
+                style=style,
+                content=_loads(content),
+                title=_loads(title),
+                )
+    finally:
+        connection.close()
+
+
+def read_sqlite(path:Union[str, pl.Path], graph:nx.Graph=None, **kwargs) \
+        -> nx.Graph:
+    """ Log-graph (or the subgraph selected by kwargs, see
+        read_sqlite_records()) of a database.
+    """
+    if isinstance(graph, type(None)):
+        graph = nx.Graph()
+    for record in read_sqlite_records(path, **kwargs):
+        add_record(graph=graph, record=record)
+    return graph
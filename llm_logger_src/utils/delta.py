@@ -0,0 +1,216 @@
+""" Prefix/suffix delta encoding of growing node content.
+
+A node's content is usually the content of a previous node (parent or the
+previous node of the same column) plus a few new lines, thus only the part
+which differs is stored.
+
+    delta (str)
+        └── DELT_<reference NodeID>|<prefix length>|<suffix length>|<middle>
+
+    content = reference[:prefix] + middle + reference[len(reference)-suffix:]
+
+A node holding a delta is marked by metadata 'encoding' = 'delta' (record 
+key 'encoding', see utils.records), the content itself is never inspected, 
+thus any logged string (e.g. one starting with 'DELT_') stays as it is.
+
+Every 'keyframe_every'-th node of a chain stores the full content, which
+bounds the number of deltas applied when the content is rebuilt.
+"""
+import threading
+from collections import OrderedDict
+from typing import Any, Tuple
+import networkx as nx
+
+try:
+    from .ids import NodeID
+except ImportError:
+    from llm_logger_src.utils.ids import NodeID
+
+
+################################################################################
+##                                  CONSTANTS                                 ##
+################################################################################
+_DELTA = "DELT_"
+_SEPARATOR = "|"
+DELTA_REFERENCES = ["parent", "column"]
+DELTA_ENCODING = "delta"
+# recent nodes kept as references (a delta never references an older node)
+DELTA_CACHE_SIZE = 1024
+
+
+################################################################################
+##                                    Delta                                   ##
+################################################################################
+class Delta(str):
+    """ Delta returned by DeltaEncoder.encode() (the caller records 
+        encoding=DELTA_ENCODING).
+    """
+
+
+################################################################################
+##                                   ENCODE                                   ##
+################################################################################
+def common_prefix_length(a:str, b:str) -> int:
+    """ Length of the common prefix (binary search over C-level slice
+        comparisons, faster than a per-character loop).
+    """
+    low, high = 0, min(len(a), len(b))
+    while low < high:
+        mid = (low + high + 1) // 2
+        if a[low:mid] == b[low:mid]:
+            low = mid
+        else:
+            high = mid - 1
+    return low
+
+
+def common_suffix_length(a:str, b:str, limit:int) -> int:
+    """ Length of the common suffix, at most 'limit' characters.
+    """
+    low, high = 0, min(len(a), len(b), limit)
+    while low < high:
+        mid = (low + high + 1) // 2
+        if a[len(a)-mid:len(a)-low] == b[len(b)-mid:len(b)-low]:
+            low = mid
+        else:
+            high = mid - 1
+    return low
+
+
+def encode_delta(reference_id:NodeID, reference:str, content:str) -> str:
+    prefix = common_prefix_length(reference, content)
+    suffix = common_suffix_length(reference, content,
+        limit=min(len(reference), len(content)) - prefix)
+    middle = content[prefix:len(content)-suffix]
+    return Delta(f"{_DELTA}{reference_id}{_SEPARATOR}{prefix}{_SEPARATOR}"\
+        f"{suffix}{_SEPARATOR}{middle}")
+
+
+def delta_encoded(metadata:Any) -> bool:
+    """ Content of the vertex (its metadata) is a delta.
+    """
+    return isinstance(metadata, dict) \
+        and metadata.get("encoding", None) == DELTA_ENCODING
+
+
+def parse_delta(delta:str) -> Tuple[str, int, int, str]:
+    reference_id, prefix, suffix, middle = \
+        delta[len(_DELTA):].split(_SEPARATOR, 3)
+    return reference_id, int(prefix), int(suffix), middle
+
+
+def apply_delta(reference:str, delta:str) -> str:
+    """ Content encoded by the delta (the full content of its reference 
+        node is given).
+    """
+    _, prefix, suffix, middle = parse_delta(delta)
+    return reference[0:prefix] + middle + reference[len(reference)-suffix:]
+
+
+################################################################################
+##                                DeltaEncoder                                ##
+################################################################################
+class DeltaEncoder:
+
+    def __init__(self,
+            keyframe_every:int=32,
+            min_length:int=256,
+            cache_size:int=DELTA_CACHE_SIZE,
+            ):
+        """ Encode content of logged nodes as deltas of previous nodes.
+
+        :param keyframe_every: Maximum length of a delta chain,
+            defaults to 32
+        :param min_length: Shorter content is stored in full, defaults to 256
+        :param cache_size: Number of recent nodes whose full content is kept
+            as a reference (a reference outside of the cache results in full
+            content), defaults to 1024
+        """
+        if not isinstance(keyframe_every, int) or keyframe_every < 1:
+            raise ValueError(
+                f"keyframe_every='{keyframe_every}', but only int >= 1 "\
+                f"is valid!")
+        self.keyframe_every = keyframe_every
+        self.min_length = min_length
+        self.cache_size = cache_size
+        self._lock = threading.Lock()
+        # NodeID -> (full content, depth of the delta chain)
+        self._cache = OrderedDict()
+
+    def encode(self, node_id:NodeID, reference_id:NodeID, content:Any) -> Any:
+        """ Delta of 'content' to the content of 'reference_id', content is
+            returned unchanged if the delta would not be smaller.
+
+        :return: Delta (str subclass) or the unchanged content.
+        """
+        if not isinstance(content, str):
+            return content
+        with self._lock:
+            reference, depth = self._cache.get(reference_id, (None, 0))
+            encoded = content
+            if len(content) >= self.min_length \
+                and isinstance(reference, str) \
+                and depth + 1 < self.keyframe_every:
+                delta = encode_delta(reference_id=reference_id,
+                    reference=reference, content=content)
+                if len(delta) < len(content):
+                    encoded = delta
+            self._cache[node_id] = \
+                (content, depth + 1 if encoded is not content else 0)
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+        return encoded
+
+
+################################################################################
+##                                   DECODE                                   ##
+################################################################################
+def decode_content(graph:nx.Graph, content:Any, content_store:Any=None,
+                   encoded:bool=False) -> Any:
+    """ Rebuild the full content of a node (follows the chain of deltas).
+
+    :param graph: Log-graph containing the reference nodes.
+    :param content: Content of a node (delta, reference or content).
+    :param content_store: ContentStore/ContainerReader resolving references, 
+        defaults to None
+    :param encoded: Content is a delta (see delta_encoded()), 
+        defaults to False
+    :raises RuntimeError: Reference node is missing.
+    """
+    if not isinstance(content_store, type(None)):
+        content = content_store.resolve(content)
+    deltas = list()
+    while encoded:
+        reference_id, _, _, _ = parse_delta(content)
+        deltas.append(content)
+        if not graph.has_node(reference_id):
+            raise RuntimeError(
+                f"reference node='{reference_id}' of a delta is missing!")
+        content = graph.nodes[reference_id]["data"]["content"]
+        encoded = delta_encoded(graph.nodes[reference_id].get("metadata"))
+        if not isinstance(content_store, type(None)):
+            content = content_store.resolve(content)
+    for delta in reversed(deltas):
+        content = apply_delta(reference=content, delta=delta)
+    return content
+
+
+def decode_graph(graph:nx.Graph, content_store:Any=None) -> nx.Graph:
+    """ Replace every delta (and every reference resolved by 
+        'content_store') of the graph by the full content (in-place, the 
+        'data' dicts are replaced, thus a copy() of the graph does not 
+        change the original).
+    """
+    decoded = dict()
+    for vertex_id, vertex_data in graph.nodes(data=True):
+        data = vertex_data.get("data", None)
+        encoded = delta_encoded(vertex_data.get("metadata", None))
+        if isinstance(data, dict) \
+            and (encoded or not isinstance(content_store, type(None))):
+            decoded[vertex_id] = decode_content(graph=graph,
+                content=data["content"], content_store=content_store, 
+                encoded=encoded)
+    for vertex_id, content in decoded.items():
+        graph.nodes[vertex_id]["data"] = \
+            {**graph.nodes[vertex_id]["data"], "content": content}
+    return graph
@@ -0,0 +1,522 @@
+""" Streaming GML writer/reader & incremental checkpoint segments.
+
+The writer emits the blocks of the logger's GML schema record by record, thus
+no copy of the graph is built while saving (nx.write_gml output, readable by
+nx.read_gml). The reader parses the same schema line by line and yields
+records, thus the graph (or columnar tables) is built in a single pass
+without tokenizing the whole file first (as nx.read_gml does).
+
+GML ids are derived from the IDs (NodeID -> 2*counter, ChapterID ->
+2*counter+1), thus they are stable across checkpoint segments.
+
+    <filename>.0000.gml (checkpoint segment 0, whole graph)
+    <filename>.0001.gml (records logged after segment 0)
+        └── node [ id .. label "NODE_.." stub 1 ] (vertex of an earlier
+                segment referenced by an edge of this segment)
+"""
+import pathlib as pl
+import re
+import io
+import sys
+import mmap
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Tuple
+import numpy as np
+import networkx as nx
+from networkx.readwrite.gml import escape, unescape, LIST_START_VALUE
+
+try:
+    from .ids import NodeID, ChapterID, _NODE, _CHAPTER, _EDGE, vertex_key, \
+        vertex_id
+    from .records import _GRAPH, record_attributes, add_record, \
+        graph_record, chapter_record, node_record, edge_record
+    from .columnar import to_columns
+    from .index import IndexBuilder
+except ImportError:
+    from llm_logger_src.utils.ids import NodeID, ChapterID, _NODE, _CHAPTER, \
+        _EDGE, vertex_key, vertex_id
+    from llm_logger_src.utils.records import _GRAPH, record_attributes, \
+        add_record, graph_record, chapter_record, node_record, edge_record
+    from llm_logger_src.utils.columnar import to_columns
+    from llm_logger_src.utils.index import IndexBuilder
+
+
+################################################################################
+##                                  CONSTANTS                                 ##
+################################################################################
+GML_SUFFIX = ".gml"
+_SEGMENT_DIGITS = 4
+_STUB = "stub"
+_MAPPED = "MMAP_"
+_CONTENT_PREFIX = b'content "'
+_INTERN_LENGTH = 16
+
+
+################################################################################
+##                                   gml_id                                   ##
+################################################################################
+def gml_id(vertex_id:str) -> int:
+    """ Integer GML id of a NodeID/ChapterID (stable across segments).
+    """
+    return vertex_key(vertex_id)
+
+
+def gml_label(id:int) -> str:
+    """ NodeID/ChapterID of an integer GML id (inverse of gml_id()).
+    """
+    return vertex_id(id)
+
+
+################################################################################
+##                                 STRINGIZE                                  ##
+################################################################################
+def _stringize(key:str, value:Any, indent:str,
+               stringizer:Callable[[Any], str],
+               in_list:bool=False) -> Iterator[str]:
+    """ Same GML representation as nx.generate_gml() for the value types of
+        the log-graph.
+    """
+    if isinstance(value, bool):
+        yield f"{indent}{key} {1 if value else 0}"
+    elif isinstance(value, int):
+        if value < -(2**31) or value >= 2**31:
+            yield f'{indent}{key} "{value}"'
+        else:
+            yield f"{indent}{key} {value}"
+    elif isinstance(value, float):
+        text = repr(value).upper()
+        if text == repr(float("inf")).upper():
+            text = "+" + text
+        else:
+            epos = text.rfind("E")
+            if epos != -1 and text.find(".", 0, epos) == -1:
+                text = text[:epos] + "." + text[epos:]
+        yield f"{indent}{key} {text}"
+    elif isinstance(value, dict):
+        yield f"{indent}{key} ["
+        for sub_key, sub_value in value.items():
+            yield from _stringize(sub_key, sub_value, indent+"  ", stringizer)
+        yield f"{indent}]"
+    elif isinstance(value, (list, tuple)) and not in_list:
+        if len(value) == 0:
+            yield f'{indent}{key} "{value!r}"'
+        if len(value) == 1:
+            yield f'{indent}{key} "{LIST_START_VALUE}"'
+        for item in value:
+            yield from _stringize(key, item, indent, stringizer, in_list=True)
+    else:
+        value = stringizer(value)
+        if not isinstance(value, str):
+            raise ValueError(f"{value!r} is not a string!")
+        yield f'{indent}{key} "{escape(value)}"'
+
+
+################################################################################
+##                               generate_gml                                 ##
+################################################################################
+def generate_gml(
+        records:Iterable[Dict[str, Any]],
+        stringizer:Callable[[Any], str],
+        stubs:bool=False,
+    ) -> Iterator[str]:
+    """ Lines of a GML file (without newlines) built from records.
+
+    :param records: Records (see utils.records), vertices of an edge must
+        precede the edge (or be in 'known').
+    :param stringizer: Converts non-int/float/dict values into str.
+    :param stubs: An edge to a vertex which is not part of the records (i.e.
+        written by an earlier segment) is preceded by a stub node,
+        defaults to False
+    """
+    yield "graph ["
+    for _, lines in _generate_blocks(records=records, stringizer=stringizer,
+                                     stubs=stubs):
+        yield from lines
+    yield "]"
+
+
+def _generate_blocks(
+        records:Iterable[Dict[str, Any]],
+        stringizer:Callable[[Any], str],
+        stubs:bool=False,
+    ) -> Iterator[Tuple[Dict[str, Any], List[str]]]:
+    """ (record, lines of its GML block) for every record.
+    """
+    written = set()
+    for record in records:
+        record_type = record["type"]
+        attributes = record_attributes(record)
+        lines = list()
+        if record_type in [_NODE, _CHAPTER]:
+            id = gml_id(record["id"])
+            if stubs:
+                written.add(id)
+            lines.append("  node [")
+            lines.append(f"    id {id}")
+            lines.append(f'    label "{escape(str(record["id"]))}"')
+            for key, value in attributes.items():
+                lines.extend(_stringize(key, value, "    ", stringizer))
+            lines.append("  ]")
+        elif record_type == _EDGE:
+            u, v = gml_id(record["u"]), gml_id(record["v"])
+            if stubs:
+                for id, vertex_id in [(u, record["u"]), (v, record["v"])]:
+                    if id not in written:
+                        written.add(id)
+                        lines.append("  node [")
+                        lines.append(f"    id {id}")
+                        lines.append(f'    label "{escape(str(vertex_id))}"')
+                        lines.append(f"    {_STUB} 1")
+                        lines.append("  ]")
+            lines.append("  edge [")
+            lines.append(f"    source {u}")
+            lines.append(f"    target {v}")
+            for key, value in attributes.items():
+                lines.extend(_stringize(key, value, "    ", stringizer))
+            lines.append("  ]")
+        elif record_type == _GRAPH:
+            for key, value in attributes.items():
+                lines.extend(_stringize(key, value, "  ", stringizer))
+        yield record, lines
+
+
+def write_gml(
+        path:pl.Path,
+        records:Iterable[Dict[str, Any]],
+        stringizer:Callable[[Any], str],
+        stubs:bool=False,
+        index:IndexBuilder=None,
+    ) -> int:
+    """ Write records as GML (line by line, constant memory).
+
+    :param index: Collects the byte range of every record (see utils.index),
+        defaults to None
+    :return: Size of the file in bytes.
+    """
+    with open(path, "w", encoding="ascii") as file:
+        file.write("graph [\n")
+        offset = len("graph [\n")
+        for record, lines in _generate_blocks(records=records, 
+                stringizer=stringizer, stubs=stubs):
+            block = "\n".join(lines) + "\n" if len(lines) > 0 else ""
+            file.write(block)
+            # ascii, thus characters == bytes
+            if not isinstance(index, type(None)):
+                index.add(record=record, offset=offset, length=len(block))
+            offset = offset + len(block)
+        file.write("]\n")
+        return offset + len("]\n")
+
+
+################################################################################
+##                                  SEGMENTS                                  ##
+################################################################################
+def segment_path(path:pl.Path, filename:str, segment:int) -> pl.Path:
+    return pl.Path(path,
+        f"{filename}.{str(segment).zfill(_SEGMENT_DIGITS)}{GML_SUFFIX}")
+
+
+def segment_paths(path:pl.Path) -> List[pl.Path]:
+    """ Checkpoint segments of '<stem>.gml' (ordered by segment).
+    """
+    path = pl.Path(path)
+    pattern = re.compile(re.escape(path.stem) \
+        + r"\.(\d{" + str(_SEGMENT_DIGITS) + r",})" + re.escape(GML_SUFFIX))
+    segments = list()
+    if not path.parent.exists():
+        return segments
+    for candidate in path.parent.iterdir():
+        match = pattern.fullmatch(candidate.name)
+        if match:
+            segments.append((int(match.group(1)), candidate))
+    return [candidate for _, candidate in sorted(segments)]
+
+
+def remove_segments(path:pl.Path) -> None:
+    """ Remove the checkpoint segments of '<stem>.gml' (e.g. of an older 
+        run, which would be stitched to the segments of a new one).
+    """
+    for segment in segment_paths(path):
+        segment.unlink(missing_ok=True)
+
+
+def read_segments(paths:Iterable[pl.Path], graph:nx.Graph=None) -> nx.Graph:
+    """ Stitch checkpoint segments into a single log-graph.
+
+    :param paths: Segments in the order they were written.
+    :param graph: Graph to stitch into, defaults to None (new graph)
+    :raises RuntimeError: Edge to a vertex missing in all previous segments.
+    """
+    if isinstance(graph, type(None)):
+        graph = nx.Graph()
+    for path in paths:
+        for record in read_gml_records(path):
+            if record["type"] == _EDGE:
+                for vertex_id in [record["u"], record["v"]]:
+                    if not graph.has_node(vertex_id):
+                        raise RuntimeError(
+                            f"vertex_id='{vertex_id}' referenced by '{path}' "\
+                            f"is missing in the previous segments!")
+            add_record(graph=graph, record=record)
+    return graph
+
+
+################################################################################
+##                                   READER                                   ##
+################################################################################
+class _List(list):
+    """ List created from repeated keys (nx.write_gml list encoding).
+    """
+    pass
+
+
+def _value(text:str) -> Any:
+    if text[0] == '"':
+        text = text[1:-1]
+        if "&" in text:
+            return unescape(text)
+        # columns, styles, types, chapter IDs repeat for every node
+        return sys.intern(text) if len(text) <= _INTERN_LENGTH else text
+    try:
+        return int(text)
+    except ValueError:
+        return float(text)
+
+
+def _set(block:Dict[str, Any], key:str, value:Any) -> None:
+    if value == LIST_START_VALUE:
+        block[key] = _List()
+    elif key not in block:
+        block[key] = value
+    elif isinstance(block[key], _List):
+        block[key].append(value)
+    else:
+        block[key] = _List([block[key], value])
+
+
+def _vertex_record(block:Dict[str, Any], labels:Dict[int, str]) \
+        -> Dict[str, Any]:
+    label = block.get("label", None)
+    labels[block["id"]] = label
+    if block.get(_STUB, 0):
+        return None
+    data = block.get("data", dict())
+    metadata = block.get("metadata", None)
+    if not isinstance(metadata, dict) or "type" not in metadata:
+        raise ValueError(
+            f"node label='{label}' does not follow the log-graph schema!")
+    if metadata["type"] == _NODE:
+        return node_record(
+            node_id=label,
+            time=metadata["time"],
+            column=metadata["column"],
+            style=metadata["style"],
+            stack=metadata["stack"],
+            chapter_id=metadata["chapter_id"],
+            content=data.get("content"),
+            title=data.get("title", ""),
+            span=metadata.get("span"),
+            encoding=metadata.get("encoding"),
+            )
+    elif metadata["type"] == _CHAPTER:
+        return chapter_record(
+            chapter_id=label,
+            time=metadata["time"],
+            title=data.get("title", ""),
+            style=metadata["style"],
+            content=data.get("content"),
+            )
+    raise ValueError(
+        f"node label='{label}' is of unknown type='{metadata['type']}'!")
+
+
+def _edge_record(block:Dict[str, Any], labels:Dict[int, str]) \
+        -> Dict[str, Any]:
+    data = block.get("data", dict())
+    metadata = block.get("metadata", dict())
+    return edge_record(
+        u=labels.get(block["source"], None) or gml_label(block["source"]),
+        v=labels.get(block["target"], None) or gml_label(block["target"]),
+        time=metadata.get("time"),
+        style=metadata.get("style"),
+        content=data.get("content"),
+        title=data.get("title", ""),
+        )
+
+
+def _lazy_lines(file:io.BufferedIOBase) -> Iterator[str]:
+    """ Lines of a binary GML file, string content is replaced by a handle 
+        'MMAP_<offset>_<length>' (the content itself is not decoded).
+    """
+    offset = 0
+    for raw in file:
+        stripped = raw.lstrip()
+        if stripped.startswith(_CONTENT_PREFIX):
+            start = offset + (len(raw) - len(stripped)) + len(_CONTENT_PREFIX)
+            end = offset + len(raw.rstrip()) - 1
+            yield f'content "{_MAPPED}{start}_{end - start}"'
+        else:
+            yield raw.decode("ascii")
+        offset = offset + len(raw)
+
+
+def read_gml_records(path_or_buffer:Any, lazy_content:bool=False) \
+        -> Iterator[Dict[str, Any]]:
+    """ Read a GML file of the log-graph schema (written by LLMLogger.save() 
+        or nx.write_gml) as records, one block at a time.
+
+    :param path_or_buffer: Path to the GML file or a (bytes) file-like object.
+    :param lazy_content: String content is replaced by (offset, length) 
+        handles resolved by MappedContent, defaults to False
+    :raises ValueError: File does not follow the log-graph schema.
+    """
+    if isinstance(path_or_buffer, (str, pl.Path)):
+        file = open(path_or_buffer, "rb" if lazy_content else "r", 
+                    encoding=None if lazy_content else "ascii")
+    elif isinstance(path_or_buffer, io.TextIOBase):
+        if lazy_content:
+            raise ValueError(
+                f"lazy_content=True requires a path or a bytes file-like "\
+                f"object!")
+        file = path_or_buffer
+    elif lazy_content:
+        file = path_or_buffer
+    else:
+        file = io.TextIOWrapper(path_or_buffer, encoding="ascii")
+
+    labels = dict()     # GML id -> label
+    stack = list()      # open blocks [(key, block), ...]
+    try:
+        for line in _lazy_lines(file) if lazy_content else file:
+            line = line.strip()
+            if line == "":
+                continue
+            if line[-1] == "[":
+                stack.append((line[:-1].rstrip(), dict()))
+                continue
+            if line == "]":
+                key, block = stack.pop()
+                if len(stack) == 1:
+                    if key == "node":
+                        record = _vertex_record(block=block, labels=labels)
+                        if not isinstance(record, type(None)):
+                            yield record
+                    elif key == "edge":
+                        yield _edge_record(block=block, labels=labels)
+                    elif key == "metadata":
+                        yield graph_record(time=block.get("time"))
+                elif len(stack) > 1:
+                    _set(stack[-1][1], key, block)
+                continue
+            key, _, value = line.partition(" ")
+            if len(stack) > 1:
+                _set(stack[-1][1], key, _value(value))
+    finally:
+        if isinstance(path_or_buffer, (str, pl.Path)):
+            file.close()
+
+
+def read_gml(path_or_buffer:Any, graph:nx.Graph=None, 
+             lazy_content:bool=False) -> nx.Graph:
+    """ Single pass replacement of nx.read_gml() for the log-graph schema.
+    """
+    if isinstance(graph, type(None)):
+        graph = nx.Graph()
+    for record in read_gml_records(path_or_buffer, lazy_content=lazy_content):
+        add_record(graph=graph, record=record)
+    return graph
+
+
+def read_gml_columns(path_or_buffer:Any) -> Dict[str, np.ndarray]:
+    """ Columnar tables (see utils.columnar) straight from a GML file.
+    """
+    return to_columns(read_gml_records(path_or_buffer))
+
+
+################################################################################
+##                               MappedContent                                ##
+################################################################################
+def valid_mapped_handle(value:Any) -> bool:
+    return isinstance(value, str) and value[0:len(_MAPPED)] == _MAPPED
+
+
+class MappedContent:
+
+    def __init__(self, path_or_buffer:Any, content_store:Any=None):
+        """ Resolve content handles of read_gml(lazy_content=True) from the 
+            memory-mapped file (only the accessed pages are read).
+
+        :param path_or_buffer: The GML file or the io.BytesIO it was read from.
+        :param content_store: Resolves the decoded content further (e.g. 
+            ContentStore of a deduplicated log), defaults to None
+        """
+        self.content_store = content_store
+        if isinstance(path_or_buffer, (str, pl.Path)):
+            self._file = open(path_or_buffer, "rb")
+            self._buffer = mmap.mmap(
+                self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        else:
+            self._file = None
+            self._buffer = path_or_buffer.getbuffer()
+
+    def get(self, handle:str) -> str:
+        offset, length = handle[len(_MAPPED):].split("_")
+        offset, length = int(offset), int(length)
+        text = bytes(self._buffer[offset:offset+length]).decode("ascii")
+        return unescape(text) if "&" in text else text
+
+    def resolve(self, value:Any) -> Any:
+        """ Content of 'value' if it is a handle, otherwise 'value'.
+        """
+        if valid_mapped_handle(value):
+            value = self.get(value)
+        if not isinstance(self.content_store, type(None)):
+            value = self.content_store.resolve(value)
+        return value
+
+    def close(self) -> None:
+        if not isinstance(self._file, type(None)):
+            self._buffer.close()
+            self._file.close()
+
+
+################################################################################
+##                                  BENCHMARK                                 ##
+################################################################################
+if __name__ == "__main__":
+    # python -m llm_logger_src.utils.gml [num_nodes ...]
+    import time
+    import tempfile
+    from llm_logger_src.utils.ids import NodeID, ChapterID
+
+    def synthetic_records(num_nodes:int) -> Iterator[Dict[str, Any]]:
+        yield graph_record(time="0.0")
+        for chapter in range(1, num_nodes // 1000 + 2):
+            yield chapter_record(ChapterID(chapter), time=str(chapter), 
+                                 title=f"chapter {chapter}")
+        for counter in range(1, num_nodes+1):
+            yield node_record(NodeID(counter), time=str(float(counter)), 
+                column=f"column_{counter % 4}", style="default", 
+                stack=False, chapter_id=ChapterID(counter // 1000 + 1), 
+                content=f"message {counter}\n" + "lorem ipsum " * 20)
+        for counter in range(2, num_nodes+1):
+            yield edge_record(NodeID(counter), NodeID(counter-1), 
+                              time=str(float(counter)))
+
+    sizes = [int(size) for size in sys.argv[1:]] or [10000, 100000]
+    with tempfile.TemporaryDirectory() as folder:
+        for num_nodes in sizes:
+            path = pl.Path(folder, f"benchmark_{num_nodes}.gml")
+            write_gml(path=path, records=synthetic_records(num_nodes),
+                      stringizer=str)
+            start = time.perf_counter()
+            graph = read_gml(path)
+            read_gml_time = time.perf_counter() - start
+            start = time.perf_counter()
+            reference = nx.read_gml(path)
+            nx_read_gml_time = time.perf_counter() - start
+            print(f"num_nodes={num_nodes:>8}, "\
+                  f"size={path.stat().st_size/2**20:8.1f} MB, "\
+                  f"read_gml={read_gml_time:7.2f} s, "\
+                  f"nx.read_gml={nx_read_gml_time:7.2f} s, "\
+                  f"speedup={nx_read_gml_time/read_gml_time:5.1f}x, "\
+                  f"equal={nx.utils.graphs_equal(graph, reference)}")
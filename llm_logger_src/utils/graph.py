@@ -3,11 +3,13 @@ import networkx as nx
 
 try:
     from utils.ids import NodeID, ChapterID, EdgeID, _NODE, \
-        _CHAPTER, _EDGE, valid_node_id, valid_chapter_id, edge_id_to_vertex_ids
+        _CHAPTER, _EDGE, valid_node_id, valid_chapter_id, \
+        edge_id_to_vertex_ids, id_counter
     from utils.chapters import get_chapter_ids_with_node_ids
 except ImportError:
     from llm_logger_src.utils.ids import NodeID, ChapterID, EdgeID, _NODE, \
-        _CHAPTER, _EDGE, valid_node_id, valid_chapter_id, edge_id_to_vertex_ids
+        _CHAPTER, _EDGE, valid_node_id, valid_chapter_id, \
+        edge_id_to_vertex_ids, id_counter
     from llm_logger_src.utils.chapters import get_chapter_ids_with_node_ids
         
         
@@ -48,7 +50,7 @@ def get_chapter_ids(graph:nx.Graph) -> List[ChapterID]:
     """
     chapter_ids_with_node_ids = get_chapter_ids_with_node_ids(graph)
     chapter_ids = list(chapter_ids_with_node_ids.keys())
-    chapter_ids.sort()
+    chapter_ids.sort(key=id_counter)
     
     return chapter_ids
 
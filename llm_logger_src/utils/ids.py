@@ -11,9 +11,13 @@ _EDGE = "EDGE_"
 ################################################################################
 ##                              CONSTANTS - PRIVATE                           ##
 ################################################################################
-_ID_LENGTH = 6
+_ID_LENGTH = 6             # minimum number of digits (longer IDs are valid)
 _UNDIRECTED_EDGE = "<->"
 _DIRECTED_EDGE = "-->"
+# counter of the dedicated last chapter (never reached by a real chapter)
+_LAST_COUNTER = 2**63 - 1
+# vertex keys of an edge key (see edge_key())
+_KEY_BITS = 64
 
 ################################################################################
 ##                                   NodeID                                   ##
@@ -26,6 +30,13 @@ class NodeID(str):
             ValueError(f"counter='{counter}', but counter>=0 is is expected!")
         id = _NODE + str(counter).zfill(_ID_LENGTH)
         return super(NodeID, cls).__new__(cls, id)
+    
+    # copy & pickle support (IDs are immutable, re-created from the counter)
+    def __getnewargs__(self):
+        return (int(self[len(_NODE):]), )
+    
+    def __deepcopy__(self, memo):
+        return self
 
 
 ################################################################################
@@ -38,10 +49,17 @@ class ChapterID(str):
         if counter < 0:
             ValueError(f"counter='{counter}', but counter>=0 is is expected!")
         if last:
-            id = _CHAPTER + ("9"*_ID_LENGTH)
+            id = _CHAPTER + str(_LAST_COUNTER)
         else:
             id = _CHAPTER + str(counter).zfill(_ID_LENGTH)
         return super(ChapterID, cls).__new__(cls, id)
+    
+    # copy & pickle support (IDs are immutable, re-created from the counter)
+    def __getnewargs__(self):
+        return (int(self[len(_CHAPTER):]), )
+    
+    def __deepcopy__(self, memo):
+        return self
 
 
 ################################################################################
@@ -50,19 +68,16 @@ class ChapterID(str):
 class EdgeID(str):
     def __new__(cls, vertex_id_0:Union[NodeID, ChapterID], vertex_id_1:Union[NodeID, ChapterID], directed:bool=False):
 
-        if not (valid_node_id(vertex_id_0) or valid_chapter_id(vertex_id_0)):
-            raise ValueError(
-                f"vertex_id_0='{vertex_id_0}' was evaluated as invalid.")
-        if not (valid_node_id(vertex_id_1) or valid_chapter_id(vertex_id_1)):
-            raise ValueError(
-                f"vertex_id_1='{vertex_id_1}' was evaluated as invalid.")
-        if vertex_id_0 == vertex_id_1:
+        # vertex_key() validates both vertices
+        key_0, key_1 = vertex_key(vertex_id_0), vertex_key(vertex_id_1)
+        if key_0 == key_1:
             raise RuntimeError(
                 f"'{vertex_id_0}'=='{vertex_id_1}', "\
                 f"self-loops are not allowed!")
         
-        vertex_ids = [vertex_id_0, vertex_id_1]
-        vertex_ids.sort()
+        # numeric order of the counters
+        vertex_ids = [vertex_id_0, vertex_id_1] if key_0 < key_1 \
+            else [vertex_id_1, vertex_id_0]
         
         # undirected edge
         if directed:
@@ -73,6 +88,66 @@ class EdgeID(str):
         return super(EdgeID, cls).__new__(cls, id)
 
 
+################################################################################
+##                                 INTEGER KEYS                               ##
+################################################################################
+def id_counter(id:Union[NodeID, ChapterID, str]) -> int:
+    """ Counter of a NodeID/ChapterID (numeric order of IDs, which is not the 
+        str order beyond _ID_LENGTH digits).
+
+    :raises ValueError: Neither node nor chapter ID.
+    """
+    # fast path, IDs created by NodeID/ChapterID
+    if type(id) is NodeID:
+        return int(id[len(_NODE):])
+    if type(id) is ChapterID:
+        return int(id[len(_CHAPTER):])
+    for prefix in (_NODE, _CHAPTER):
+        if id.startswith(prefix):
+            digits = id[len(prefix):]
+            if len(digits) >= _ID_LENGTH and digits.isdigit():
+                return int(digits)
+    raise ValueError(f"id='{id}' is neither node nor chapter ID!")
+
+
+def vertex_key(id:Union[NodeID, ChapterID, str]) -> int:
+    """ Integer key of a vertex (2*counter for nodes, 2*counter+1 for 
+        chapters), e.g. the GML id.
+
+    :raises ValueError: Neither node nor chapter ID.
+    """
+    if id.startswith(_CHAPTER):
+        return 2 * id_counter(id) + 1
+    return 2 * id_counter(id)
+
+
+def vertex_id(key:int) -> Union[NodeID, ChapterID]:
+    """ NodeID/ChapterID of a vertex key (inverse of vertex_key()).
+    """
+    if key % 2 == 0:
+        return NodeID(key // 2)
+    return ChapterID(key // 2)
+
+
+def edge_key(vertex_id_0:Union[NodeID, ChapterID, str], 
+             vertex_id_1:Union[NodeID, ChapterID, str]) -> int:
+    """ Integer key of an undirected edge, both vertex keys packed into one 
+        int (the same key for both directions).
+    """
+    key_0, key_1 = vertex_key(vertex_id_0), vertex_key(vertex_id_1)
+    if key_0 > key_1:
+        key_0, key_1 = key_1, key_0
+    return (key_0 << _KEY_BITS) | key_1
+
+
+def edge_vertex_ids(key:int) -> Tuple[Union[NodeID, ChapterID], 
+                                      Union[NodeID, ChapterID]]:
+    """ NodeIDs/ChapterIDs of an edge key (inverse of edge_key()).
+    """
+    return vertex_id(key >> _KEY_BITS), \
+        vertex_id(key & ((1 << _KEY_BITS) - 1))
+
+
 ################################################################################
 ##                                valid_node_id                               ##
 ################################################################################
@@ -82,7 +157,7 @@ def valid_node_id(id:Union[NodeID, str]) -> bool:
     :param id: Node id.
     :raises TypeError: type(id) != ChapterID
     :return: True, if the id is valid, False, if the id is invalid 
-        (wrong type or wrong length)
+        (wrong prefix, less than _ID_LENGTH digits)
     """
     # sanity check
     if not isinstance(id, (NodeID, str)):
@@ -90,8 +165,10 @@ def valid_node_id(id:Union[NodeID, str]) -> bool:
             f"type(id)='{type(id)}', "\
             f"but valid values are [NodeID, str]!")
     
-    return id[0:len(_NODE)] == _NODE \
-                   and len(id) == (len(_NODE)+_ID_LENGTH)
+    if isinstance(id, NodeID):
+        return True
+    return id.startswith(_NODE) and len(id) >= (len(_NODE)+_ID_LENGTH) \
+        and id[len(_NODE):].isdigit()
 
 
 ################################################################################
@@ -103,7 +180,7 @@ def valid_chapter_id(id:Union[ChapterID, str]) -> bool:
     :param id: Chapter id.
     :raises TypeError: type(id) != ChapterID
     :return: True, if the id is valid, False, if the id is invalid 
-        (wrong type or wrong length)
+        (wrong prefix, less than _ID_LENGTH digits)
     """
     # sanity check
     if not isinstance(id, (ChapterID, str)):
@@ -111,8 +188,10 @@ def valid_chapter_id(id:Union[ChapterID, str]) -> bool:
             f"type(id)='{type(id)}', "\
             f"but valid value is ChapterID or str!")
     
-    return id[0:len(_CHAPTER)] == _CHAPTER \
-                   and len(id) == (len(_CHAPTER)+_ID_LENGTH)
+    if isinstance(id, ChapterID):
+        return True
+    return id.startswith(_CHAPTER) and len(id) >= (len(_CHAPTER)+_ID_LENGTH) \
+        and id[len(_CHAPTER):].isdigit()
 
 
 ################################################################################
@@ -0,0 +1,315 @@
+""" Sidecar index of a log file (random access by node, chapter, time range).
+
+    <filename>.gml.idx / <filename>.journal.idx (numpy .npz)
+        ├── type : int8 (1 chapter, 2 node, 3 edge, 0 graph)
+        ├── id : int64 counter of the NodeID/ChapterID (edges: u)
+        ├── ref : int64 counter of the chapter (nodes) / of v (edges), -1 else
+        ├── column : int32 code of the column (nodes), -1 else
+        ├── style : int32 code of the style, -1 for the graph
+        ├── time : int64 nanoseconds since the epoch (NO_TIME if missing)
+        ├── offset, length : int64 byte range of the record in the log file
+        ├── columns, styles : names of the column & style codes (str)
+        └── size : int64 (1,) size of the log file covered by the index
+
+A filtered load selects the entries with numpy, then reads and parses only
+the byte ranges of the selected records (see select() for the semantics of
+the filters). A journal may grow beyond 'size' (crash, still running), the
+records after 'size' are scanned.
+"""
+import pathlib as pl
+from typing import Any, Dict, Iterable, Iterator, List, Tuple
+import numpy as np
+
+try:
+    from .ids import _NODE, _CHAPTER, _EDGE, id_counter
+    from .records import _GRAPH, _RECORD_ORDER
+    from .columnar import _Codes, _time
+    from .clock import NO_TIME
+except ImportError:
+    from llm_logger_src.utils.ids import _NODE, _CHAPTER, _EDGE, id_counter
+    from llm_logger_src.utils.records import _GRAPH, _RECORD_ORDER
+    from llm_logger_src.utils.columnar import _Codes, _time
+    from llm_logger_src.utils.clock import NO_TIME
+
+
+################################################################################
+##                                  CONSTANTS                                 ##
+################################################################################
+INDEX_SUFFIX = ".idx"
+_FIELDS = {
+    "type": np.int8,
+    "id": np.int64,
+    "ref": np.int64,
+    "column": np.int32,
+    "style": np.int32,
+    "time": np.int64,
+    "offset": np.int64,
+    "length": np.int64,
+    }
+
+
+################################################################################
+##                                  HELPERS                                   ##
+################################################################################
+def index_path(path:pl.Path) -> pl.Path:
+    """ '<path>.idx' (e.g. 'run.gml' -> 'run.gml.idx').
+    """
+    path = pl.Path(path)
+    return path.with_name(path.name + INDEX_SUFFIX)
+
+
+def _counter(vertex_id:Any) -> int:
+    """ Counter of a NodeID/ChapterID (an int is returned unchanged).
+    """
+    if isinstance(vertex_id, (int, np.integer)):
+        return int(vertex_id)
+    return id_counter(vertex_id)
+
+
+################################################################################
+##                                IndexBuilder                                ##
+################################################################################
+class IndexBuilder:
+
+    def __init__(self):
+        """ Collect index entries while a log file is written.
+        """
+        self._columns = _Codes()
+        self._styles = _Codes()
+        self._entries = {key: list() for key in _FIELDS}
+
+    def __len__(self) -> int:
+        return len(self._entries["type"])
+
+    def add(self, record:Dict[str, Any], offset:int, length:int) -> None:
+        """ Entry of a record stored at bytes [offset, offset+length).
+        """
+        record_type = record["type"]
+        id, ref, column, style = -1, -1, -1, -1
+        if record_type == _NODE:
+            id = _counter(record["id"])
+            ref = _counter(record["chapter_id"])
+            column = self._columns(record["column"])
+        elif record_type == _CHAPTER:
+            id = _counter(record["id"])
+        elif record_type == _EDGE:
+            id, ref = _counter(record["u"]), _counter(record["v"])
+        if record_type != _GRAPH:
+            style = self._styles(record["style"])
+        entries = self._entries
+        entries["type"].append(_RECORD_ORDER[record_type])
+        entries["id"].append(id)
+        entries["ref"].append(ref)
+        entries["column"].append(column)
+        entries["style"].append(style)
+        entries["time"].append(_time(record.get("time")))
+        entries["offset"].append(offset)
+        entries["length"].append(length)
+
+    def extend(self, index:Dict[str, np.ndarray]) -> None:
+        """ Continue an index read by read_index().
+        """
+        codes = dict(
+            column=np.array([self._columns(name) for name 
+                in index["columns"].tolist()] + [-1], dtype=np.int32),
+            style=np.array([self._styles(name) for name 
+                in index["styles"].tolist()] + [-1], dtype=np.int32),
+            )
+        for key in _FIELDS:
+            values = index[key]
+            if key in codes:
+                values = codes[key][values]
+            self._entries[key].extend(values.tolist())
+
+    def arrays(self, size:int) -> Dict[str, np.ndarray]:
+        arrays = {key: np.array(values, dtype=_FIELDS[key])
+                  for key, values in self._entries.items()}
+        arrays["columns"] = np.array(self._columns.names, dtype=np.str_)
+        arrays["styles"] = np.array(self._styles.names, dtype=np.str_)
+        arrays["size"] = np.array([size], dtype=np.int64)
+        return arrays
+
+    def write(self, path:pl.Path, size:int) -> None:
+        write_index(path=path, arrays=self.arrays(size=size))
+
+
+################################################################################
+##                                 SAVE / LOAD                                ##
+################################################################################
+def write_index(path:pl.Path, arrays:Dict[str, np.ndarray]) -> None:
+    # np.savez() appends '.npz' to a path without that suffix
+    with open(path, "wb") as file:
+        np.savez(file, **arrays)
+
+
+def read_index(path:pl.Path) -> Dict[str, np.ndarray]:
+    with np.load(path, allow_pickle=False) as file:
+        return {key: file[key] for key in file.files}
+
+
+def valid_index(index:Dict[str, np.ndarray], path:pl.Path,
+                growing:bool=False) -> bool:
+    """ Index covers the log file (a 'growing' file may be larger), an index 
+        with float seconds (older version) is not valid.
+    """
+    if index["time"].dtype != _FIELDS["time"]:
+        return False
+    size, file_size = int(index["size"][0]), pl.Path(path).stat().st_size
+    return size <= file_size if growing else size == file_size
+
+
+################################################################################
+##                                   select                                   ##
+################################################################################
+def select(
+        index:Dict[str, np.ndarray],
+        nodes:Iterable[Any]=None,
+        chapters:Iterable[Any]=None,
+        time_range:Tuple[float, float]=None,
+        columns:Iterable[str]=None,
+        styles:Iterable[str]=None,
+    ) -> np.ndarray:
+    """ Mask of the index entries matching the filters (None = no filter).
+
+        nodes : node is one of the NodeIDs and in one of 'chapters',
+                its time is within 'time_range' (inclusive, None is open, 
+                int nanoseconds or float seconds, see utils.clock)
+                and its column/style is one of 'columns'/'styles'
+        chapters : chapter is one of 'chapters' and contains a selected
+                node (any chapter if only 'chapters' is filtered)
+        edges : both nodes are selected
+        graph : always
+
+    :param nodes: NodeIDs (or counters), defaults to None
+    :param chapters: ChapterIDs (or counters), defaults to None
+    :param time_range: (start, end) timestamps (int nanoseconds or float 
+        seconds), defaults to None
+    :param columns: Column names, defaults to None
+    :param styles: Style names, defaults to None
+    :return: Boolean mask over the entries.
+    """
+    types, ids, refs = index["type"], index["id"], index["ref"]
+    is_node = types == _RECORD_ORDER[_NODE]
+    is_chapter = types == _RECORD_ORDER[_CHAPTER]
+    is_edge = types == _RECORD_ORDER[_EDGE]
+
+    selected = is_node.copy()
+    if not isinstance(nodes, type(None)):
+        selected &= np.isin(ids, [_counter(id) for id in nodes])
+    if not isinstance(chapters, type(None)):
+        selected &= np.isin(refs, [_counter(id) for id in chapters])
+    if not isinstance(time_range, type(None)):
+        start, end = time_range
+        selected &= index["time"] != NO_TIME
+        if not isinstance(start, type(None)):
+            selected &= index["time"] >= _time(start)
+        if not isinstance(end, type(None)):
+            selected &= index["time"] <= _time(end)
+    for key, names in [("column", columns), ("style", styles)]:
+        if not isinstance(names, type(None)):
+            codes = index[key+"s"].tolist()
+            codes = [codes.index(name) for name in names if name in codes]
+            selected &= np.isin(index[key], codes)
+
+    node_ids = ids[selected]
+    mask = selected.copy()
+    mask |= is_edge & np.isin(ids, node_ids) & np.isin(refs, node_ids)
+    chapter_mask = is_chapter.copy()
+    if not isinstance(chapters, type(None)):
+        chapter_mask &= np.isin(ids, [_counter(id) for id in chapters])
+    if not (isinstance(nodes, type(None)) and isinstance(time_range, type(None))
+            and isinstance(columns, type(None))
+            and isinstance(styles, type(None))):
+        chapter_mask &= np.isin(ids, refs[selected])
+    mask |= chapter_mask
+    mask |= types == _RECORD_ORDER[_GRAPH]
+    return mask
+
+
+def filter_records(
+        records:Iterable[Dict[str, Any]],
+        nodes:Iterable[Any]=None,
+        chapters:Iterable[Any]=None,
+        time_range:Tuple[float, float]=None,
+        columns:Iterable[str]=None,
+        styles:Iterable[str]=None,
+    ) -> Iterator[Dict[str, Any]]:
+    """ Same selection as select() over records (log file without an index,
+        or the part of a journal after the index), in a single pass.
+    """
+    nodes = None if isinstance(nodes, type(None)) \
+        else set(_counter(id) for id in nodes)
+    chapters = None if isinstance(chapters, type(None)) \
+        else set(_counter(id) for id in chapters)
+    columns = None if isinstance(columns, type(None)) else set(columns)
+    styles = None if isinstance(styles, type(None)) else set(styles)
+    start, end = (None, None) if isinstance(time_range, type(None)) \
+        else [None if isinstance(value, type(None)) else _time(value) 
+              for value in time_range]
+    by_node = not (isinstance(nodes, type(None))
+        and isinstance(time_range, type(None)) and isinstance(columns, type(None))
+        and isinstance(styles, type(None)))
+
+    selected = set()    # counters of the selected nodes
+    pending = dict()    # chapter counter -> record (waits for its first node)
+    for record in records:
+        record_type = record["type"]
+        if record_type == _NODE:
+            id, chapter = _counter(record["id"]), _counter(record["chapter_id"])
+            time = _time(record.get("time"))
+            if (isinstance(nodes, type(None)) or id in nodes) \
+                and (isinstance(chapters, type(None)) or chapter in chapters) \
+                and (isinstance(time_range, type(None)) or time != NO_TIME) \
+                and (isinstance(start, type(None)) or time >= start) \
+                and (isinstance(end, type(None)) or time <= end) \
+                and (isinstance(columns, type(None)) \
+                    or record["column"] in columns) \
+                and (isinstance(styles, type(None)) \
+                    or record["style"] in styles):
+                selected.add(id)
+                if chapter in pending:
+                    yield pending.pop(chapter)
+                yield record
+        elif record_type == _EDGE:
+            if _counter(record["u"]) in selected \
+                and _counter(record["v"]) in selected:
+                yield record
+        elif record_type == _CHAPTER:
+            id = _counter(record["id"])
+            if isinstance(chapters, type(None)) or id in chapters:
+                if by_node:
+                    pending[id] = record
+                else:
+                    yield record
+        elif record_type == _GRAPH:
+            yield record
+
+
+################################################################################
+##                                  ranges                                    ##
+################################################################################
+def ranges(index:Dict[str, np.ndarray], mask:np.ndarray) \
+        -> List[Tuple[int, int]]:
+    """ Byte ranges [(offset, length), ...] of the selected entries (in file
+        order, adjacent ranges are merged into one read).
+    """
+    offsets, lengths = index["offset"][mask], index["length"][mask]
+    order = np.argsort(offsets, kind="stable")
+    offsets, lengths = offsets[order].tolist(), lengths[order].tolist()
+    merged = list()
+    for offset, length in zip(offsets, lengths):
+        if len(merged) > 0 and merged[-1][0] + merged[-1][1] == offset:
+            merged[-1][1] = merged[-1][1] + length
+        else:
+            merged.append([offset, length])
+    return [(offset, length) for offset, length in merged]
+
+
+def read_ranges(path:pl.Path, byte_ranges:Iterable[Tuple[int, int]]) \
+        -> bytes:
+    with open(path, "rb") as file:
+        chunks = list()
+        for offset, length in byte_ranges:
+            file.seek(offset)
+            chunks.append(file.read(length))
+    return b"".join(chunks)
@@ -0,0 +1,219 @@
+""" Append-only journal of log-graph records.
+
+Every record is written as one line of compact JSON, so a single LLMLogger.log()
+costs one serialization and one buffered write regardless of the run length.
+A crash loses at most the records that were not flushed yet, and a partially
+written last line is ignored on replay.
+"""
+import pathlib as pl
+import json
+import time
+import io
+import os
+from typing import Any, Dict, Iterable, Iterator, Tuple, Union
+import networkx as nx
+
+try:
+    from .records import add_record
+    from .index import IndexBuilder, index_path, read_index, valid_index
+except ImportError:
+    from llm_logger_src.utils.records import add_record
+    from llm_logger_src.utils.index import IndexBuilder, index_path, \
+        read_index, valid_index
+
+
+################################################################################
+##                                  CONSTANTS                                 ##
+################################################################################
+JOURNAL_SUFFIX = ".journal"
+
+
+################################################################################
+##                                JournalWriter                               ##
+################################################################################
+class JournalWriter:
+
+    def __init__(self,
+            path:Union[str, pl.Path],
+            flush_every:int=1,
+            flush_interval:float=None,
+            fsync:bool=False,
+            append:bool=True,
+            index:bool=False,
+            ):
+        """ Append records to a journal file.
+
+        :param path: Journal file.
+        :param flush_every: Flush after every N records, defaults to 1
+        :param flush_interval: Flush if the last flush is older than
+            'flush_interval' seconds, defaults to None (disabled)
+        :param fsync: Force the OS to write flushed data to the disk,
+            defaults to False
+        :param append: Continue an existing journal instead of starting a new 
+            one (truncating it), defaults to True
+        :param index: Keep the byte range of every record and write the 
+            sidecar index '<path>.idx' on close() (see utils.index), 
+            defaults to False
+        """
+        if not isinstance(flush_every, int) or flush_every < 1:
+            raise ValueError(
+                f"flush_every='{flush_every}', but only int >= 1 is valid!")
+
+        self.path = pl.Path(path)
+        self.flush_every = flush_every
+        self.flush_interval = flush_interval
+        self.fsync = fsync
+
+        self._index = None
+        self._offset = 0    # size of the journal in bytes
+        if append and self.path.exists():
+            self._offset = self.path.stat().st_size
+        if index:
+            if append and self.path.exists():
+                self._index, self._offset = index_journal(self.path)
+            else:
+                self._index = IndexBuilder()
+
+        self._file = open(self.path, "a" if append else "w", encoding="utf-8")
+        self._pending = 0
+        self._last_flush = time.monotonic()
+
+    @property
+    def closed(self) -> bool:
+        return self._file.closed
+
+    @property
+    def size(self) -> int:
+        """ Bytes written to the journal (flushed or not).
+        """
+        return self._offset
+
+    def write(self, record:Dict[str, Any]) -> None:
+        line = json.dumps(record, separators=(",", ":"), default=str)
+        self._file.write(line + "\n")
+        self._add_to_index(record=record, line=line)
+        self._pending = self._pending + 1
+        self._maybe_flush()
+
+    def write_many(self, records:Iterable[Dict[str, Any]]) -> None:
+        records = list(records)
+        lines = [json.dumps(record, separators=(",", ":"), default=str)
+                 for record in records]
+        if len(lines) == 0:
+            return
+        self._file.write("\n".join(lines) + "\n")
+        for record, line in zip(records, lines):
+            self._add_to_index(record=record, line=line)
+        self._pending = self._pending + len(lines)
+        self._maybe_flush()
+
+    def flush(self) -> None:
+        self._file.flush()
+        if self.fsync:
+            os.fsync(self._file.fileno())
+        self._pending = 0
+        self._last_flush = time.monotonic()
+
+    def write_index(self) -> None:
+        """ Write the sidecar index of the records written so far (records 
+            written later are scanned by a filtered load).
+        """
+        if isinstance(self._index, type(None)):
+            return
+        self.flush()
+        self._index.write(path=index_path(self.path), size=self._offset)
+
+    def close(self) -> None:
+        if self._file.closed:
+            return
+        self.write_index()
+        self.flush()
+        self._file.close()
+
+    def _add_to_index(self, record:Dict[str, Any], line:str) -> None:
+        # json.dumps() escapes non-ASCII characters, thus characters == bytes
+        if not isinstance(self._index, type(None)):
+            self._index.add(record=record, offset=self._offset, 
+                            length=len(line)+1)
+        self._offset = self._offset + len(line) + 1
+
+    def _maybe_flush(self) -> None:
+        if self._pending >= self.flush_every:
+            self.flush()
+        elif not isinstance(self.flush_interval, type(None)) \
+            and (time.monotonic() - self._last_flush) >= self.flush_interval:
+            self.flush()
+
+
+################################################################################
+##                                read_journal                                ##
+################################################################################
+def read_journal(path_or_buffer:Any) -> Iterator[Dict[str, Any]]:
+    """ Read records from a journal (one record at a time).
+
+    :param path_or_buffer: Path to the journal or a (bytes) file-like object.
+    :return: Generator of records, a truncated last line is skipped.
+    """
+    if isinstance(path_or_buffer, (str, pl.Path)):
+        file = open(path_or_buffer, "r", encoding="utf-8")
+    elif isinstance(path_or_buffer, io.TextIOBase):
+        file = path_or_buffer
+    else:
+        file = io.TextIOWrapper(path_or_buffer, encoding="utf-8")
+
+    try:
+        for line in file:
+            if not line.endswith("\n"):
+                # partially written record (e.g. crash during write)
+                break
+            line = line.strip()
+            if line == "":
+                continue
+            yield json.loads(line)
+    finally:
+        if isinstance(path_or_buffer, (str, pl.Path)):
+            file.close()
+
+
+################################################################################
+##                               index_journal                                ##
+################################################################################
+def index_journal(path:pl.Path) -> Tuple[IndexBuilder, int]:
+    """ Index of an existing journal (continues its sidecar index if valid).
+
+    :return: Index and the size of the indexed part of the journal.
+    """
+    index, offset = IndexBuilder(), 0
+    if index_path(path).exists():
+        arrays = read_index(index_path(path))
+        if valid_index(arrays, path=path, growing=True):
+            index.extend(arrays)
+            offset = int(arrays["size"][0])
+    with open(path, "rb") as file:
+        file.seek(offset)
+        for line in file:
+            if not line.endswith(b"\n"):
+                break
+            if line.strip() != b"":
+                index.add(record=json.loads(line), offset=offset, 
+                          length=len(line))
+            offset = offset + len(line)
+    return index, offset
+
+
+################################################################################
+##                               replay_journal                               ##
+################################################################################
+def replay_journal(path_or_buffer:Any, graph:nx.Graph=None) -> nx.Graph:
+    """ Rebuild the log-graph from a journal.
+
+    :param path_or_buffer: Path to the journal or a (bytes) file-like object.
+    :param graph: Graph to replay the journal into, defaults to None
+        (new graph)
+    :return: Graph with the same structure as LLMLogger.graph.
+    """
+    if isinstance(graph, type(None)):
+        graph = nx.Graph()
+    for record in read_journal(path_or_buffer):
+        add_record(graph=graph, record=record)
+    return graph
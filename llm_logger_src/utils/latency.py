@@ -0,0 +1,345 @@
+""" Latency analysis of the log-graph (critical path, busy/idle time, gaps).
+
+Every node is an interval [start, end] in nanoseconds, a timed node (see
+utils.spans) spans its call, any other node is an instant (start = end =
+time). Nodes depend on earlier nodes:
+
+    relates_to edge : the node waits for the related (older) node, a node
+                      related to several nodes waits for the last to end
+    no relation     : the node waits for the node which ended last before it
+                      started (e.g. the previous chapter)
+
+The critical path is the chain of dependencies which ends with the last node
+to end, its 'wait' is the time between the end of the dependency and the
+start of the node (queueing, idle agents). The arrays are built in a single
+pass over the records, the analysis itself is vectorized (numpy/pandas).
+
+    tables = analyze_latency(graph)
+    tables["critical_path"]     # node_id, column, chapter_id, start, end,
+                                # duration, wait, dependency
+    tables["columns"]           # busy, idle, utilization per column
+    tables["chapters"]          # wall time per chapter
+    tables["gaps"]              # gap between related nodes
+"""
+from typing import Any, Dict, Iterable
+import numpy as np
+import pandas as pd
+import networkx as nx
+
+try:
+    from .ids import _NODE, _CHAPTER, _EDGE, id_counter
+    from .clock import timestamp_ns, NO_TIME
+    from .records import iter_records
+except ImportError:
+    from llm_logger_src.utils.ids import _NODE, _CHAPTER, _EDGE, id_counter
+    from llm_logger_src.utils.clock import timestamp_ns, NO_TIME
+    from llm_logger_src.utils.records import iter_records
+
+
+################################################################################
+##                                  CONSTANTS                                 ##
+################################################################################
+# dependency of a node on the critical path
+RELATES_TO = "relates_to"
+PRECEDES = "precedes"
+
+
+################################################################################
+##                                   ARRAYS                                   ##
+################################################################################
+def latency_arrays(records:Iterable[Dict[str, Any]]) -> Dict[str, np.ndarray]:
+    """ Intervals & dependencies of the nodes (see utils.records).
+
+    :return: Arrays of the nodes (ordered by NodeID)
+        node_id, node_key (NodeIDs), node_chapter, node_chapter_key 
+        (ChapterIDs), node_column (code of 'columns'), node_start, node_end, 
+        node_timed, node_parent (index of the dependency by relation, -1 if 
+        none), chapter_id, chapter_key, chapter_time, chapter_title, 
+        edge_parent, edge_child (indices of related nodes) and columns.
+    """
+    # one list per field (ints & str are not tracked by the garbage 
+    # collector, tuples per record would be)
+    node_key, chapter_key, column, start, end, timed = \
+        list(), list(), list(), list(), list(), list()
+    chapter_records, u, v = list(), list(), list()
+    for record in records:
+        record_type = record["type"]
+        if record_type == _NODE:
+            node_key.append(record["id"])
+            chapter_key.append(record["chapter_id"])
+            column.append(record["column"])
+            span = record.get("span", None)
+            if isinstance(span, dict):
+                start.append(int(span["start"]))
+                end.append(int(span["end"]))
+                timed.append(True)
+            else:
+                time = timestamp_ns(record["time"])
+                start.append(time)
+                end.append(time)
+                timed.append(False)
+        elif record_type == _EDGE:
+            u.append(record["u"])
+            v.append(record["v"])
+        elif record_type == _CHAPTER:
+            chapter_records.append(record)
+
+    # nodes in the order of their NodeIDs
+    node_key = np.array(node_key, dtype=object)
+    chapter_key = np.array(chapter_key, dtype=object)
+    node_id = np.fromiter((id_counter(id) for id in node_key), 
+                          dtype=np.int64, count=len(node_key))
+    node_order = np.argsort(node_id, kind="stable")
+    # counters of the (few) distinct chapters, codes of the columns
+    chapter_code, chapter_keys = pd.factorize(chapter_key)
+    chapter_counters = np.array([id_counter(id) for id in chapter_keys], 
+                                dtype=np.int64)
+    column_code, columns = pd.factorize(np.array(column, dtype=object))
+    arrays = dict(
+        node_id=node_id[node_order],
+        node_key=node_key[node_order],
+        node_chapter=chapter_counters[chapter_code][node_order],
+        node_chapter_key=chapter_key[node_order],
+        node_column=column_code.astype(np.int32)[node_order],
+        node_start=np.array(start, dtype=np.int64)[node_order],
+        node_end=np.array(end, dtype=np.int64)[node_order],
+        node_timed=np.array(timed, dtype=np.bool_)[node_order],
+        )
+    # nodes without time (e.g. records of a foreign tool) are instants at 0
+    for key in ["node_start", "node_end"]:
+        arrays[key][arrays[key] == NO_TIME] = 0
+    chapter_id = np.array([id_counter(record["id"]) 
+                           for record in chapter_records], dtype=np.int64)
+    order = np.argsort(chapter_id, kind="stable")
+    arrays["chapter_id"] = chapter_id[order]
+    arrays["chapter_key"] = np.array(
+        [record["id"] for record in chapter_records], dtype=object)[order]
+    arrays["chapter_time"] = np.array(
+        [timestamp_ns(record["time"]) for record in chapter_records], 
+        dtype=np.int64)[order]
+    arrays["chapter_title"] = np.array(
+        [record.get("title", "") for record in chapter_records], 
+        dtype=object)[order]
+    arrays["columns"] = np.array(columns, dtype=np.str_)
+
+    # related nodes (an edge to a vertex which is not a node is skipped)
+    sorted_position = np.empty(len(node_id), dtype=np.int64)
+    sorted_position[node_order] = np.arange(len(node_id), dtype=np.int64)
+    position = dict(zip(node_key.tolist(), range(len(node_key))))
+    u = np.fromiter((position.get(id, -1) for id in u), dtype=np.int64, 
+                    count=len(u))
+    v = np.fromiter((position.get(id, -1) for id in v), dtype=np.int64, 
+                    count=len(v))
+    found = (u >= 0) & (v >= 0)
+    u, v = sorted_position[u[found]], sorted_position[v[found]]
+    # the related (parent) node is the older one (smaller NodeID)
+    arrays["edge_parent"] = np.minimum(u, v)
+    arrays["edge_child"] = np.maximum(u, v)
+    arrays["node_parent"] = _parents(arrays)
+    return arrays
+
+
+def _parents(arrays:Dict[str, np.ndarray]) -> np.ndarray:
+    """ Related node of every node which ended last (-1 if none).
+    """
+    parents = np.full(len(arrays["node_id"]), -1, dtype=np.int64)
+    parent, child = arrays["edge_parent"], arrays["edge_child"]
+    mask = parent != child
+    parent, child = parent[mask], child[mask]
+    if len(child) == 0:
+        return parents
+    # order by child, then by the end of the parent (last one wins)
+    order = np.lexsort((arrays["node_end"][parent], child))
+    parent, child = parent[order], child[order]
+    last = np.ones(len(child), dtype=np.bool_)
+    last[:-1] = child[1:] != child[:-1]
+    parents[child[last]] = parent[last]
+    return parents
+
+
+################################################################################
+##                                CRITICAL PATH                               ##
+################################################################################
+def dependencies(arrays:Dict[str, np.ndarray]):
+    """ Dependency of every node (index, -1 if none) and its kind.
+
+    :return: dependency, by relation (bool, False is by time)
+    """
+    start, end = arrays["node_start"], arrays["node_end"]
+    dependency = arrays["node_parent"].copy()
+    related = dependency >= 0
+    if len(end) == 0:
+        return dependency, related
+    # node which ended last strictly before the start
+    by_end = np.argsort(end, kind="stable")
+    position = np.searchsorted(end[by_end], start, side="left") - 1
+    preceding = np.where(position >= 0, by_end[np.maximum(position, 0)], -1)
+    dependency[~related] = preceding[~related]
+    return dependency, related
+
+
+def critical_path(arrays:Dict[str, np.ndarray]) -> np.ndarray:
+    """ Indices of the nodes on the critical path (first to last).
+    """
+    if len(arrays["node_id"]) == 0:
+        return np.zeros(0, dtype=np.int64)
+    dependency, _ = dependencies(arrays)
+    # last node to end (the larger NodeID wins a tie)
+    end = arrays["node_end"]
+    index = int(np.flatnonzero(end == end.max())[-1])
+    path, visited = list(), np.zeros(len(end), dtype=np.bool_)
+    while index >= 0 and not visited[index]:
+        visited[index] = True
+        path.append(index)
+        index = int(dependency[index])
+    return np.array(path[::-1], dtype=np.int64)
+
+
+################################################################################
+##                                   TABLES                                   ##
+################################################################################
+def critical_path_table(arrays:Dict[str, np.ndarray]) -> pd.DataFrame:
+    """ Nodes on the critical path, the 'wait' of the first node is 0.
+    """
+    path = critical_path(arrays)
+    dependency, related = dependencies(arrays)
+    start, end = arrays["node_start"][path], arrays["node_end"][path]
+    wait = np.zeros(len(path), dtype=np.int64)
+    if len(path) > 1:
+        wait[1:] = start[1:] - arrays["node_end"][path[:-1]]
+    kind = np.where(related[path], RELATES_TO, PRECEDES)
+    if len(path) > 0:
+        kind[0] = ""
+    return pd.DataFrame(dict(
+        node_id=arrays["node_key"][path],
+        column=arrays["columns"][arrays["node_column"][path]] \
+            if len(arrays["columns"]) > 0 else np.zeros(0, dtype=np.str_),
+        chapter_id=arrays["node_chapter_key"][path],
+        start=start,
+        end=end,
+        duration=end - start,
+        wait=wait,
+        dependency=kind,
+        ))
+
+
+def column_table(arrays:Dict[str, np.ndarray]) -> pd.DataFrame:
+    """ Busy time (union of the node intervals) & idle time (within the
+        first start and the last end) per column.
+    """
+    rows = list()
+    for code, column in enumerate(arrays["columns"].tolist()):
+        mask = arrays["node_column"] == code
+        start, end = arrays["node_start"][mask], arrays["node_end"][mask]
+        order = np.argsort(start, kind="stable")
+        start, end = start[order], end[order]
+        # merge overlapping intervals (concurrent calls of a column)
+        reach = np.maximum.accumulate(end)
+        first = np.ones(len(start), dtype=np.bool_)
+        first[1:] = start[1:] > reach[:-1]
+        merged_end = np.maximum.reduceat(end, np.flatnonzero(first))
+        busy = int((merged_end - start[first]).sum())
+        active = int(end.max() - start.min())
+        rows.append(dict(
+            column=column,
+            nodes=int(mask.sum()),
+            timed=int(arrays["node_timed"][mask].sum()),
+            first=int(start.min()),
+            last=int(end.max()),
+            busy=busy,
+            idle=active - busy,
+            utilization=busy / active if active > 0 else np.nan,
+            ))
+    return pd.DataFrame(rows, columns=["column", "nodes", "timed", "first",
+        "last", "busy", "idle", "utilization"])
+
+
+def chapter_table(arrays:Dict[str, np.ndarray]) -> pd.DataFrame:
+    """ Wall time per chapter, from the opening of the chapter (or its first
+        node) to the end of its last node (<NA> if the chapter has neither a
+        time nor nodes, e.g. START/END of LLMLogParser).
+    """
+    # nodes grouped by chapter
+    order = np.argsort(arrays["node_chapter"], kind="stable")
+    chapter = arrays["node_chapter"][order]
+    start, end = arrays["node_start"][order], arrays["node_end"][order]
+    ids, offsets, counts = np.unique(chapter, return_index=True, 
+                                     return_counts=True)
+    grouped = dict()
+    if len(ids) > 0:
+        for id, key, count, first, last, busy in zip(ids.tolist(), 
+                arrays["node_chapter_key"][order][offsets], counts.tolist(), 
+                np.minimum.reduceat(start, offsets).tolist(), 
+                np.maximum.reduceat(end, offsets).tolist(), 
+                np.add.reduceat(end - start, offsets).tolist()):
+            grouped[id] = (key, count, first, last, busy)
+    recorded = {id: (key, time, title) for id, key, time, title in zip(
+        arrays["chapter_id"].tolist(), arrays["chapter_key"], 
+        arrays["chapter_time"].tolist(), arrays["chapter_title"])}
+
+    rows = list()
+    for id in sorted(set(grouped) | set(recorded)):
+        key, time, title = recorded.get(id, (None, NO_TIME, ""))
+        node_key, nodes, first, last, busy = \
+            grouped.get(id, (None, 0, None, None, 0))
+        time = None if time == NO_TIME else time
+        times = [value for value in [time, first] 
+                 if not isinstance(value, type(None))]
+        start = min(times) if len(times) > 0 else None
+        end = time if isinstance(last, type(None)) else last
+        rows.append(dict(
+            chapter_id=node_key if isinstance(key, type(None)) else key,
+            title=title,
+            nodes=nodes,
+            start=start,
+            end=end,
+            wall=None if isinstance(start, type(None)) else end - start,
+            busy=busy,
+            ))
+    table = pd.DataFrame(rows, columns=["chapter_id", "title", "nodes", 
+        "start", "end", "wall", "busy"])
+    for key in ["start", "end", "wall"]:
+        table[key] = pd.array(table[key].tolist(), dtype="Int64")
+    return table
+
+
+def gap_table(arrays:Dict[str, np.ndarray]) -> pd.DataFrame:
+    """ Gap between the end of a related node and the start of the node
+        (negative if they overlap).
+    """
+    parent, child = arrays["edge_parent"], arrays["edge_child"]
+    columns = arrays["columns"]
+    return pd.DataFrame(dict(
+        parent=arrays["node_key"][parent],
+        child=arrays["node_key"][child],
+        parent_column=columns[arrays["node_column"][parent]] \
+            if len(columns) > 0 else np.zeros(0, dtype=np.str_),
+        child_column=columns[arrays["node_column"][child]] \
+            if len(columns) > 0 else np.zeros(0, dtype=np.str_),
+        gap=arrays["node_start"][child] - arrays["node_end"][parent],
+        ))
+
+
+################################################################################
+##                               analyze_latency                              ##
+################################################################################
+def analyze_latency(graph:nx.Graph) -> Dict[str, pd.DataFrame]:
+    """ Latency tables of a log-graph (e.g. LLMLogger.graph or a loaded log),
+        times & durations in int nanoseconds.
+
+    :return: Tables 'critical_path', 'columns', 'chapters' and 'gaps'.
+    """
+    arrays = latency_arrays(iter_records(graph))
+    return dict(
+        critical_path=critical_path_table(arrays),
+        columns=column_table(arrays),
+        chapters=chapter_table(arrays),
+        gaps=gap_table(arrays),
+        )
+
+
+def critical_path_node_ids(graph:nx.Graph) -> list:
+    """ NodeIDs on the critical path of a log-graph (first to last).
+    """
+    arrays = latency_arrays(iter_records(graph))
+    return arrays["node_key"][critical_path(arrays)].tolist()
@@ -0,0 +1,236 @@
+""" Flat records describing a single change of the log-graph.
+
+A record is a plain dict, which makes it cheap to build, to serialize
+(journal, queues, sockets) and to apply back onto a graph.
+
+    record
+        ├── type : _GRAPH / _CHAPTER / _NODE / _EDGE
+        ├── id : str/NodeID/ChapterID (vertices only)
+        ├── u, v : str/NodeID (edges only)
+        ├── time : int (nanoseconds since the epoch, see utils.clock)
+        ├── title : str
+        ├── content : Any
+        ├── style : str
+        ├── column, stack, chapter_id (nodes only)
+        ├── span : start, end, duration, tokens, error (timed nodes only, 
+        |       see utils.spans)
+        └── encoding : 'delta' (nodes whose content is a delta only, see 
+                utils.delta)
+"""
+from typing import Any, Dict, Iterator, Iterable
+import networkx as nx
+
+try:
+    from .ids import NodeID, ChapterID, _NODE, _CHAPTER, _EDGE
+    from .clock import timestamp_ns
+except ImportError:
+    from llm_logger_src.utils.ids import NodeID, ChapterID, _NODE, _CHAPTER, \
+        _EDGE
+    from llm_logger_src.utils.clock import timestamp_ns
+
+
+################################################################################
+##                                  CONSTANTS                                 ##
+################################################################################
+_GRAPH = "GRPH_"
+
+# order in which records of a batch are applied (vertices before edges)
+_RECORD_ORDER = {_GRAPH: 0, _CHAPTER: 1, _NODE: 2, _EDGE: 3}
+
+
+################################################################################
+##                                  BUILDERS                                  ##
+################################################################################
+def graph_record(time:int) -> Dict[str, Any]:
+    return dict(type=_GRAPH, time=time)
+
+
+def chapter_record(chapter_id:ChapterID, time:int, title:str,
+                   style:str="default", content:Any=None) -> Dict[str, Any]:
+    return dict(type=_CHAPTER, id=chapter_id, time=time, title=title,
+                content=content, style=style)
+
+
+def node_record(node_id:NodeID, time:int, column:str, style:str, stack:bool,
+                chapter_id:ChapterID, content:Any=None, title:str="",
+                span:Dict[str, Any]=None, encoding:str=None) -> Dict[str, Any]:
+    record = dict(type=_NODE, id=node_id, time=time, title=title,
+                  content=content, column=column, style=style, stack=stack,
+                  chapter_id=chapter_id)
+    # only timed nodes carry a span (records of other nodes stay unchanged)
+    if not isinstance(span, type(None)):
+        record["span"] = span
+    # only encoded content carries its encoding
+    if not isinstance(encoding, type(None)):
+        record["encoding"] = encoding
+    return record
+
+
+def edge_record(u:NodeID, v:NodeID, time:int, style:str="default",
+                content:Any=None, title:str="") -> Dict[str, Any]:
+    return dict(type=_EDGE, u=u, v=v, time=time, title=title,
+                content=content, style=style)
+
+
+################################################################################
+##                                  APPLY                                     ##
+################################################################################
+def add_record(graph:nx.Graph, record:Dict[str, Any]) -> None:
+    """ Apply a single record onto the graph (same structure as produced by
+        LLMLogger.log() and LLMLogger.new_chapter()).
+
+    :param graph: Graph to be updated in-place.
+    :param record: Record created by one of the builders.
+    :raises ValueError: Unknown record type.
+    """
+    record_type = record["type"]
+    if record_type in [_NODE, _CHAPTER]:
+        graph.add_node(record["id"], **record_attributes(record))
+    elif record_type == _EDGE:
+        graph.add_edge(record["u"], record["v"], **record_attributes(record))
+    elif record_type == _GRAPH:
+        graph.graph.update(record_attributes(record))
+    else:
+        raise ValueError(f"record type='{record_type}' is unknown!")
+
+
+def record_attributes(record:Dict[str, Any]) -> Dict[str, Any]:
+    """ Attributes of the vertex/edge/graph described by the record (time is 
+        converted to int nanoseconds, e.g. str(seconds) of older logs).
+
+    :raises ValueError: Unknown record type.
+    """
+    record_type = record["type"]
+    if record_type == _NODE:
+        attributes = dict(
+            data=dict(
+                title=record.get("title", ""),
+                content=record.get("content")),
+            metadata=dict(
+                time=timestamp_ns(record["time"]),
+                type=_NODE,
+                column=record["column"],
+                style=record["style"],
+                stack=record["stack"],
+                chapter_id=record["chapter_id"],
+                ),
+            )
+        if not isinstance(record.get("span"), type(None)):
+            attributes["metadata"]["span"] = span_attributes(record["span"])
+        if not isinstance(record.get("encoding"), type(None)):
+            attributes["metadata"]["encoding"] = record["encoding"]
+        return attributes
+    elif record_type == _EDGE:
+        return dict(
+            data=dict(
+                title=record.get("title", ""),
+                content=record.get("content"),
+                ),
+            metadata=dict(
+                time=timestamp_ns(record["time"]),
+                type=_EDGE,
+                style=record["style"],
+                ),
+            )
+    elif record_type == _CHAPTER:
+        return dict(
+            data=dict(
+                title=record.get("title", ""),
+                content=record.get("content")),
+            metadata=dict(
+                time=timestamp_ns(record["time"]),
+                type=_CHAPTER,
+                style=record["style"],
+                ),
+            )
+    elif record_type == _GRAPH:
+        return dict(metadata=dict(time=timestamp_ns(record["time"])))
+    raise ValueError(f"record type='{record_type}' is unknown!")
+
+
+def span_attributes(span:Dict[str, Any]) -> Dict[str, Any]:
+    """ Span of a timed node, the nanoseconds are converted to int (e.g. 
+        str of GML).
+    """
+    span = dict(span)
+    for key in ["start", "end", "duration"]:
+        if key in span:
+            span[key] = int(span[key])
+    return span
+
+
+def add_records(graph:nx.Graph, records:Iterable[Dict[str, Any]]) -> nx.Graph:
+    """ Apply records onto the graph, vertices are applied before edges,
+        thus a batch may reference vertices in any order.
+
+    :param graph: Graph to be updated in-place.
+    :param records: Records created by the builders.
+    :return: Updated graph.
+    """
+    for record in sorted(records, key=lambda r: _RECORD_ORDER[r["type"]]):
+        add_record(graph=graph, record=record)
+    return graph
+
+
+################################################################################
+##                                   ITERATE                                  ##
+################################################################################
+def iter_records(graph:nx.Graph) -> Iterator[Dict[str, Any]]:
+    """ Decompose the graph into records (graph, vertices, then edges).
+
+    :param graph: Graph with the structure produced by LLMLogger.
+    :return: Generator of records.
+    """
+    metadata = graph.graph.get("metadata", None)
+    if isinstance(metadata, dict):
+        yield graph_record(time=metadata.get("time", ""))
+
+    for vertex_id, vertex in graph.nodes(data=True):
+        record = vertex_to_record(vertex_id=vertex_id, vertex=vertex)
+        if not isinstance(record, type(None)):
+            yield record
+
+    for u, v, edge in graph.edges(data=True):
+        yield edge_to_record(u=u, v=v, edge=edge)
+
+
+def vertex_to_record(vertex_id:Any, vertex:Dict[str, Any]) -> Dict[str, Any]:
+    """ Record of a chapter/node of the graph, None for any other vertex 
+        (e.g. a stub of a spilled node).
+    """
+    data, metadata = vertex.get("data", None), vertex["metadata"]
+    if metadata["type"] == _CHAPTER:
+        return chapter_record(
+            chapter_id=vertex_id,
+            time=metadata.get("time", ""),
+            title=data.get("title", ""),
+            style=metadata["style"],
+            content=data.get("content"),
+            )
+    elif metadata["type"] == _NODE:
+        return node_record(
+            node_id=vertex_id,
+            time=metadata["time"],
+            column=metadata["column"],
+            style=metadata["style"],
+            stack=metadata["stack"],
+            chapter_id=metadata["chapter_id"],
+            content=data.get("content"),
+            title=data.get("title", ""),
+            span=metadata.get("span"),
+            encoding=metadata.get("encoding"),
+            )
+    return None
+
+
+def edge_to_record(u:Any, v:Any, edge:Dict[str, Any]) -> Dict[str, Any]:
+    """ Record of an edge of the graph.
+    """
+    return edge_record(
+        u=u,
+        v=v,
+        time=edge["metadata"]["time"],
+        style=edge["metadata"]["style"],
+        content=edge["data"].get("content"),
+        title=edge["data"].get("title", ""),
+        )
@@ -0,0 +1,300 @@
+""" Rotating journal (size-bounded segments) & the manifest joining them.
+
+    <filename>.manifest (JSON, rewritten atomically on every rotation)
+        ├── version, filename, path (folder of the segments)
+        ├── removed : number of segments deleted by the retention
+        └── segments : [segment, ...] (oldest first, the last one is open)
+                ├── file : '<filename>.<segment>.journal'
+                ├── segment : number of the segment
+                └── records, nodes, chapters, bytes, first_time, last_time
+
+A segment is rolled over once it holds 'max_nodes' nodes, 'max_bytes' bytes,
+'max_chapters' chapters or is older than 'interval' seconds. The records of
+the chapters used by the previous segment (and the graph record) are repeated
+at the start of a new segment, thus the nodes of a segment find their chapter
+even if the older segments were deleted by the retention. A chapter which is
+not used by a segment is not carried any further.
+
+load('<filename>.manifest') replays the segments as one log-graph, an edge to
+a node of a deleted segment is skipped.
+"""
+import pathlib as pl
+import json
+import time
+import os
+import io
+from collections import OrderedDict
+from typing import Any, Dict, Iterable, Iterator, List
+
+try:
+    from .ids import _NODE, _CHAPTER, _EDGE, id_counter
+    from .records import _GRAPH
+    from .journal import JournalWriter, read_journal, JOURNAL_SUFFIX
+    from .index import index_path
+    from .columnar import _time
+    from .clock import NO_TIME
+except ImportError:
+    from llm_logger_src.utils.ids import _NODE, _CHAPTER, _EDGE, id_counter
+    from llm_logger_src.utils.records import _GRAPH
+    from llm_logger_src.utils.journal import JournalWriter, read_journal, \
+        JOURNAL_SUFFIX
+    from llm_logger_src.utils.index import index_path
+    from llm_logger_src.utils.columnar import _time
+    from llm_logger_src.utils.clock import NO_TIME
+
+
+################################################################################
+##                                  CONSTANTS                                 ##
+################################################################################
+MANIFEST_SUFFIX = ".manifest"
+_VERSION = 1
+_SEGMENT_DIGITS = 4
+# chapter records kept to be carried (least recently used are forgotten)
+_MAX_CHAPTERS = 1024
+
+
+################################################################################
+##                                  HELPERS                                   ##
+################################################################################
+def manifest_path(path:pl.Path, filename:str) -> pl.Path:
+    return pl.Path(path, str(filename) + MANIFEST_SUFFIX)
+
+
+def journal_segment_path(path:pl.Path, filename:str, segment:int) -> pl.Path:
+    """ '<path>/<filename>.<segment>.journal'
+    """
+    return pl.Path(path, f"{filename}.{str(segment).zfill(_SEGMENT_DIGITS)}"\
+        f"{JOURNAL_SUFFIX}")
+
+
+def write_manifest(path:pl.Path, manifest:Dict[str, Any]) -> None:
+    # readers never see a partially written manifest
+    temporary = pl.Path(str(path) + ".tmp")
+    with open(temporary, "w", encoding="utf-8") as file:
+        json.dump(manifest, file, indent=1)
+    os.replace(temporary, path)
+
+
+def read_manifest(path_or_buffer:Any) -> Dict[str, Any]:
+    if isinstance(path_or_buffer, (str, pl.Path)):
+        with open(path_or_buffer, "r", encoding="utf-8") as file:
+            return json.load(file)
+    if isinstance(path_or_buffer, io.TextIOBase):
+        return json.load(path_or_buffer)
+    return json.loads(path_or_buffer.read().decode("utf-8"))
+
+
+################################################################################
+##                           RotatingJournalWriter                            ##
+################################################################################
+class RotatingJournalWriter:
+
+    def __init__(self,
+            path:pl.Path,
+            filename:str,
+            max_nodes:int=None,
+            max_bytes:int=None,
+            max_chapters:int=None,
+            interval:float=None,
+            retention:int=None,
+            **kwargs,
+            ):
+        """ Journal split into segments (same interface as JournalWriter).
+
+        :param path: Folder of the segments & the manifest.
+        :param filename: Filename (without suffix).
+        :param max_nodes: Roll over after N nodes, defaults to None
+        :param max_bytes: Roll over after N bytes, defaults to None
+        :param max_chapters: Roll over after N new chapters, defaults to None
+        :param interval: Roll over after N seconds, defaults to None
+        :param retention: Number of segments kept on disk (older segments are
+            deleted), defaults to None (all)
+        :param kwargs: JournalWriter parameters of a segment (flush_every,
+            flush_interval, fsync, index).
+        """
+        for name, value in [("max_nodes", max_nodes),
+                            ("max_bytes", max_bytes),
+                            ("max_chapters", max_chapters),
+                            ("retention", retention)]:
+            if not isinstance(value, type(None)) \
+                and (not isinstance(value, int) or value < 1):
+                raise ValueError(
+                    f"{name}='{value}', but only None or int >= 1 is valid!")
+
+        self.folder = pl.Path(path)
+        self.filename = filename
+        self.path = manifest_path(path=path, filename=filename)
+        self.max_nodes = max_nodes
+        self.max_bytes = max_bytes
+        self.max_chapters = max_chapters
+        self.interval = interval
+        self.retention = retention
+        self._kwargs = kwargs
+
+        self._manifest = dict(version=_VERSION, filename=str(filename),
+            path=str(self.folder.resolve()), removed=0, segments=list())
+        self._writer = None
+        self._segment = None        # statistics of the open segment
+        self._started = None
+        self._graph_record = None
+        # ChapterID -> last record of the chapter (least recently used first)
+        self._chapters = OrderedDict()
+        self._current = None        # ChapterID of the last opened chapter
+        self._used = set()          # ChapterIDs used by the open segment
+        self._open(number=0, carried=list())
+
+    @property
+    def closed(self) -> bool:
+        return self._writer.closed
+
+    @property
+    def segments(self) -> List[pl.Path]:
+        """ Segments on disk (oldest first).
+        """
+        return [pl.Path(self.folder, segment["file"])
+                for segment in self._manifest["segments"]]
+
+    def write(self, record:Dict[str, Any]) -> None:
+        self.write_many([record])
+
+    def write_many(self, records:Iterable[Dict[str, Any]]) -> None:
+        records = list(records)
+        if len(records) == 0:
+            return
+        if self._full():
+            self.rotate()
+        self._writer.write_many(records)
+        segment = self._segment
+        for record in records:
+            record_type = record["type"]
+            if record_type == _NODE:
+                segment["nodes"] = segment["nodes"] + 1
+                self._use(record["chapter_id"])
+            elif record_type == _CHAPTER:
+                segment["chapters"] = segment["chapters"] + 1
+                self._chapters[record["id"]] = record
+                self._current = record["id"]
+                self._use(record["id"])
+                while len(self._chapters) > _MAX_CHAPTERS:
+                    self._chapters.popitem(last=False)
+            elif record_type == _GRAPH:
+                self._graph_record = record
+            timestamp = _time(record.get("time"))
+            if timestamp != NO_TIME:
+                if isinstance(segment["first_time"], type(None)):
+                    segment["first_time"] = timestamp
+                segment["last_time"] = timestamp
+        segment["records"] = segment["records"] + len(records)
+        segment["bytes"] = self._writer.size
+
+    def rotate(self) -> pl.Path:
+        """ Close the open segment and start a new one.
+
+        :return: Path of the new segment.
+        """
+        carried = list()
+        if not isinstance(self._graph_record, type(None)):
+            carried.append(self._graph_record)
+        carried.extend(self._chapters[chapter_id] 
+            for chapter_id in sorted(self._used, key=id_counter) 
+            if chapter_id in self._chapters)
+        self._writer.close()
+        self._segment["bytes"] = self._writer.size
+        self._open(number=self._segment["segment"] + 1, carried=carried)
+        self._retain()
+        write_manifest(path=self.path, manifest=self._manifest)
+        return self.segments[-1]
+
+    def flush(self) -> None:
+        self._writer.flush()
+        self._segment["bytes"] = self._writer.size
+        write_manifest(path=self.path, manifest=self._manifest)
+
+    def close(self) -> None:
+        if self._writer.closed:
+            return
+        self._writer.close()
+        self._segment["bytes"] = self._writer.size
+        write_manifest(path=self.path, manifest=self._manifest)
+
+    ############################################################################
+    ##                                PRIVATE                                 ##
+    ############################################################################
+    def _open(self, number:int, carried:List[Dict[str, Any]]) -> None:
+        segment_path = journal_segment_path(
+            path=self.folder, filename=self.filename, segment=number)
+        self._writer = JournalWriter(path=segment_path, append=False,
+                                     **self._kwargs)
+        self._segment = dict(file=segment_path.name, segment=number,
+            records=0, nodes=0, chapters=0, bytes=0, first_time=None,
+            last_time=None)
+        self._manifest["segments"].append(self._segment)
+        self._started = time.monotonic()
+        # carried chapters are carried again only if the segment uses them
+        self._used = set()
+        if not isinstance(self._current, type(None)):
+            self._used.add(self._current)
+        if len(carried) > 0:
+            self._writer.write_many(carried)
+            self._segment["records"] = len(carried)
+            self._segment["bytes"] = self._writer.size
+        write_manifest(path=self.path, manifest=self._manifest)
+
+    def _use(self, chapter_id:Any) -> None:
+        self._used.add(chapter_id)
+        if chapter_id in self._chapters:
+            self._chapters.move_to_end(chapter_id)
+
+    def _full(self) -> bool:
+        segment = self._segment
+        if segment["nodes"] == 0 and segment["chapters"] == 0:
+            return False
+        return (not isinstance(self.max_nodes, type(None)) \
+                and segment["nodes"] >= self.max_nodes) \
+            or (not isinstance(self.max_bytes, type(None)) \
+                and self._writer.size >= self.max_bytes) \
+            or (not isinstance(self.max_chapters, type(None)) \
+                and segment["chapters"] >= self.max_chapters) \
+            or (not isinstance(self.interval, type(None)) \
+                and time.monotonic() - self._started >= self.interval)
+
+    def _retain(self) -> None:
+        segments = self._manifest["segments"]
+        if isinstance(self.retention, type(None)):
+            return
+        while len(segments) > self.retention:
+            segment_path = pl.Path(self.folder, segments.pop(0)["file"])
+            segment_path.unlink(missing_ok=True)
+            index_path(segment_path).unlink(missing_ok=True)
+            self._manifest["removed"] = self._manifest["removed"] + 1
+
+
+################################################################################
+##                              manifest_records                              ##
+################################################################################
+def manifest_records(path_or_buffer:Any) -> Iterator[Dict[str, Any]]:
+    """ Records of all segments of a manifest (one logical journal).
+
+        Segments are looked up next to the manifest file (or in the folder
+        stored in the manifest if it is read from a buffer), an edge to a
+        vertex of a deleted segment is skipped.
+    """
+    manifest = read_manifest(path_or_buffer)
+    if isinstance(path_or_buffer, (str, pl.Path)):
+        folder = pl.Path(path_or_buffer).parent
+    else:
+        folder = pl.Path(manifest["path"])
+    vertices = set()
+    for segment in manifest["segments"]:
+        segment_path = pl.Path(folder, segment["file"])
+        if not segment_path.exists():
+            continue
+        for record in read_journal(segment_path):
+            record_type = record["type"]
+            if record_type in [_NODE, _CHAPTER]:
+                vertices.add(record["id"])
+            elif record_type == _EDGE \
+                and (record["u"] not in vertices \
+                    or record["v"] not in vertices):
+                continue
+            yield record
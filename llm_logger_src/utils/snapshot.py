@@ -0,0 +1,137 @@
+""" Copy-on-write generations of the log-graph (read-only snapshots).
+
+A snapshot is a frozen nx.Graph which shares the neighbor & attribute dicts
+(and thus the content) with the previous snapshot. Only the outer node &
+adjacency dicts are copied (C-level dict copies), the records logged since
+the previous snapshot are applied onto the copy (replacing the dicts they
+change):
+
+    generation 0 : snapshot_0 = copy of the live graph (once)
+    generation k : snapshot_k = snapshot_k-1 + records since generation k-1
+
+The live graph is locked only to take the pending records (O(changed)),
+the snapshot is built by the reading thread. A snapshot is never modified
+once it is returned, thus readers see a consistent graph; a graph without
+changes returns the same snapshot (O(1)).
+
+Shared attribute dicts must not be modified in-place, copy() the snapshot
+(e.g. resolve_content()) to get a mutable graph.
+"""
+import threading
+from typing import Any, Dict, Iterable, List
+import networkx as nx
+
+try:
+    from .ids import _NODE, _CHAPTER, _EDGE
+    from .records import add_record
+except ImportError:
+    from llm_logger_src.utils.ids import _NODE, _CHAPTER, _EDGE
+    from llm_logger_src.utils.records import add_record
+
+
+################################################################################
+##                                  HELPERS                                   ##
+################################################################################
+def share_copy(graph:nx.Graph, live:bool=False) -> nx.Graph:
+    """ Copy of the outer containers, the neighbor & attribute dicts are
+        shared (apply_shared() replaces them before a change).
+        
+    :param live: The graph is still modified in-place (the live graph), 
+        thus the neighbor & vertex attribute dicts are copied as well, 
+        defaults to False
+    """
+    copy = graph.__class__()
+    copy.graph = dict(graph.graph)
+    if live:
+        copy._node = {vertex_id: dict(attributes)
+                      for vertex_id, attributes in graph._node.items()}
+        copy._adj = {vertex_id: dict(neighbors)
+                     for vertex_id, neighbors in graph._adj.items()}
+    else:
+        copy._node = dict(graph._node)
+        copy._adj = dict(graph._adj)
+    return copy
+
+
+def apply_shared(graph:nx.Graph, records:Iterable[Dict[str, Any]]) -> None:
+    """ Apply records onto a graph created by share_copy(), attribute dicts
+        shared with the previous generation are replaced instead of updated.
+    """
+    adjacency, vertices = graph._adj, graph._node
+    copied = set()      # neighbor dicts owned by this generation
+    for record in records:
+        record_type = record["type"]
+        if record_type in [_NODE, _CHAPTER]:
+            if record["id"] in vertices:
+                vertices[record["id"]] = dict(vertices[record["id"]])
+            else:
+                copied.add(record["id"])
+        elif record_type == _EDGE:
+            u, v = record["u"], record["v"]
+            for vertex_id in [u, v]:
+                if vertex_id in adjacency and vertex_id not in copied:
+                    adjacency[vertex_id] = dict(adjacency[vertex_id])
+                    copied.add(vertex_id)
+            if u in adjacency and v in adjacency[u]:
+                attributes = dict(adjacency[u][v])
+                adjacency[u][v] = attributes
+                adjacency[v][u] = attributes
+        add_record(graph=graph, record=record)
+        if record_type == _EDGE:
+            # vertices created by the edge
+            copied.update([record["u"], record["v"]])
+
+
+################################################################################
+##                                 Snapshots                                  ##
+################################################################################
+class Snapshots:
+
+    def __init__(self):
+        """ Read-only snapshots of a graph updated by records.
+        """
+        self.lock = threading.Lock()    # serializes the readers
+        self._snapshot = None
+        self._changes = list()
+
+    @property
+    def enabled(self) -> bool:
+        """ Records are collected once the first snapshot was taken.
+        """
+        return not isinstance(self._snapshot, type(None))
+
+    def add(self, records:Iterable[Dict[str, Any]]) -> None:
+        """ Records applied onto the live graph (caller holds the graph lock).
+        """
+        if not isinstance(self._snapshot, type(None)):
+            self._changes.extend(records)
+
+    def reset(self) -> None:
+        """ Drop the snapshot (e.g. the live graph is modified other than by
+            records).
+        """
+        self._snapshot = None
+        self._changes = list()
+
+    def take(self) -> List[Dict[str, Any]]:
+        """ Records since the last snapshot (caller holds the graph lock).
+        """
+        changes, self._changes = self._changes, list()
+        return changes
+
+    def first(self, graph:nx.Graph) -> nx.Graph:
+        """ First generation (caller holds the graph lock).
+        """
+        self._snapshot = nx.freeze(share_copy(graph=graph, live=True))
+        self._changes = list()
+        return self._snapshot
+
+    def next(self, changes:List[Dict[str, Any]]) -> nx.Graph:
+        """ Next generation (built without the graph lock).
+        """
+        if len(changes) == 0:
+            return self._snapshot
+        snapshot = share_copy(graph=self._snapshot)
+        apply_shared(graph=snapshot, records=changes)
+        self._snapshot = nx.freeze(snapshot)
+        return self._snapshot
@@ -0,0 +1,142 @@
+""" Latency spans, a timed node records the duration of the wrapped call.
+
+    node metadata
+        ├── time : start of the span
+        └── span
+            ├── start, end : int nanoseconds since the epoch
+            ├── duration : int nanoseconds
+            ├── tokens : Dict[str, int] (optional, e.g. prompt, completion)
+            └── error : str (optional, exception raised within the span)
+
+The node is logged once the span ends (context manager exit or return of the
+decorated function), thus its NodeID is known only afterwards (Span.node_id).
+
+    with logger.span(column="planner", style="llm") as span:
+        response = client.complete(prompt)
+        span.content = response.text
+        span.tokens = dict(prompt=..., completion=...)
+
+    @logger.span(column="retriever")
+    def retrieve(query):
+        ...                 # return value is logged as the content
+
+A disabled span does not read the clock and logs nothing, a disabled
+decorator returns the function unchanged.
+"""
+import contextvars
+import functools
+import inspect
+from typing import Any, Callable, Dict
+
+
+################################################################################
+##                                    Span                                    ##
+################################################################################
+class Span:
+
+    def __init__(self,
+            log:Callable[["Span"], Any],
+            now:Callable[[], int],
+            context:contextvars.ContextVar=None,
+            enabled:bool=True,
+            content:Any=None,
+            tokens:Dict[str, int]=None,
+            ):
+        """ Timed call, context manager & decorator (see LLMLogger.span()).
+
+        :param log: Logs the node of an ended span, returns its NodeID.
+        :param now: Clock, nanoseconds since the epoch.
+        :param context: Current span of the context (thread/asyncio task),
+            defaults to None
+        :param enabled: Disabled span is a no-op, defaults to True
+        :param content: Content of the node, defaults to None (return value
+            of a decorated function)
+        :param tokens: Token counts, defaults to None
+        """
+        self._log = log
+        self._now = now
+        self._context = context
+        self._token = None
+        self.enabled = enabled
+        self.content = content
+        self.tokens = tokens
+        self.error = None
+        self.start = None
+        self.end = None
+        self.node_id = None
+
+    @property
+    def duration(self) -> int:
+        """ Nanoseconds between start and end (None while running).
+        """
+        if isinstance(self.end, type(None)):
+            return None
+        return self.end - self.start
+
+    @property
+    def metadata(self) -> Dict[str, Any]:
+        """ 'span' metadata of the node (optional keys only if set).
+        """
+        span = dict(start=self.start, end=self.end, duration=self.duration)
+        if not isinstance(self.tokens, type(None)):
+            span["tokens"] = dict(self.tokens)
+        if not isinstance(self.error, type(None)):
+            span["error"] = self.error
+        return span
+
+    def __enter__(self) -> "Span":
+        if self.enabled:
+            if not isinstance(self._context, type(None)):
+                self._token = self._context.set(self)
+            self.start = self._now()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback) -> bool:
+        if not self.enabled:
+            return False
+        self.end = self._now()
+        if not isinstance(self._token, type(None)):
+            self._context.reset(self._token)
+            self._token = None
+        if not isinstance(exc_type, type(None)):
+            self.error = f"{exc_type.__name__}: {exc_value}"
+        self.node_id = self._log(self)
+        # exceptions are propagated
+        return False
+
+    def __call__(self, function:Callable) -> Callable:
+        """ Decorator, every call is timed by its own span.
+        """
+        if not self.enabled:
+            return function
+
+        if inspect.iscoroutinefunction(function):
+            @functools.wraps(function)
+            async def wrapper(*args, **kwargs):
+                with self._copy() as span:
+                    result = await function(*args, **kwargs)
+                    if isinstance(span.content, type(None)):
+                        span.content = result
+                    return result
+        else:
+            @functools.wraps(function)
+            def wrapper(*args, **kwargs):
+                with self._copy() as span:
+                    result = function(*args, **kwargs)
+                    if isinstance(span.content, type(None)):
+                        span.content = result
+                    return result
+        return wrapper
+
+    ############################################################################
+    ##                                PRIVATE                                 ##
+    ############################################################################
+    def _copy(self) -> "Span":
+        return Span(
+            log=self._log,
+            now=self._now,
+            context=self._context,
+            enabled=self.enabled,
+            content=self.content,
+            tokens=self.tokens,
+            )
@@ -0,0 +1,286 @@
+""" Memory-bounded log-graph, older nodes are spilled to disk.
+
+The resident graph keeps the nodes of the last 'resident_chapters' chapters
+and/or at most 'resident_bytes' of node content (once exceeded, the oldest
+nodes are spilled down to 3/4 of the limit). Older nodes (and chapters
+without resident nodes) are moved to a temporary spill file:
+
+    spill file (pickle, one batch of records per spill, deleted on close)
+        └── [vertex records ..., edge records ...]
+
+An edge between a resident node and a spilled node stays in the resident
+graph, the spilled node is kept as a stub vertex (no data, metadata type
+'SPLD_'), thus the edge still resolves. The edge is spilled (and the stub
+removed) once both of its nodes are spilled.
+
+Records are pickled, thus the content (any Python object), NodeIDs and
+ChapterIDs are read back unchanged.
+"""
+import pathlib as pl
+import pickle
+import tempfile
+import weakref
+from collections import OrderedDict
+from typing import Any, Dict, Iterable, Iterator, List
+
+import networkx as nx
+
+try:
+    from .ids import _NODE, _CHAPTER, _EDGE
+    from .records import add_record, iter_records, vertex_to_record, \
+        edge_to_record
+except ImportError:
+    from llm_logger_src.utils.ids import _NODE, _CHAPTER, _EDGE
+    from llm_logger_src.utils.records import add_record, iter_records, \
+        vertex_to_record, edge_to_record
+
+
+################################################################################
+##                                  CONSTANTS                                 ##
+################################################################################
+SPILL_SUFFIX = ".spill"
+# over 'resident_bytes', nodes are spilled down to this fraction (batches)
+_LOW_WATER = 0.75
+_SPILLED = "SPLD_"
+
+
+################################################################################
+##                                  HELPERS                                   ##
+################################################################################
+def content_size(value:Any) -> int:
+    """ Approximate size of a content in bytes (characters of a str).
+    """
+    if isinstance(value, type(None)):
+        return 0
+    if isinstance(value, (str, bytes)):
+        return len(value)
+    return len(str(value))
+
+
+def stub_attributes() -> Dict[str, Any]:
+    return dict(metadata=dict(type=_SPILLED))
+
+
+################################################################################
+##                                 SpillStore                                 ##
+################################################################################
+class SpillStore:
+
+    def __init__(self,
+            path:pl.Path=None,
+            resident_chapters:int=None,
+            resident_bytes:int=None,
+            ):
+        """ Retention policy of the resident graph & the spill file.
+
+        :param path: Folder of the spill file, defaults to None (system
+            temporary folder)
+        :param resident_chapters: Number of the last chapters kept in
+            memory, defaults to None (no limit)
+        :param resident_bytes: Node content (title & content) kept in memory,
+            older nodes are spilled, defaults to None (no limit)
+        """
+        for name, value in [("resident_chapters", resident_chapters),
+                            ("resident_bytes", resident_bytes)]:
+            if not isinstance(value, type(None)) \
+                and (not isinstance(value, int) or value < 1):
+                raise ValueError(
+                    f"{name}='{value}', but only None or int >= 1 is valid!")
+
+        self.resident_chapters = resident_chapters
+        self.resident_bytes = resident_bytes
+        self._file = tempfile.NamedTemporaryFile(
+            mode="wb",
+            suffix=SPILL_SUFFIX,
+            dir=None if isinstance(path, type(None)) else str(path),
+            )
+        # also deleted at exit if the logger is still alive
+        self._finalizer = weakref.finalize(self, self._file.close)
+        self._size = 0
+
+        self._nodes = OrderedDict()     # resident NodeID -> (ChapterID, size)
+        self._chapters = OrderedDict()  # resident ChapterID -> {NodeID: None}
+        self._spilled = set()           # spilled NodeIDs & ChapterIDs
+        self._stubs = set()             # spilled vertices kept as stubs
+        self._expired = set()           # chapters out of 'resident_chapters'
+        self._bytes = 0                 # content of the resident nodes
+        self._spilled_nodes = 0
+
+    @property
+    def path(self) -> pl.Path:
+        return pl.Path(self._file.name)
+
+    @property
+    def size(self) -> int:
+        """ Bytes written to the spill file (flushed, thus readable).
+        """
+        self._file.flush()
+        return self._size
+
+    @property
+    def stats(self) -> Dict[str, int]:
+        return dict(
+            resident_nodes=len(self._nodes),
+            spilled_nodes=self._spilled_nodes,
+            resident_chapters=len(self._chapters),
+            spilled_chapters=len(self._spilled) - self._spilled_nodes,
+            stubs=len(self._stubs),
+            resident_bytes=self._bytes,
+            spill_file_bytes=self._size,
+            )
+
+    def contains(self, vertex_id:Any) -> bool:
+        """ Vertex was spilled.
+        """
+        return vertex_id in self._spilled
+
+    def track(self, graph:nx.Graph, records:Iterable[Dict[str, Any]]) -> None:
+        """ Register records applied onto the resident graph and spill the
+            oldest nodes exceeding the retention policy.
+        """
+        for record in records:
+            record_type = record["type"]
+            if record_type == _NODE:
+                node_id, chapter_id = record["id"], record["chapter_id"]
+                size = content_size(record.get("content")) \
+                    + content_size(record.get("title"))
+                self._nodes[node_id] = (chapter_id, size)
+                self._bytes = self._bytes + size
+                self._chapters.setdefault(chapter_id, dict())[node_id] = None
+            elif record_type == _CHAPTER:
+                self._chapters.setdefault(record["id"], dict())
+            elif record_type == _EDGE:
+                # edge to a spilled node, add_record() created a bare vertex
+                for vertex_id in [record["u"], record["v"]]:
+                    if vertex_id in self._spilled \
+                        and "metadata" not in graph.nodes[vertex_id]:
+                        graph.nodes[vertex_id].update(stub_attributes())
+                        self._stubs.add(vertex_id)
+        self.retain(graph=graph)
+
+    def retain(self, graph:nx.Graph) -> int:
+        """ Spill nodes & chapters exceeding the retention policy.
+
+        :return: Number of spilled vertices.
+        """
+        vertex_ids = list()
+
+        # oldest chapters (with all their nodes)
+        if not isinstance(self.resident_chapters, type(None)):
+            # nodes logged into a chapter out of the window (other context)
+            for chapter_id in [chapter_id for chapter_id in self._chapters
+                               if chapter_id in self._expired]:
+                node_ids = self._chapters.pop(chapter_id)
+                vertex_ids.extend(self._release(node_ids=list(node_ids)))
+            while len(self._chapters) > self.resident_chapters:
+                chapter_id, node_ids = self._chapters.popitem(last=False)
+                self._expired.add(chapter_id)
+                vertex_ids.extend(self._release(node_ids=list(node_ids)))
+                vertex_ids.append(chapter_id)
+
+        # oldest nodes, then chapters left without nodes (except the newest)
+        if not isinstance(self.resident_bytes, type(None)) \
+            and self._bytes > self.resident_bytes:
+            node_ids, resident = list(), self._bytes
+            for node_id, (_, size) in self._nodes.items():
+                if resident <= self.resident_bytes * _LOW_WATER:
+                    break
+                node_ids.append(node_id)
+                resident = resident - size
+            vertex_ids.extend(self._release(node_ids=node_ids))
+            chapter_ids = list(self._chapters)[0:-1]
+            for chapter_id in chapter_ids:
+                if len(self._chapters[chapter_id]) == 0:
+                    del self._chapters[chapter_id]
+                    if chapter_id not in self._spilled:
+                        vertex_ids.append(chapter_id)
+
+        # a chapter without a record (e.g. the default chapter) is not a vertex
+        vertex_ids = [vertex_id for vertex_id in vertex_ids
+                      if graph.has_node(vertex_id)
+                      and vertex_id not in self._stubs]
+        if len(vertex_ids) > 0:
+            self._spill(graph=graph, vertex_ids=vertex_ids)
+        return len(vertex_ids)
+
+    def records(self, size:int=None) -> Iterator[Dict[str, Any]]:
+        """ Spilled records (in the order of spilling, vertices before their
+            edges).
+
+        :param size: Read only the first 'size' bytes of the spill file (the
+            spill file at the time of a snapshot), defaults to None (all)
+        """
+        size = self.size if isinstance(size, type(None)) else size
+        with open(self.path, "rb") as file:
+            while file.tell() < size:
+                yield from pickle.load(file)
+
+    def merge(self, graph:nx.Graph, size:int=None) \
+            -> Iterator[Dict[str, Any]]:
+        """ Records of the whole log-graph, the resident graph (without the
+            stubs) and the spilled records (before the resident edges).
+        """
+        spilled = self.records(size=size)
+        for record in iter_records(graph):
+            if record["type"] == _EDGE and not isinstance(spilled, type(None)):
+                yield from spilled
+                spilled = None
+            yield record
+        if not isinstance(spilled, type(None)):
+            yield from spilled
+
+    def restore(self, graph:nx.Graph, size:int=None) -> nx.Graph:
+        """ Apply the spilled records onto (a copy of) the resident graph,
+            stubs are replaced by the spilled vertices.
+        """
+        for record in self.records(size=size):
+            add_record(graph=graph, record=record)
+        return graph
+
+    def close(self) -> None:
+        """ Delete the spill file.
+        """
+        self._finalizer()
+
+    ############################################################################
+    ##                                PRIVATE                                 ##
+    ############################################################################
+    def _release(self, node_ids:List[Any]) -> List[Any]:
+        """ Remove nodes from the resident bookkeeping.
+        """
+        for node_id in node_ids:
+            chapter_id, size = self._nodes.pop(node_id)
+            members = self._chapters.get(chapter_id, None)
+            if not isinstance(members, type(None)):
+                members.pop(node_id, None)
+            self._bytes = self._bytes - size
+        return node_ids
+
+    def _spill(self, graph:nx.Graph, vertex_ids:List[Any]) -> None:
+        vertices, edges = list(), list()
+        for vertex_id in vertex_ids:
+            vertices.append(vertex_to_record(
+                vertex_id=vertex_id, vertex=graph.nodes[vertex_id]))
+            self._spilled.add(vertex_id)
+            if vertices[-1]["type"] == _NODE:
+                self._spilled_nodes = self._spilled_nodes + 1
+            # edges are spilled once both vertices are spilled
+            for neighbor_id in list(graph.adj[vertex_id]):
+                if neighbor_id in self._spilled:
+                    edges.append(edge_to_record(u=vertex_id, v=neighbor_id,
+                        edge=graph.edges[vertex_id, neighbor_id]))
+                    graph.remove_edge(vertex_id, neighbor_id)
+                    if neighbor_id in self._stubs \
+                        and graph.degree(neighbor_id) == 0:
+                        graph.remove_node(neighbor_id)
+                        self._stubs.discard(neighbor_id)
+            if graph.degree(vertex_id) > 0:
+                attributes = graph.nodes[vertex_id]
+                attributes.clear()
+                attributes.update(stub_attributes())
+                self._stubs.add(vertex_id)
+            else:
+                graph.remove_node(vertex_id)
+        pickle.dump(vertices + edges, self._file,
+                    protocol=pickle.HIGHEST_PROTOCOL)
+        self._size = self._file.tell()
@@ -0,0 +1,293 @@
+""" Trace Event Format export of the log-graph (chrome://tracing, Perfetto).
+
+    trace
+        ├── process : pid 1, named 'llm_logger'
+        ├── thread : one per column (tid in order of appearance)
+        ├── chapter : global instant event (ph 'i', s 'g')
+        ├── timed node : complete event (ph 'X', ts = start, dur)
+        ├── node : thread instant event (ph 'i', s 't')
+        └── edge : flow event from the related (older) node to the node
+                   (ph 's' & 'f')
+
+ts/dur are microseconds (since the epoch), the name of a node is its title or
+its style. The records are converted one at a time, only the thread & start
+of every node are kept (to place the flow events of the edges), thus a log
+larger than the memory can be exported straight from its file.
+
+With content=True the content of delta-encoded nodes (see utils.delta) is 
+decoded against the full content of the last DELTA_CACHE_SIZE nodes, a node 
+whose reference is not among them (e.g. records out of logging order) has no 
+'content' in its args.
+
+    logger.save(format="trace")                 # <filename>.json
+    convert("run.journal", "run.json", format="trace")
+"""
+import pathlib as pl
+import json
+import io
+import array
+import itertools
+from collections import OrderedDict
+from typing import Any, Dict, Iterable, Iterator, Tuple
+
+try:
+    from .ids import _NODE, _CHAPTER, _EDGE, id_counter
+    from .clock import timestamp_ns, NO_TIME
+    from .records import _GRAPH
+    from .delta import DELTA_ENCODING, DELTA_CACHE_SIZE, parse_delta, \
+        apply_delta
+except ImportError:
+    from llm_logger_src.utils.ids import _NODE, _CHAPTER, _EDGE, id_counter
+    from llm_logger_src.utils.clock import timestamp_ns, NO_TIME
+    from llm_logger_src.utils.records import _GRAPH
+    from llm_logger_src.utils.delta import DELTA_ENCODING, DELTA_CACHE_SIZE, \
+        parse_delta, apply_delta
+
+
+################################################################################
+##                                  CONSTANTS                                 ##
+################################################################################
+TRACE_SUFFIX = ".json"
+_PID = 1
+_PROCESS_NAME = "llm_logger"
+_US = 1_000                 # nanoseconds per microsecond
+_TABLE_GROWTH = 1024        # counters beyond the table (gaps of the IDs)
+_encode = json.JSONEncoder(separators=(",", ":"), default=str).encode
+_NO_CONTENT = object()      # args without 'content'
+
+
+################################################################################
+##                                 _NodeTable                                 ##
+################################################################################
+class _NodeTable:
+
+    def __init__(self):
+        """ Thread & start of the nodes, arrays indexed by the NodeID counter
+            (12 bytes per node), any other ID is kept in a dict.
+        """
+        self._tid = array.array("i")
+        self._start = array.array("q")
+        self._other = dict()
+
+    def add(self, id:Any, tid:int, start:int) -> None:
+        counter = _counter(id)
+        # sparse counters (e.g. IDs of a foreign tool) would bloat the arrays
+        if isinstance(counter, type(None)) \
+            or counter > 2 * len(self._tid) + _TABLE_GROWTH:
+            self._other[id] = (tid, start, counter)
+            return
+        if counter >= len(self._tid):
+            size = counter + 1 - len(self._tid)
+            self._tid.extend(itertools.repeat(0, size))
+            self._start.extend(itertools.repeat(NO_TIME, size))
+        self._tid[counter] = tid
+        self._start[counter] = start
+
+    def get(self, id:Any) -> Tuple[int, int, int]:
+        """ (tid, start, counter) of the node, None if unknown.
+        """
+        node = self._other.get(id, None)
+        if not isinstance(node, type(None)):
+            return node
+        counter = _counter(id)
+        if isinstance(counter, type(None)) or counter >= len(self._tid) \
+            or self._start[counter] == NO_TIME:
+            return None
+        return self._tid[counter], self._start[counter], counter
+
+
+def _counter(id:Any) -> int:
+    if not isinstance(id, str):
+        return None
+    try:
+        return id_counter(id)
+    except ValueError:
+        return None
+
+
+################################################################################
+##                                   EVENTS                                   ##
+################################################################################
+def _ts(nanoseconds:int) -> float:
+    return nanoseconds / _US
+
+
+def _metadata_event(name:str, tid:int, args:Dict[str, Any]) \
+        -> Dict[str, Any]:
+    return dict(ph="M", pid=_PID, tid=tid, name=name, args=args)
+
+
+def _node_event(record:Dict[str, Any], tid:int, start:int, end:int,
+                content:Any=_NO_CONTENT) -> Dict[str, Any]:
+    args = dict(node_id=record["id"], chapter_id=record["chapter_id"],
+                style=record["style"])
+    span = record.get("span", None)
+    if isinstance(span, dict):
+        for key in ["tokens", "error"]:
+            if not isinstance(span.get(key, None), type(None)):
+                args[key] = span[key]
+    if content is not _NO_CONTENT:
+        args["content"] = content
+    event = dict(name=record.get("title", "") or record["style"],
+                 cat=record["style"], pid=_PID, tid=tid, ts=_ts(start),
+                 args=args)
+    if isinstance(span, dict):
+        event.update(ph="X", dur=_ts(end - start))
+    else:
+        event.update(ph="i", s="t")
+    return event
+
+
+def _node_content(record:Dict[str, Any], content_store:Any, 
+                  references:OrderedDict) -> Any:
+    """ Full content of the node, _NO_CONTENT if it is a delta of an unknown
+        reference. 'references' keeps the full content of the last nodes.
+    """
+    value = record.get("content", None)
+    if not isinstance(content_store, type(None)):
+        value = content_store.resolve(value)
+    if record.get("encoding", None) == DELTA_ENCODING:
+        reference = references.get(parse_delta(value)[0], None)
+        if isinstance(reference, type(None)):
+            return _NO_CONTENT
+        value = apply_delta(reference=reference, delta=value)
+    if isinstance(value, str):
+        references[record["id"]] = value
+        while len(references) > DELTA_CACHE_SIZE:
+            references.popitem(last=False)
+    return value
+
+
+def _chapter_event(record:Dict[str, Any], time:int) -> Dict[str, Any]:
+    return dict(name=record.get("title", "") or record["id"], cat="chapter",
+                ph="i", s="g", pid=_PID, tid=0, ts=_ts(time),
+                args=dict(chapter_id=record["id"], style=record["style"]))
+
+
+def _flow_events(u:Any, v:Any, name:str, nodes:_NodeTable, flow_id:int):
+    """ Start & finish of the flow from the related (older) node, None if
+        a node is unknown.
+    """
+    nodes_u, nodes_v = nodes.get(u), nodes.get(v)
+    if isinstance(nodes_u, type(None)) or isinstance(nodes_v, type(None)):
+        return None
+    if not isinstance(nodes_u[2], type(None)) \
+        and not isinstance(nodes_v[2], type(None)) and nodes_v[2] < nodes_u[2]:
+        nodes_u, nodes_v = nodes_v, nodes_u
+    (tid_parent, start_parent, _), (tid_child, start_child, _) = \
+        nodes_u, nodes_v
+    return [
+        dict(name=name, cat="edge", ph="s", id=flow_id, pid=_PID,
+             tid=tid_parent, ts=_ts(start_parent)),
+        dict(name=name, cat="edge", ph="f", bp="e", id=flow_id, pid=_PID,
+             tid=tid_child, ts=_ts(start_child)),
+        ]
+
+
+def iter_trace_events(
+        records:Iterable[Dict[str, Any]],
+        content:bool=False,
+        content_store:Any=None,
+        process_name:str=_PROCESS_NAME,
+    ) -> Iterator[Dict[str, Any]]:
+    """ Trace events of the records (see the module docstring), records
+        without time are skipped.
+
+    :param content: Add the content of the nodes to 'args', defaults to False
+    :param content_store: Resolves ContentRefs of the content, 
+        defaults to None
+    :param process_name: Name of the process, defaults to 'llm_logger'
+    :raises ValueError: Unknown record type.
+    :return: Generator of events.
+    """
+    yield _metadata_event("process_name", tid=0, 
+                          args=dict(name=process_name))
+    threads = dict()        # column -> tid
+    nodes = _NodeTable()
+    pending = list()        # edges preceding their nodes
+    references = OrderedDict()      # full content of delta references
+    flow_id = 0
+    for record in records:
+        record_type = record["type"]
+        if record_type == _NODE:
+            column = record["column"]
+            tid = threads.get(column, None)
+            if isinstance(tid, type(None)):
+                tid = len(threads) + 1
+                threads[column] = tid
+                yield _metadata_event("thread_name", tid=tid, 
+                                      args=dict(name=column))
+                yield _metadata_event("thread_sort_index", tid=tid,
+                                      args=dict(sort_index=tid))
+            # a node without time may still be the reference of a delta
+            value = _node_content(record, content_store=content_store, 
+                references=references) if content else _NO_CONTENT
+            span = record.get("span", None)
+            if isinstance(span, dict):
+                start, end = int(span["start"]), int(span["end"])
+            else:
+                start = end = timestamp_ns(record["time"])
+            if start == NO_TIME:
+                continue
+            nodes.add(record["id"], tid=tid, start=start)
+            yield _node_event(record, tid=tid, start=start, end=end, 
+                              content=value)
+        elif record_type == _EDGE:
+            name = record.get("title", "") or record["style"]
+            events = _flow_events(record["u"], record["v"], name=name,
+                                  nodes=nodes, flow_id=flow_id)
+            if isinstance(events, type(None)):
+                pending.append((record["u"], record["v"], name))
+                continue
+            flow_id = flow_id + 1
+            yield from events
+        elif record_type == _CHAPTER:
+            time = timestamp_ns(record["time"])
+            if time != NO_TIME:
+                yield _chapter_event(record, time=time)
+        elif record_type != _GRAPH:
+            raise ValueError(f"record type='{record_type}' is unknown!")
+
+    # edges of nodes without time (or never logged) are skipped
+    for u, v, name in pending:
+        events = _flow_events(u, v, name=name, nodes=nodes, flow_id=flow_id)
+        if not isinstance(events, type(None)):
+            flow_id = flow_id + 1
+            yield from events
+
+
+################################################################################
+##                                    WRITE                                   ##
+################################################################################
+def write_trace_events(path_or_buffer:Any, records:Iterable[Dict[str, Any]],
+                       **kwargs) -> int:
+    """ Write the records as a trace (JSON object format, one event per line,
+        constant memory apart from the thread & start of every node).
+
+    :param path_or_buffer: Path of the trace or a file-like object.
+    :param kwargs: See iter_trace_events().
+    :return: Number of written events.
+    """
+    if isinstance(path_or_buffer, (str, pl.Path)):
+        file = open(path_or_buffer, "w", encoding="utf-8")
+    elif isinstance(path_or_buffer, io.TextIOBase):
+        file = path_or_buffer
+    else:
+        file = io.TextIOWrapper(path_or_buffer, encoding="utf-8")
+
+    count = 0
+    try:
+        file.write('{"displayTimeUnit":"ms","traceEvents":[\n')
+        for event in iter_trace_events(records, **kwargs):
+            file.write(_encode(event) if count == 0 
+                       else ",\n" + _encode(event))
+            count = count + 1
+        file.write("\n]}\n")
+    finally:
+        if isinstance(path_or_buffer, (str, pl.Path)):
+            file.close()
+        elif not isinstance(path_or_buffer, io.TextIOBase):
+            # the buffer stays open for the caller
+            file.flush()
+            file.detach()
+    return count
@@ -2,7 +2,6 @@ from plotly import graph_objects as go
 from typing import Dict, Any
 import numpy as np
 from shapely.geometry import LineString
-import datetime as dt
 
 if __name__ == "__main__":
     import sys
@@ -20,6 +19,7 @@ if __name__ == "__main__":
         update_metadata, update_data, get_trace_index, get_trace_type, \
         get_trace_style, get_trace_content 
     from ids import _NODE, _CHAPTER, _EDGE
+    from clock import format_timestamp, format_duration
     
 else:
     try:
@@ -27,11 +27,14 @@ else:
         update_metadata, update_data, get_trace_index, get_trace_type, \
         get_trace_style, get_trace_content 
         from .ids import _NODE, _CHAPTER, _EDGE
+        from .clock import format_timestamp, format_duration
     except ImportError:
         from llm_logger_src.utils.customdata import init_customdata, \
         update_metadata, update_data, get_trace_index, get_trace_type, \
         get_trace_style, get_trace_content 
         from llm_logger_src.utils.ids import _NODE, _CHAPTER, _EDGE
+        from llm_logger_src.utils.clock import format_timestamp, \
+            format_duration
 
 
 ################################################################################
@@ -217,7 +220,15 @@ def _set_node_datastruct(
         
     header=""
     if not isinstance(metadata, type(None)):
-        header = header+f"<b>logged on</b>: {dt.datetime.fromtimestamp(float(metadata['time']))}"+"<br />"
+        header = header+f"<b>logged on</b>: {format_timestamp(metadata['time'])}"+"<br />"
+        span = metadata.get("span", None)
+        if isinstance(span, dict):
+            header = header+f"<b>duration</b>: {format_duration(span['duration'])}"+"<br />"
+            if isinstance(span.get("tokens", None), dict):
+                tokens = ", ".join(f"{key}={value}" for key, value in span["tokens"].items())
+                header = header+f"<b>tokens</b>: {tokens}"+"<br />"
+            if not isinstance(span.get("error", None), type(None)):
+                header = header+f"<b>error</b>: {span['error']}"+"<br />"
         _new_line = '\n'
         header = header+f"<b>content length</b>: {content.count(_new_line)} [lines]"+"<br />"
     
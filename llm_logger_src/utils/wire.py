@@ -0,0 +1,74 @@
+""" Length-prefixed JSON messages over a stream socket.
+
+    message
+        ├── length : 4 bytes, big-endian unsigned int
+        └── payload : UTF-8 encoded JSON object
+
+JSON keeps the protocol usable from services which are not written in Python.
+"""
+import json
+import socket
+import struct
+from typing import Any, Dict, Union, Tuple
+
+
+################################################################################
+##                                  CONSTANTS                                 ##
+################################################################################
+_HEADER = struct.Struct(">I")
+MAX_MESSAGE_SIZE = 256 * 1024 * 1024
+
+
+################################################################################
+##                                   ADDRESS                                  ##
+################################################################################
+def connect(address:Union[str, Tuple[str, int]]) -> socket.socket:
+    """ Connect to a Unix domain socket (path) or a TCP socket (host, port).
+    """
+    if isinstance(address, (tuple, list)):
+        sock = socket.create_connection(tuple(address))
+        sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+    else:
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        sock.connect(str(address))
+    return sock
+
+
+################################################################################
+##                                  MESSAGES                                  ##
+################################################################################
+def send_message(sock:socket.socket, message:Dict[str, Any]) -> None:
+    payload = json.dumps(message, separators=(",", ":"), default=str)\
+        .encode("utf-8")
+    sock.sendall(_HEADER.pack(len(payload)) + payload)
+
+
+def recv_message(sock:socket.socket) -> Dict[str, Any]:
+    """ Receive a single message.
+
+    :return: Decoded message, None if the connection was closed.
+    :raises ValueError: Message exceeds MAX_MESSAGE_SIZE.
+    """
+    header = _recv_exactly(sock, _HEADER.size)
+    if isinstance(header, type(None)):
+        return None
+    (length, ) = _HEADER.unpack(header)
+    if length > MAX_MESSAGE_SIZE:
+        raise ValueError(
+            f"message length={length}, but maximum is {MAX_MESSAGE_SIZE}!")
+    payload = _recv_exactly(sock, length)
+    if isinstance(payload, type(None)):
+        return None
+    return json.loads(payload.decode("utf-8"))
+
+
+def _recv_exactly(sock:socket.socket, size:int) -> bytes:
+    buffer = bytearray(size)
+    view = memoryview(buffer)
+    received = 0
+    while received < size:
+        num_bytes = sock.recv_into(view[received:], size - received)
+        if num_bytes == 0:
+            return None
+        received = received + num_bytes
+    return bytes(buffer)
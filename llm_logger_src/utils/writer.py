@@ -0,0 +1,190 @@
+""" Background writer consuming items from a bounded queue.
+
+The producer (e.g. LLMLogger.log()) only puts a tuple on the queue, while
+a daemon thread collects the items in batches and hands them to a handler
+(building records, updating the graph, writing the journal).
+"""
+import queue
+import threading
+from typing import Any, Callable, Dict, List, Literal
+
+
+################################################################################
+##                                  CONSTANTS                                 ##
+################################################################################
+BACKPRESSURE = ["block", "drop_oldest", "drop_newest"]
+
+_STOP = object()
+
+
+################################################################################
+##                              BackgroundWriter                              ##
+################################################################################
+class BackgroundWriter:
+
+    def __init__(self,
+            handler:Callable[[List[Any]], None],
+            maxsize:int=10000,
+            backpressure:Literal["block", "drop_oldest", "drop_newest"]="block",
+            batch_size:int=256,
+            name:str="llm-logger-writer",
+            keep:Callable[[Any], bool]=None,
+            ):
+        """ Start a daemon thread passing batches of queued items to 'handler'.
+
+        :param handler: Called from the writer thread with a list of items.
+        :param maxsize: Maximum number of queued items, defaults to 10000
+        :param backpressure: Behavior of put() on a full queue, 'block' waits
+            for a free slot, 'drop_oldest' discards the oldest queued item,
+            'drop_newest' discards the item being put, defaults to "block"
+        :param batch_size: Maximum number of items per handler call,
+            defaults to 256
+        :param name: Name of the writer thread.
+        :param keep: Items that are never dropped by the backpressure (e.g. 
+            chapters referenced by later items), a put() of such an item 
+            blocks instead, defaults to None (any item may be dropped)
+        """
+        if backpressure not in BACKPRESSURE:
+            raise ValueError(
+                f"backpressure='{backpressure}', but valid values are "\
+                f"{BACKPRESSURE}!")
+        if not isinstance(maxsize, int) or maxsize < 1:
+            raise ValueError(
+                f"maxsize='{maxsize}', but only int >= 1 is valid!")
+
+        self.handler = handler
+        self.backpressure = backpressure
+        self.batch_size = batch_size
+        self.keep = keep
+
+        self._queue = queue.Queue(maxsize=maxsize)
+        self._error = None
+        self._closed = False
+        # counters, updated by every producer thread (and the writer thread)
+        self._counters_lock = threading.Lock()
+        self._counters = dict(enqueued=0, processed=0, dropped_oldest=0, 
+                              dropped_newest=0, blocked=0)
+
+        self._thread = threading.Thread(target=self._run, name=name, daemon=True)
+        self._thread.start()
+
+    ############################################################################
+    ##                               ATTRIBUTES                               ##
+    ############################################################################
+    @property
+    def stats(self) -> Dict[str, int]:
+        with self._counters_lock:
+            stats = dict(self._counters)
+        stats["queued"] = self._queue.qsize()
+        return stats
+
+    ############################################################################
+    ##                                 PUBLIC                                 ##
+    ############################################################################
+    def put(self, item:Any) -> bool:
+        """ Queue an item, according to the backpressure policy.
+
+        :return: True if the item was queued, False if it was dropped.
+        """
+        if self._closed:
+            raise RuntimeError(f"BackgroundWriter is closed!")
+        try:
+            self._queue.put_nowait(item)
+        except queue.Full:
+            if self.backpressure == "drop_newest" and not self._kept(item):
+                self._count("dropped_newest")
+                return False
+            elif self.backpressure == "drop_oldest":
+                while True:
+                    if not self._drop_oldest():
+                        # every queued item is kept
+                        self._count("blocked")
+                        self._queue.put(item)
+                        break
+                    try:
+                        self._queue.put_nowait(item)
+                        break
+                    except queue.Full:
+                        continue
+            else:
+                self._count("blocked")
+                self._queue.put(item)
+        self._count("enqueued")
+        return True
+
+    def flush(self) -> None:
+        """ Block until every queued item was handled.
+
+        :raises RuntimeError: If the handler failed in the writer thread.
+        """
+        if self._thread.is_alive():
+            self._queue.join()
+        self._raise_error()
+
+    def close(self) -> None:
+        """ Handle the remaining items and stop the writer thread.
+        """
+        if self._closed:
+            return
+        self._closed = True
+        self._queue.put(_STOP)
+        self._thread.join()
+        self._raise_error()
+
+    ############################################################################
+    ##                                PRIVATE                                 ##
+    ############################################################################
+    def _run(self) -> None:
+        stop = False
+        while not stop:
+            batch = [self._queue.get()]
+            while len(batch) < self.batch_size:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            num_items = len(batch)
+            if any(item is _STOP for item in batch):
+                batch = [item for item in batch if item is not _STOP]
+                stop = True
+            try:
+                if len(batch) > 0:
+                    self.handler(batch)
+            except Exception as error:
+                self._error = error
+            finally:
+                self._count("processed", len(batch))
+                for _ in range(num_items):
+                    self._queue.task_done()
+
+    def _count(self, name:str, value:int=1) -> None:
+        with self._counters_lock:
+            self._counters[name] = self._counters[name] + value
+
+    def _kept(self, item:Any) -> bool:
+        return item is _STOP or (not isinstance(self.keep, type(None)) \
+            and self.keep(item))
+
+    def _drop_oldest(self) -> bool:
+        """ Discard the oldest queued item which is not kept.
+
+        :return: False if the queue is full of kept items.
+        """
+        with self._queue.mutex:
+            queued = self._queue.queue
+            index = next((index for index, item in enumerate(queued) 
+                          if not self._kept(item)), None)
+            if isinstance(index, type(None)):
+                return len(queued) < self._queue.maxsize
+            del queued[index]
+            self._queue.not_full.notify()
+        self._queue.task_done()
+        self._count("dropped_oldest")
+        return True
+
+    def _raise_error(self) -> None:
+        if not isinstance(self._error, type(None)):
+            error, self._error = self._error, None
+            raise RuntimeError(
+                f"BackgroundWriter handler failed with "\
+                f"'{type(error).__name__}: {error}'") from error
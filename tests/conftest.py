@@ -0,0 +1,9 @@
+""" Tests import the modules the way they import each other ('utils.x', 
+    'llm_logger'), thus 'llm_logger_src' is added to the path.
+"""
+import pathlib as pl
+import sys
+
+SOURCE = pl.Path(__file__).resolve().parents[1] / "llm_logger_src"
+if str(SOURCE) not in sys.path:
+    sys.path.insert(0, str(SOURCE))
@@ -0,0 +1,32 @@
+""" Shared helpers of the tests.
+"""
+from typing import Any, Dict, List
+import networkx as nx
+
+from utils.ids import _NODE, _CHAPTER
+
+
+def log_nodes(logger:Any, count:int, column:str="A", 
+              prefix:str="node") -> List[Any]:
+    """ Log 'count' nodes with content '<prefix> <index>', returns the IDs.
+    """
+    return [logger.log(column=column, style="default", stack=False, 
+                       content=f"{prefix} {index}") for index in range(count)]
+
+
+def node_ids(graph:nx.Graph) -> List[Any]:
+    return sorted(vertex_id for vertex_id, vertex in graph.nodes(data=True)
+                  if vertex["metadata"]["type"] == _NODE)
+
+
+def chapter_ids(graph:nx.Graph) -> List[Any]:
+    return sorted(vertex_id for vertex_id, vertex in graph.nodes(data=True)
+                  if vertex["metadata"]["type"] == _CHAPTER)
+
+
+def contents(graph:nx.Graph) -> Dict[Any, Any]:
+    """ NodeID -> content of every node.
+    """
+    return {vertex_id: vertex["data"]["content"] 
+            for vertex_id, vertex in graph.nodes(data=True)
+            if vertex["metadata"]["type"] == _NODE}
@@ -0,0 +1,86 @@
+""" IDs of LLMLogCollector & LLMLogServer clients, also across runs which 
+    append to the same journal.
+"""
+import multiprocessing as mp
+import pytest
+
+from llm_logger import LLMLogger
+from llm_collector import LLMLogCollector, LLMLogServer, \
+    LLMLoggerSocketClient
+from utils.ids import NodeID
+from utils.records import edge_record
+from helpers import log_nodes, node_ids, chapter_ids
+
+
+def _work(client, count):
+    client.new_chapter(title="worker")
+    log_nodes(client, count)
+    client.close()
+
+
+def _collect_run(path, count, workers=2):
+    collector = LLMLogCollector(path=path, filename="run", journal=True)
+    collector.start()
+    processes = [mp.Process(target=_work, args=(collector.client(), count))
+                 for _ in range(workers)]
+    for process in processes:
+        process.start()
+    for process in processes:
+        process.join()
+    collector.close(save=False)
+    return collector.stats
+
+
+def test_collector_ids_are_unique(tmp_path):
+    stats = _collect_run(tmp_path, count=20)
+    assert stats["nodes"] == 2 * 20 + 2
+    graph = LLMLogger().load(tmp_path / "run.journal")
+    assert len(node_ids(graph)) == 40
+
+
+def test_collector_continues_ids_of_appended_journal(tmp_path):
+    for _ in range(2):
+        _collect_run(tmp_path, count=20)
+    graph = LLMLogger().load(tmp_path / "run.journal")
+    assert len(node_ids(graph)) == 2 * 2 * 20
+
+
+def _serve_run(path, count, suffix_options):
+    server = LLMLogServer(address=("127.0.0.1", 0), path=path, 
+                          filename="run", **suffix_options)
+    server.start()
+    client = LLMLoggerSocketClient(server.address, lease_size=4)
+    client.new_chapter(title="client")
+    log_nodes(client, count)
+    client.close()
+    server.close(save=False)
+    return server
+
+
+@pytest.mark.parametrize("suffix, options", [
+    (".journal", dict(journal=True)),
+    (".sqlite", dict(sqlite=True)),
+    ])
+def test_server_continues_ids_of_appended_log(tmp_path, suffix, options):
+    for _ in range(2):
+        _serve_run(tmp_path, count=11, suffix_options=options)
+    graph = LLMLogger().load(tmp_path / f"run{suffix}")
+    assert len(node_ids(graph)) == 22
+    assert len(chapter_ids(graph)) == 2
+
+
+def test_server_reports_unresolved_edges(tmp_path):
+    server = LLMLogServer(address=("127.0.0.1", 0))
+    server.start()
+    client = LLMLoggerSocketClient(server.address)
+    client.new_chapter(title="client")
+    node_id = client.log(column="A", style="default", stack=False, 
+                         content="orphan")
+    # the related node is never sent (e.g. its client crashed)
+    client._add_record(edge_record(u=node_id, v=NodeID(10**6), time=0))
+    client.close()
+    with pytest.warns(RuntimeWarning, match="1 edge"):
+        stats = server.close(save=False)
+    assert stats["unresolved_edges"] == 1
+    assert stats == server.stats
+    assert stats["nodes"] == 2 and stats["edges"] == 0
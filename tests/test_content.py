@@ -0,0 +1,59 @@
+""" Deduplicated content (ContentStore), also across runs appending to the 
+    same files.
+"""
+from llm_logger import LLMLogger
+from utils.content import ContentStore, valid_content_ref
+from helpers import contents
+
+LONG = "system prompt " * 20
+
+
+def _log_run(path, run, **options):
+    logger = LLMLogger(path=path, filename="run", journal=True, 
+                       dedup_content=True, **options)
+    logger.new_chapter(title=f"run {run}")
+    node_ids = [logger.log(column="A", style="default", stack=False, 
+                           content=LONG + f"run {run}") for _ in range(2)]
+    logger.close()
+    return node_ids
+
+
+def test_store_deduplicates():
+    store = ContentStore()
+    refs = [store.put(LONG) for _ in range(3)]
+    assert len(set(refs)) == 1 and valid_content_ref(refs[0])
+    assert store.get(refs[0]) == LONG
+    assert store.stats["unique"] == 1 and store.stats["references"] == 3
+    assert store.put("short") == "short"
+
+
+def test_restart_keeps_content_of_earlier_runs(tmp_path):
+    first = _log_run(tmp_path, run=0)
+    second = _log_run(tmp_path, run=1)
+    graph = LLMLogger().load(tmp_path / "run.journal", resolve_content=True)
+    content = contents(graph)
+    assert all(content[node_id] == LONG + "run 0" for node_id in first)
+    assert all(content[node_id] == LONG + "run 1" for node_id in second)
+
+
+def test_append_false_starts_a_new_store(tmp_path):
+    _log_run(tmp_path, run=0)
+    _log_run(tmp_path, run=1, append=False)
+    store = ContentStore.open(tmp_path / "run.content")
+    assert len(store) == 1
+    store.close()
+
+
+def test_truncated_entry_is_dropped_on_append(tmp_path):
+    path = tmp_path / "run.content"
+    store = ContentStore(path=path)
+    ref = store.put(LONG)
+    store.close()
+    with open(path, "ab") as file:
+        file.write(b"CONT_partial")
+    store = ContentStore(path=path)
+    other = store.put(LONG + "other")
+    store.close()
+    store = ContentStore.open(path)
+    assert store.get(ref) == LONG and store.get(other) == LONG + "other"
+    store.close()
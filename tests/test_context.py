@@ -0,0 +1,97 @@
+""" Chapter & parent node of the current context (thread/asyncio task), 
+    thread-safe logging and read-only snapshots.
+"""
+import asyncio
+import threading
+import networkx as nx
+import pytest
+
+from llm_logger import LLMLogger
+from helpers import log_nodes, node_ids
+
+
+def _chapter_of(graph, node_id):
+    return graph.nodes[node_id]["metadata"]["chapter_id"]
+
+
+def test_chapter_is_scoped_to_the_context():
+    logger = LLMLogger()
+    outer = logger.new_chapter(title="outer")
+    with logger.chapter("inner") as inner:
+        first = logger.log(column="A", content="inner")
+    second = logger.log(column="A", content="outer")
+    graph = logger.graph
+    assert _chapter_of(graph, first) == inner != outer
+    assert _chapter_of(graph, second) == outer
+
+
+def test_concurrent_tasks_keep_their_chapters():
+    logger = LLMLogger()
+    logger.new_chapter(title="main")
+
+    async def agent(name):
+        with logger.chapter(name) as chapter_id:
+            node_ids = list()
+            for _ in range(5):
+                node_ids.append(await logger.alog(column=name, content=name))
+                await asyncio.sleep(0)
+            return chapter_id, node_ids
+
+    async def main():
+        return await asyncio.gather(*[agent(f"agent {index}") 
+                                      for index in range(4)])
+
+    results = asyncio.run(main())
+    graph = logger.graph
+    for chapter_id, node_ids in results:
+        assert all(_chapter_of(graph, node_id) == chapter_id 
+                   for node_id in node_ids)
+
+
+def test_branch_relates_nodes_of_the_context():
+    logger = LLMLogger()
+    logger.new_chapter(title="chat")
+    plan = logger.log(column="planner", content="plan")
+    with logger.branch(relates_to_node_id=plan):
+        first = logger.log(column="tool", content="call")
+        second = logger.log(column="tool", content="result")
+    third = logger.log(column="planner", content="answer")
+    graph = logger.graph
+    assert sorted(tuple(sorted(edge)) for edge in graph.edges) \
+        == sorted([tuple(sorted([plan, first])), 
+                   tuple(sorted([first, second]))])
+    assert graph.degree(third) == 0
+
+
+@pytest.mark.parametrize("options", [dict(), dict(staging=True), 
+                                     dict(background=True)])
+def test_threads_log_unique_nodes(options):
+    logger = LLMLogger(**options)
+    logger.new_chapter(title="threads")
+    results = list()
+
+    def worker(index):
+        results.extend(log_nodes(logger, count=200, column=f"T{index}"))
+
+    threads = [threading.Thread(target=worker, args=(index,)) 
+               for index in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    logger.close()
+    assert len(set(results)) == 1600
+    assert node_ids(logger.graph) == sorted(results)
+
+
+def test_snapshot_is_frozen_and_incremental():
+    logger = LLMLogger()
+    logger.new_chapter(title="chat")
+    log_nodes(logger, count=3)
+    first = logger.graph
+    assert logger.graph is first
+    with pytest.raises(nx.NetworkXError):
+        first.add_node("other")
+    log_nodes(logger, count=2, prefix="late")
+    second = logger.graph
+    assert len(node_ids(first)) == 3 and len(node_ids(second)) == 5
@@ -0,0 +1,83 @@
+""" Delta-encoded content (utils.delta) round-trips through every format.
+"""
+import pytest
+
+from llm_logger import LLMLogger, resolve_content
+from utils.delta import DeltaEncoder, apply_delta, decode_content, \
+    delta_encoded
+from helpers import log_nodes, contents
+
+PROMPT = "You are a helpful assistant. " * 20
+FORMATS = ["gml", "llmz", "npz"]
+
+
+def _log(path, **options):
+    logger = LLMLogger(path=path, filename="run", delta_content="column",
+                       **options)
+    logger.new_chapter(title="chat")
+    node_ids = log_nodes(logger, count=40, prefix=PROMPT)
+    # user content which looks like a delta stays as is
+    node_ids.append(logger.log(column="A", style="default", stack=False,
+                               content="DELT_abc"))
+    return logger, node_ids
+
+
+def _expected(node_ids):
+    expected = {node_id: f"{PROMPT} {index}" 
+                for index, node_id in enumerate(node_ids[:-1])}
+    expected[node_ids[-1]] = "DELT_abc"
+    return expected
+
+
+def test_encoder_keyframes():
+    encoder = DeltaEncoder(keyframe_every=4, min_length=16)
+    encoded = list()
+    for index in range(10):
+        content = PROMPT + str(index)
+        delta = encoder.encode(node_id=f"N{index}", content=content, 
+                               reference_id=f"N{index-1}")
+        encoded.append(delta is not content)
+        if encoded[-1]:
+            assert apply_delta(PROMPT + str(index-1), delta) == content
+    # full content at least every 'keyframe_every' nodes
+    assert encoded == [False, True, True, True] * 2 + [False, True]
+
+
+def test_graph_stores_deltas_and_resolves():
+    logger, node_ids = _log(path=None)
+    graph = logger.graph.copy()
+    assert any(str(content).startswith("DELT_") 
+               for content in contents(graph).values()
+               if content != "DELT_abc")
+    resolve_content(graph, content_store=logger.content_store)
+    assert contents(graph) == _expected(node_ids)
+
+
+@pytest.mark.parametrize("format", FORMATS)
+def test_save_load_roundtrip(tmp_path, format):
+    logger, node_ids = _log(path=tmp_path)
+    logger.save(format=format)
+    graph = LLMLogger().load(tmp_path / f"run.{format}", 
+                             resolve_content=True)
+    assert contents(graph) == _expected(node_ids)
+
+
+@pytest.mark.parametrize("storage", ["journal", "sqlite"])
+def test_streamed_roundtrip(tmp_path, storage):
+    logger, node_ids = _log(path=tmp_path, **{storage: True})
+    logger.close()
+    graph = LLMLogger().load(tmp_path / f"run.{storage}", 
+                             resolve_content=True)
+    assert contents(graph) == _expected(node_ids)
+
+
+def test_decode_missing_reference_raises():
+    logger, node_ids = _log(path=None)
+    graph = logger.graph.copy()
+    deltas = [node_id for node_id, content in contents(graph).items() 
+              if str(content).startswith("DELT_") and content != "DELT_abc"]
+    graph.remove_nodes_from(node_ids[:1])
+    with pytest.raises(RuntimeError):
+        for node_id in deltas:
+            decode_content(graph, graph.nodes[node_id]["data"]["content"],
+                encoded=delta_encoded(graph.nodes[node_id]["metadata"]))
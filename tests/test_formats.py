@@ -0,0 +1,83 @@
+""" Save/load round-trips of every storage backend (utils.backends), lazy
+    content and deduplicated content.
+"""
+import pytest
+
+from llm_logger import LLMLogger, resolve_content
+from helpers import log_nodes, node_ids, chapter_ids, contents
+
+FORMATS = ["gml", "llmz", "npz", "sqlite", "journal"]
+LONG = "system prompt " * 20
+
+
+def _log(logger):
+    logger.new_chapter(title="chat", content="first chapter")
+    first = log_nodes(logger, count=3)
+    logger.log(column="B", style="llm", stack=True, content=LONG, 
+               relates_to_node_id=first[-1], relation_content="answers",
+               relation_style="reply")
+    logger.new_chapter(title="tools")
+    logger.log(column="tool", content=LONG, relates_to_node_id=first[0],
+               relation_content="uses")
+    logger.log(column="tool", content="")
+    return logger
+
+
+def _edges(graph):
+    return {tuple(sorted(edge)): (data["data"]["content"], 
+                                  data["metadata"]["style"])
+            for *edge, data in graph.edges(data=True)}
+
+
+def _metadata(graph):
+    return {vertex_id: {key: value 
+                        for key, value in vertex["metadata"].items() 
+                        if key != "time"}
+            for vertex_id, vertex in graph.nodes(data=True)}
+
+
+def _save(tmp_path, format, **options):
+    """ Logged graph (content resolved) saved as/streamed into 'format'.
+    """
+    streamed = format in ["sqlite", "journal"]
+    logger = _log(LLMLogger(path=tmp_path, filename="run", 
+                            **({format: True} if streamed else dict()),
+                            **options))
+    if not streamed:
+        logger.save(format=format)
+    logger.close()
+    return resolve_content(logger.graph.copy(), 
+                           content_store=logger.content_store)
+
+
+@pytest.mark.parametrize("format", FORMATS)
+def test_roundtrip(tmp_path, format):
+    expected = _save(tmp_path, format)
+    graph = LLMLogger().load(tmp_path / f"run.{format}", 
+                             resolve_content=True)
+    assert contents(graph) == contents(expected)
+    assert chapter_ids(graph) == chapter_ids(expected)
+    assert _metadata(graph) == _metadata(expected)
+    assert _edges(graph) == _edges(expected)
+
+
+@pytest.mark.parametrize("format", FORMATS)
+def test_dedup_roundtrip(tmp_path, format):
+    expected = _save(tmp_path, format, dedup_content=True)
+    graph = LLMLogger().load(tmp_path / f"run.{format}", 
+                             resolve_content=True)
+    assert contents(graph) == contents(expected)
+    assert LONG in contents(graph).values()
+
+
+@pytest.mark.parametrize("format", ["gml", "llmz"])
+def test_lazy_content(tmp_path, format):
+    expected = _save(tmp_path, format)
+    loader = LLMLogger()
+    graph = loader.load(tmp_path / f"run.{format}", lazy_content=True)
+    assert node_ids(graph) == node_ids(expected)
+    # content stays in the file until it is resolved
+    assert LONG not in contents(graph).values()
+    resolve_content(graph, content_store=loader.content_store)
+    assert contents(graph) == contents(expected)
+    assert _edges(graph) == _edges(expected)
@@ -0,0 +1,86 @@
+""" Filtered loads (utils.index), with and without a sidecar index.
+"""
+import pytest
+
+from llm_logger import LLMLogger
+from utils.index import index_path
+from helpers import node_ids, chapter_ids
+
+SOURCES = ["gml", "journal", "sqlite"]
+
+
+def _log(path, index):
+    """ 3 chapters of 6 nodes in the columns A/B and the styles llm/tool,
+        every node relates to the previous one of its chapter.
+    """
+    logger = LLMLogger(path=path, filename="run", journal=True, sqlite=True,
+                       index=index)
+    for chapter in range(3):
+        logger.new_chapter(title=f"chapter {chapter}")
+        node_id = None
+        for index in range(6):
+            node_id = logger.log(
+                column="AB"[index % 2], style=["llm", "tool"][index % 3 == 0],
+                stack=False, content=f"node {chapter}.{index}", 
+                relates_to_node_id=node_id)
+    logger.save(format="gml")
+    graph = logger.graph
+    logger.close()
+    return graph
+
+
+def _expected(graph, select):
+    """ Subgraph of the nodes matching 'select(node_id, metadata)'.
+    """
+    nodes = [vertex_id for vertex_id in node_ids(graph) 
+             if select(vertex_id, graph.nodes[vertex_id]["metadata"])]
+    chapters = sorted(set(graph.nodes[vertex_id]["metadata"]["chapter_id"] 
+                          for vertex_id in nodes))
+    edges = sorted(tuple(sorted(edge)) for edge in graph.subgraph(nodes).edges)
+    return nodes, chapters, edges
+
+
+def _loaded(graph):
+    return node_ids(graph), chapter_ids(graph), \
+        sorted(tuple(sorted(edge)) for edge in graph.edges)
+
+
+def _filters(graph):
+    nodes = node_ids(graph)
+    times = sorted(graph.nodes[vertex_id]["metadata"]["time"] 
+                   for vertex_id in nodes)
+    chapter = chapter_ids(graph)[1]
+    start, end = times[4], times[11]
+    return [
+        (dict(nodes=nodes[2:9]), 
+         lambda node_id, metadata: node_id in nodes[2:9]),
+        (dict(chapters=[chapter]), 
+         lambda node_id, metadata: metadata["chapter_id"] == chapter),
+        (dict(time_range=(start, end)), 
+         lambda node_id, metadata: start <= metadata["time"] <= end),
+        (dict(columns=["B"]), 
+         lambda node_id, metadata: metadata["column"] == "B"),
+        (dict(styles=["tool"], chapters=[chapter]), 
+         lambda node_id, metadata: metadata["style"] == "tool" 
+            and metadata["chapter_id"] == chapter),
+        ]
+
+
+@pytest.mark.parametrize("source", SOURCES)
+@pytest.mark.parametrize("index", [True, False])
+def test_filtered_load(tmp_path, source, index):
+    graph = _log(tmp_path, index=index)
+    if index and source != "sqlite":
+        assert index_path(tmp_path / f"run.{source}").exists()
+    for filters, select in _filters(graph):
+        loaded = LLMLogger().load(tmp_path / f"run.{source}", **filters)
+        assert _loaded(loaded) == _expected(graph, select), filters
+
+
+def test_indexed_journal_of_appended_runs(tmp_path):
+    first = _log(tmp_path, index=True)
+    second = _log(tmp_path, index=True)
+    chapters = chapter_ids(first)[-1:] + chapter_ids(second)[:1]
+    graph = LLMLogger().load(tmp_path / "run.journal", chapters=chapters)
+    assert chapter_ids(graph) == chapters
+    assert len(node_ids(graph)) == 12 and graph.number_of_edges() == 10
@@ -0,0 +1,64 @@
+""" Journal replay & appending to an existing journal/database 
+    (LLMLogger(journal=True, sqlite=True, append=...)).
+"""
+import pytest
+
+from llm_logger import LLMLogger
+from utils.journal import replay_journal, JournalWriter, read_journal
+from utils.records import node_record
+from utils.ids import NodeID, ChapterID
+from helpers import log_nodes, node_ids, chapter_ids, contents
+
+
+def test_replay_matches_logged_graph(tmp_path):
+    logger = LLMLogger(path=tmp_path, filename="run", journal=True)
+    logger.new_chapter(title="first")
+    ids = log_nodes(logger, 5)
+    logger.log(column="B", style="default", stack=False, content="reply",
+               relates_to_node_id=ids[0])
+    logger.close()
+
+    graph = replay_journal(tmp_path / "run.journal")
+    assert node_ids(graph) == node_ids(logger.graph)
+    assert contents(graph) == contents(logger.graph)
+    assert graph.number_of_edges() == logger.graph.number_of_edges()
+
+
+def test_truncated_last_line_is_skipped(tmp_path):
+    path = tmp_path / "run.journal"
+    writer = JournalWriter(path=path)
+    writer.write(node_record(node_id=NodeID(1), time=1, column="A", 
+        style="default", stack=False, chapter_id=ChapterID(0)))
+    writer.close()
+    with open(path, "a", encoding="utf-8") as file:
+        file.write('{"type": "NODE_", "id": ')
+    assert len(list(read_journal(path))) == 1
+
+
+@pytest.mark.parametrize("suffix, options", [
+    (".journal", dict(journal=True)),
+    (".sqlite", dict(sqlite=True)),
+    ])
+def test_restart_appends_and_continues_ids(tmp_path, suffix, options):
+    for run in range(2):
+        logger = LLMLogger(path=tmp_path, filename="run", **options)
+        logger.new_chapter(title=f"run {run}")
+        log_nodes(logger, 3, prefix=f"run {run}")
+        logger.close()
+
+    graph = LLMLogger().load(tmp_path / f"run{suffix}")
+    assert len(node_ids(graph)) == 6
+    assert len(chapter_ids(graph)) == 2
+    assert sorted(contents(graph).values()) == \
+        sorted(f"run {run} {index}" for run in range(2) for index in range(3))
+
+
+def test_append_false_overwrites(tmp_path):
+    for run in range(2):
+        logger = LLMLogger(path=tmp_path, filename="run", journal=True, 
+                           append=False)
+        log_nodes(logger, 3, prefix=f"run {run}")
+        logger.close()
+
+    graph = LLMLogger().load(tmp_path / "run.journal")
+    assert sorted(contents(graph).values()) == [f"run 1 {i}" for i in range(3)]
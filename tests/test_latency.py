@@ -0,0 +1,117 @@
+""" Latency spans (utils.spans) & the critical path analysis 
+    (utils.latency).
+"""
+import asyncio
+import networkx as nx
+import pytest
+
+from llm_logger import LLMLogger
+from utils.ids import NodeID, ChapterID
+from utils.records import graph_record, chapter_record, node_record, \
+    edge_record, add_records
+from utils.latency import analyze_latency, critical_path_node_ids, \
+    RELATES_TO, PRECEDES
+
+MS = 1000000
+T0 = 1700000000 * 10**9
+
+
+def _span(counter, column, start, end=None, parent=None):
+    """ Timed node from 'start' to 'end' (ms after T0), an instant without 
+        'end', related to the node 'parent'.
+    """
+    span = None if isinstance(end, type(None)) else dict(
+        start=T0+start*MS, end=T0+end*MS, duration=(end-start)*MS)
+    records = [node_record(node_id=NodeID(counter), time=T0+start*MS, 
+        column=column, style="llm", stack=False, chapter_id=ChapterID(1), 
+        content=f"node {counter}", span=span)]
+    if not isinstance(parent, type(None)):
+        records.append(edge_record(u=NodeID(parent), v=NodeID(counter), 
+                                   time=T0+start*MS))
+    return records
+
+
+def _graph():
+    """ planner (1) fans out to retriever (2) & writer (3), the answer (4) 
+        relates to the retriever, the summary (5) relates to nothing.
+    """
+    records = [graph_record(time=T0), 
+               chapter_record(chapter_id=ChapterID(1), time=T0, title="run")]
+    records.extend(_span(1, "planner", 0, 20))
+    records.extend(_span(2, "retriever", 25, 35, parent=1))
+    records.extend(_span(3, "writer", 25, 70, parent=1))
+    records.extend(_span(4, "writer", 40, parent=2))
+    records.extend(_span(5, "summary", 80, 90))
+    return add_records(nx.Graph(), records)
+
+
+def test_critical_path():
+    graph = _graph()
+    assert critical_path_node_ids(graph) \
+        == [NodeID(1), NodeID(3), NodeID(5)]
+    table = analyze_latency(graph)["critical_path"]
+    assert table["wait"].tolist() == [0, 5*MS, 10*MS]
+    assert table["duration"].tolist() == [20*MS, 45*MS, 10*MS]
+    assert table["dependency"].tolist() == ["", RELATES_TO, PRECEDES]
+
+
+def test_column_chapter_and_gap_tables():
+    tables = analyze_latency(_graph())
+    columns = tables["columns"].set_index("column")
+    # writer: busy 25-70, the instant at 40 lies within
+    assert columns.loc["writer", "busy"] == 45*MS
+    assert columns.loc["writer", "idle"] == 0
+    assert columns.loc["planner", "utilization"] == 1.0
+    chapters = tables["chapters"]
+    assert chapters["wall"].tolist() == [90*MS]
+    assert chapters["nodes"].tolist() == [5]
+    gaps = sorted(tables["gaps"]["gap"].tolist())
+    assert gaps == [5*MS, 5*MS, 5*MS]
+
+
+def test_span_logs_timed_nodes():
+    logger = LLMLogger()
+    logger.new_chapter(title="run")
+    with logger.span(column="planner", style="llm") as span:
+        span.content = "plan"
+        span.tokens = dict(prompt=12, completion=3)
+    with pytest.raises(ValueError):
+        with logger.span(column="tool") as failed:
+            raise ValueError("timeout")
+
+    @logger.span(column="retriever")
+    def retrieve(query):
+        return f"documents of {query}"
+
+    @logger.span(column="retriever")
+    async def aretrieve(query):
+        return f"documents of {query}"
+
+    assert retrieve("llm") == "documents of llm"
+    assert asyncio.run(aretrieve("async")) == "documents of async"
+    graph = logger.graph
+    planner = graph.nodes[span.node_id]
+    assert planner["data"]["content"] == "plan"
+    timing = planner["metadata"]["span"]
+    assert timing["end"] - timing["start"] == timing["duration"] >= 0
+    assert timing["tokens"] == dict(prompt=12, completion=3)
+    assert graph.nodes[failed.node_id]["metadata"]["span"]["error"] \
+        == "ValueError: timeout"
+    retrieved = sorted(vertex["data"]["content"] 
+        for _, vertex in graph.nodes(data=True)
+        if vertex["metadata"].get("column") == "retriever")
+    assert retrieved == ["documents of async", "documents of llm"]
+    assert len(critical_path_node_ids(graph)) >= 1
+
+
+def test_disabled_spans_log_nothing():
+    logger = LLMLogger(spans=False)
+
+    def function():
+        return "content"
+
+    with logger.span(column="planner") as span:
+        pass
+    assert logger.span(column="retriever")(function) is function
+    assert span.node_id is None
+    assert logger.graph.number_of_nodes() == 0
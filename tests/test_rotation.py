@@ -0,0 +1,96 @@
+""" Rotating journal segments with retention (utils.rotation) & incremental 
+    GML checkpoints (utils.gml).
+"""
+from llm_logger import LLMLogger
+from utils.journal import read_journal
+from utils.rotation import read_manifest
+from utils.gml import segment_path, segment_paths
+from utils.ids import _NODE, _CHAPTER
+from helpers import log_nodes, node_ids, chapter_ids, contents
+
+
+def _log_chapters(logger, chapters, nodes):
+    """ Every node relates to the previous node (across chapters).
+    """
+    node_id = None
+    for chapter in range(chapters):
+        logger.new_chapter(title=f"chapter {chapter}")
+        for index in range(nodes):
+            node_id = logger.log(column="A", style="default", stack=False,
+                                 content=f"node {chapter}.{index}", 
+                                 relates_to_node_id=node_id)
+
+
+def _segment_records(path):
+    manifest = read_manifest(path / "run.manifest")
+    return [list(read_journal(path / segment["file"])) 
+            for segment in manifest["segments"]]
+
+
+def test_rotation_loads_as_one_log(tmp_path):
+    logger = LLMLogger(path=tmp_path, filename="run", journal=True, 
+                       rotate_nodes=5)
+    _log_chapters(logger, chapters=2, nodes=11)
+    expected = logger.graph
+    logger.close()
+    segments = _segment_records(tmp_path)
+    assert len(segments) == 5
+    assert all(sum(record["type"] == _NODE for record in records) <= 5 
+               for records in segments)
+    graph = LLMLogger().load(tmp_path / "run.manifest")
+    assert node_ids(graph) == node_ids(expected)
+    assert chapter_ids(graph) == chapter_ids(expected)
+    assert graph.number_of_edges() == expected.number_of_edges() == 21
+
+
+def test_retention_keeps_the_last_segments(tmp_path):
+    logger = LLMLogger(path=tmp_path, filename="run", journal=True, 
+                       rotate_nodes=5, retention=2)
+    _log_chapters(logger, chapters=2, nodes=11)
+    expected = logger.graph
+    logger.close()
+    assert len(list(tmp_path.glob("run.*.journal"))) == 2
+    graph = LLMLogger().load(tmp_path / "run.manifest")
+    # segments 4 & 5 (nodes 16-22), the edge to node 15 is skipped
+    assert node_ids(graph) == node_ids(expected)[-7:]
+    assert graph.number_of_edges() == 6
+    for vertex_id in node_ids(graph):
+        assert graph.has_node(graph.nodes[vertex_id]["metadata"]["chapter_id"])
+
+
+def test_carried_chapters_are_bounded(tmp_path):
+    logger = LLMLogger(path=tmp_path, filename="run", journal=True, 
+                       rotate_nodes=4)
+    _log_chapters(logger, chapters=20, nodes=2)
+    logger.close()
+    # 2 chapters of its own, carried are the 2 chapters of the previous 
+    # segment & the chapter which was open when the previous segment started
+    segments = _segment_records(tmp_path)
+    assert len(segments) == 11
+    for records in segments:
+        chapters = [record["id"] for record in records 
+                    if record["type"] == _CHAPTER]
+        assert len(chapters) <= 5
+
+
+def test_checkpoint_segments(tmp_path):
+    logger = LLMLogger(path=tmp_path, filename="run")
+    logger.new_chapter(title="chat")
+    first = log_nodes(logger, count=3)
+    logger.checkpoint()
+    log_nodes(logger, count=2, prefix="late")
+    logger.log(column="B", content="answer", relates_to_node_id=first[0])
+    logger.checkpoint()
+    expected = logger.graph
+    assert segment_paths(tmp_path / "run.gml") \
+        == [segment_path(tmp_path, "run", segment) for segment in [0, 1]]
+    graph = LLMLogger().load(tmp_path / "run.gml")
+    assert contents(graph) == contents(expected)
+    assert graph.number_of_edges() == 1
+    # a new destination restarts the segments (stale ones are removed)
+    logger.checkpoint(filename="other")
+    logger.checkpoint()
+    assert segment_paths(tmp_path / "run.gml") \
+        == [segment_path(tmp_path, "run", 0)]
+    assert contents(LLMLogger().load(tmp_path / "run.gml")) \
+        == contents(expected)
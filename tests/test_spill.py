@@ -0,0 +1,87 @@
+""" Memory-bounded retention, older nodes are spilled to disk & restored 
+    (utils.spill).
+"""
+import gc
+import pytest
+
+from llm_logger import LLMLogger
+from utils.spill import SPILL_SUFFIX
+from helpers import chapter_ids, contents
+
+FORMATS = ["gml", "journal", "npz"]
+
+
+def _log(logger, chapters=5, nodes=4, size=16):
+    """ Every node relates to the previous node (across chapters).
+    """
+    node_id = None
+    for chapter in range(chapters):
+        logger.new_chapter(title=f"chapter {chapter}")
+        for index in range(nodes):
+            node_id = logger.log(column="A", style="default", stack=False,
+                content=f"{chapter}.{index} ".ljust(size, "x"), 
+                relates_to_node_id=node_id)
+
+
+def _edges(graph):
+    return sorted(tuple(sorted(edge)) for edge in graph.edges)
+
+
+def _reference(tmp_path, **kwargs):
+    logger = LLMLogger(path=tmp_path, filename="reference")
+    _log(logger, **kwargs)
+    return logger.graph
+
+
+def test_resident_chapters(tmp_path):
+    expected = _reference(tmp_path)
+    logger = LLMLogger(path=tmp_path, filename="run", resident_chapters=2)
+    _log(logger)
+    residency = logger.residency
+    assert residency["resident_chapters"] == 2
+    assert residency["resident_nodes"] == 8
+    assert residency["spilled_nodes"] == 12
+    # the edge into the resident chapters keeps its spilled node as a stub
+    assert residency["stubs"] == 1
+    graph = logger.graph
+    assert contents(graph) == contents(expected)
+    assert chapter_ids(graph) == chapter_ids(expected)
+    assert _edges(graph) == _edges(expected)
+    logger.close()
+
+
+def test_resident_bytes(tmp_path):
+    expected = _reference(tmp_path, size=1000)
+    logger = LLMLogger(path=tmp_path, filename="run", resident_bytes=5000)
+    _log(logger, size=1000)
+    residency = logger.residency
+    assert residency["resident_bytes"] <= 5000
+    assert residency["resident_nodes"] + residency["spilled_nodes"] == 20
+    assert contents(logger.graph) == contents(expected)
+    logger.close()
+
+
+@pytest.mark.parametrize("format", FORMATS)
+def test_save_includes_spilled_nodes(tmp_path, format):
+    expected = _reference(tmp_path)
+    logger = LLMLogger(path=tmp_path, filename="run", resident_chapters=1)
+    _log(logger)
+    logger.save(format=format)
+    graph = LLMLogger().load(tmp_path / f"run.{format}")
+    assert contents(graph) == contents(expected)
+    assert _edges(graph) == _edges(expected)
+    logger.close()
+
+
+def test_spill_file_outlives_close(tmp_path):
+    expected = _reference(tmp_path)
+    logger = LLMLogger(path=tmp_path, filename="run", resident_chapters=1)
+    _log(logger)
+    logger.close()
+    # the graph stays readable after close(), the file is deleted with the
+    # logger
+    assert contents(logger.graph) == contents(expected)
+    assert len(list(tmp_path.glob(f"*{SPILL_SUFFIX}"))) == 1
+    del logger
+    gc.collect()
+    assert len(list(tmp_path.glob(f"*{SPILL_SUFFIX}"))) == 0
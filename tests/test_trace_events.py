@@ -0,0 +1,59 @@
+""" Trace Event Format export (utils.trace_events).
+"""
+import json
+
+from llm_logger import LLMLogger
+from utils.backends import get_backend
+from utils.trace_events import iter_trace_events
+from helpers import log_nodes
+
+PROMPT = "You are a helpful assistant. " * 20
+
+
+def _log_deltas(path):
+    logger = LLMLogger(path=path, filename="run", journal=True, 
+                       delta_content="column")
+    logger.new_chapter(title="chat")
+    log_nodes(logger, count=4, prefix=PROMPT)
+    return logger
+
+
+def _node_args(events):
+    return [event["args"] for event in events 
+            if "node_id" in event.get("args", dict())]
+
+
+def _contents(events):
+    return {args["node_id"]: args["content"] for args in _node_args(events)}
+
+
+def test_trace_decodes_delta_content(tmp_path):
+    logger = _log_deltas(tmp_path)
+    logger.close()
+    records = list(get_backend(".journal").read(tmp_path / "run.journal"))
+    assert any(record.get("encoding") == "delta" for record in records)
+    contents = _contents(iter_trace_events(records, content=True))
+    assert sorted(contents.values()) == [f"{PROMPT} {index}" 
+                                         for index in range(4)]
+
+
+def test_trace_omits_delta_of_unknown_reference(tmp_path):
+    logger = _log_deltas(tmp_path)
+    logger.close()
+    records = [record for record in 
+               get_backend(".journal").read(tmp_path / "run.journal")
+               if record.get("encoding") == "delta"]
+    args = _node_args(iter_trace_events(records, content=True))
+    assert len(args) == len(records)
+    assert not any("content" in node_args for node_args in args)
+
+
+def test_save_trace(tmp_path):
+    logger = _log_deltas(tmp_path)
+    logger.save(path=tmp_path, filename="run", format="trace", content=True)
+    logger.close()
+    with open(tmp_path / "run.json", encoding="utf-8") as file:
+        events = json.load(file)["traceEvents"]
+    assert not any("DELT_" in str(content) 
+                   for content in _contents(events).values())
+    assert len(_contents(events)) == 4
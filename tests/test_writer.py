@@ -0,0 +1,76 @@
+""" BackgroundWriter backpressure & LLMLogger(background=True).
+"""
+import threading
+import time
+import pytest
+
+from llm_logger import LLMLogger
+from utils.writer import BackgroundWriter
+from helpers import node_ids, chapter_ids
+
+THREADS = 8
+ITEMS = 2000
+
+
+def _put_concurrently(writer, keep=lambda index: False):
+    def produce(thread):
+        for index in range(ITEMS):
+            writer.put((thread, index, keep(index)))
+    threads = [threading.Thread(target=produce, args=(thread, )) 
+               for thread in range(THREADS)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    writer.flush()
+
+
+@pytest.mark.parametrize("backpressure", ["block", "drop_oldest", 
+                                          "drop_newest"])
+def test_stats_account_for_every_put(backpressure):
+    handled = list()
+    def handler(batch):
+        time.sleep(0.0005)
+        handled.extend(batch)
+    writer = BackgroundWriter(handler=handler, maxsize=16, batch_size=8, 
+                              backpressure=backpressure)
+    _put_concurrently(writer)
+    writer.close()
+    stats = writer.stats
+    assert stats["enqueued"] + stats["dropped_newest"] == THREADS * ITEMS
+    assert stats["processed"] + stats["dropped_oldest"] == stats["enqueued"]
+    assert stats["processed"] == len(handled)
+    if backpressure == "block":
+        assert len(handled) == THREADS * ITEMS
+
+
+@pytest.mark.parametrize("backpressure", ["drop_oldest", "drop_newest"])
+def test_kept_items_are_never_dropped(backpressure):
+    handled = list()
+    def handler(batch):
+        time.sleep(0.001)
+        handled.extend(batch)
+    writer = BackgroundWriter(handler=handler, maxsize=4, batch_size=2, 
+                              backpressure=backpressure, 
+                              keep=lambda item: item[2])
+    _put_concurrently(writer, keep=lambda index: index % 100 == 0)
+    writer.close()
+    kept = [item for item in handled if item[2]]
+    assert len(kept) == THREADS * (ITEMS // 100)
+
+
+@pytest.mark.parametrize("backpressure", ["drop_oldest", "drop_newest"])
+def test_background_logger_keeps_chapters(backpressure):
+    logger = LLMLogger(background=True, queue_size=4, 
+                       backpressure=backpressure)
+    for chapter in range(6):
+        logger.new_chapter(title=f"chapter {chapter}")
+        for index in range(200):
+            logger.log(column="A", style="default", stack=False, 
+                       content=f"{chapter}.{index}")
+    logger.flush()
+    graph = logger.graph
+    assert len(chapter_ids(graph)) == 6
+    assert all(graph.has_node(graph.nodes[node_id]["metadata"]["chapter_id"]) 
+               for node_id in node_ids(graph))
+    logger.close()